@@ -0,0 +1,2 @@
+# coding:utf-8
+# 五子棋核心包，不依赖界面库，可在后台进程和批处理任务中直接导入
@@ -0,0 +1,20 @@
+# coding:utf-8
+"""五子棋核心逻辑：棋盘、规则、棋步记录与序列化，不依赖Qt"""
+
+from gomoku.core.bitboard import BitBoard, DIRECTIONS
+from gomoku.core.board import Board
+from gomoku.core.forbidden import ForbiddenMap
+from gomoku.core.game import Game, MOVE_OK, MOVE_WIN, MOVE_FORBIDDEN, MOVE_INVALID
+from gomoku.core.history import MoveHistory
+from gomoku.core.serialization import game_to_dict, game_from_dict, load_game_dict
+from gomoku.core.state import GameState
+from gomoku.core.threats import ThreatTracker
+from gomoku.core.variants import RuleVariant, VARIANTS, get_variant
+from gomoku.core.zobrist import compute_hash
+
+__all__ = [
+    'BitBoard', 'DIRECTIONS', 'Board', 'ForbiddenMap', 'Game', 'GameState', 'MoveHistory',
+    'MOVE_OK', 'MOVE_WIN', 'MOVE_FORBIDDEN', 'MOVE_INVALID',
+    'game_to_dict', 'game_from_dict', 'load_game_dict', 'compute_hash',
+    'RuleVariant', 'VARIANTS', 'get_variant', 'ThreatTracker',
+]
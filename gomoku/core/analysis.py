@@ -0,0 +1,90 @@
+# coding:utf-8
+"""落子点的单次方向分析
+
+一次遍历四个方向，得到经过该点的连子长度、活端数量和棋型分类，
+胜负判断、长连、三三、四四等规则都基于同一份分析结果，不再各自重复扫描。
+该点为空时按"假设在此落子"计算，不需要修改棋盘。
+"""
+from collections import namedtuple
+
+from gomoku.core.bitboard import WINDOW_MASK, CENTER_BIT
+from gomoku.core.patterns import SPREAD, OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR
+
+# run: 经过该点的连子数(含该点)；open_ends: 连子两端的空位数(0~2)；shape: 棋型分类
+LineInfo = namedtuple('LineInfo', ['run', 'open_ends', 'shape'])
+
+
+def analyze_point(position, row, col, color, table):
+    """分析color在(row, col)落子后四个方向的情况
+    position为BitBoard，table为棋型分类表，返回四个方向的LineInfo"""
+    own_dirs = position.lines[color]
+    opp_dirs = position.lines[3 - color]
+    result = []
+    for d, (line, pos, length, off) in enumerate(position.geometry[row * position.size + col]):
+        own = own_dirs[d][line] | (1 << pos)
+        opp = opp_dirs[d][line]
+
+        # 连子长度：pos之上和之下连续的己方棋子
+        above = own >> (pos + 1)
+        forward = (above ^ (above + 1)).bit_length() - 1
+        gaps = ~own & ((1 << pos) - 1)
+        backward = pos - gaps.bit_length() if gaps else pos
+
+        # 活端：连子两端紧邻的格子在棋盘内且为空
+        open_ends = 0
+        end = pos + forward + 1
+        if end < length and not opp >> end & 1:
+            open_ends += 1
+        start = pos - backward - 1
+        if start >= 0 and not opp >> start & 1:
+            open_ends += 1
+
+        # 棋型：取11格窗口编码后查表
+        shift = pos - 5
+        if shift >= 0:
+            own >>= shift
+            opp >>= shift
+        else:
+            own <<= -shift
+            opp <<= -shift
+        code = SPREAD[own & WINDOW_MASK] + 2 * SPREAD[opp & WINDOW_MASK & ~CENTER_BIT] + 3 * SPREAD[off]
+
+        result.append(LineInfo(1 + forward + backward, open_ends, table[code]))
+    return tuple(result)
+
+
+def has_five(lines, exact_five):
+    """是否形成五连；exact_five为True时超过五子不算"""
+    for info in lines:
+        if info.run == 5 or (info.run > 5 and not exact_five):
+            return True
+    return False
+
+
+def has_overline(lines):
+    """是否形成长连(超过5子)"""
+    return any(info.run > 5 for info in lines)
+
+
+def count_fours(lines):
+    """统计四的数量(活四和冲四，同一条线上的双四计为两个)"""
+    count = 0
+    for info in lines:
+        if info.shape == DOUBLE_FOUR:
+            count += 2
+        elif info.shape in (FOUR, OPEN_FOUR):
+            count += 1
+    return count
+
+
+def count_open_threes(lines):
+    """统计活三的数量"""
+    return sum(1 for info in lines if info.shape == OPEN_THREE)
+
+
+def is_forbidden(lines):
+    """根据黑棋落子点的分析结果判断是否为禁手
+    形成五连时不算禁手；否则长连、四四、三三均为禁手"""
+    if has_five(lines, exact_five=True):
+        return False
+    return has_overline(lines) or count_fours(lines) >= 2 or count_open_threes(lines) >= 2
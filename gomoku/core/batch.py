@@ -0,0 +1,143 @@
+# coding:utf-8
+"""批量规则判断
+
+输入一批局面(N, size, size)的int8数组和每个局面的候选落子(N, 2)，
+一次性返回胜负、禁手和四个方向棋型的向量结果，用于对大量历史对局做统计分析。
+安装了NumPy时整批向量化计算；否则逐个局面用标量规则计算，返回普通列表。
+"""
+from gomoku.core import analysis, rules, vectorized
+from gomoku.core.board import Board
+from gomoku.core.patterns import WINDOW_RADIUS, WINDOW_SIZE, OFF_BOARD, FIVE
+from gomoku.core.bitboard import DIRECTIONS
+from gomoku.core.variants import get_variant
+
+np = vectorized.np
+
+
+def replay_positions(move_history, size=15):
+    """回放一局棋的棋步，返回(局面, 落子, 颜色)
+    局面为每一步落子之前的棋盘，形状(N, size, size)；落子形状(N, 2)；颜色黑1白2交替"""
+    count = len(move_history)
+    if vectorized.HAS_NUMPY:
+        boards = np.zeros((count, size, size), dtype=np.int8)
+        current = np.zeros((size, size), dtype=np.int8)
+        for i, (row, col) in enumerate(move_history):
+            boards[i] = current
+            current[row, col] = 1 if i % 2 == 0 else 2
+        moves = np.array(move_history, dtype=np.int64).reshape(count, 2)
+        colors = np.where(np.arange(count) % 2 == 0, 1, 2).astype(np.int8)
+        return boards, moves, colors
+
+    boards, current = [], [[0] * size for _ in range(size)]
+    for i, (row, col) in enumerate(move_history):
+        boards.append([list(values) for values in current])
+        current[row][col] = 1 if i % 2 == 0 else 2
+    return boards, [tuple(move) for move in move_history], [1 if i % 2 == 0 else 2 for i in range(count)]
+
+
+def replay_games(games, size=15):
+    """回放多局棋(历史记录中的对局数据列表)，把所有局面拼接为一批"""
+    parts = [replay_positions(game['move_history'], size) for game in games if game.get('move_history')]
+    if not parts:
+        if vectorized.HAS_NUMPY:
+            return (np.zeros((0, size, size), dtype=np.int8), np.zeros((0, 2), dtype=np.int64),
+                    np.zeros(0, dtype=np.int8))
+        return [], [], []
+    if vectorized.HAS_NUMPY:
+        return tuple(np.concatenate(items) for items in zip(*parts))
+    return tuple(sum((list(items) for items in group), []) for group in zip(*parts))
+
+
+def infer_colors(boards, moves):
+    """推断每个局面中落子方的颜色：落子点已有棋子时取该棋子颜色，否则按黑白子数判断"""
+    if vectorized.HAS_NUMPY:
+        boards = np.asarray(boards, dtype=np.int8)
+        moves = np.asarray(moves, dtype=np.int64)
+        index = np.arange(len(boards))
+        existing = boards[index, moves[:, 0], moves[:, 1]]
+        black = (boards == 1).sum(axis=(1, 2))
+        white = (boards == 2).sum(axis=(1, 2))
+        by_count = np.where(black > white, 2, 1).astype(np.int8)
+        return np.where(existing != 0, existing, by_count).astype(np.int8)
+
+    colors = []
+    for grid, (row, col) in zip(boards, moves):
+        if grid[row][col]:
+            colors.append(grid[row][col])
+        else:
+            black = sum(values.count(1) for values in grid)
+            white = sum(values.count(2) for values in grid)
+            colors.append(2 if black > white else 1)
+    return colors
+
+
+def batch_shapes(boards, moves, colors=None, variant=None):
+    """每个局面中落子方在候选点四个方向的棋型分类，形状(N, 4)
+    黑白双方分别使用该规则下各自的分类表(默认连珠规则)"""
+    variant = get_variant(variant)
+    if colors is None:
+        colors = infer_colors(boards, moves)
+    if not vectorized.HAS_NUMPY:
+        return [[info.shape for info in _analyze(grid, move, color, variant)]
+                for grid, move, color in zip(boards, moves, colors)]
+
+    boards = np.asarray(boards, dtype=np.int8)
+    moves = np.asarray(moves, dtype=np.int64)
+    colors = np.asarray(colors, dtype=np.int8)
+    count, size = boards.shape[0], boards.shape[1]
+
+    # 换算为相对于落子方的编码(0空位，1己方，2对方)，四周补上棋盘外
+    own = colors[:, None, None]
+    relative = np.where(boards == 0, 0, np.where(boards == own, 1, 2)).astype(np.int8)
+    padded = np.full((count, size + 2 * WINDOW_RADIUS, size + 2 * WINDOW_RADIUS), OFF_BOARD, dtype=np.int8)
+    padded[:, WINDOW_RADIUS:-WINDOW_RADIUS, WINDOW_RADIUS:-WINDOW_RADIUS] = relative
+
+    steps = np.arange(WINDOW_SIZE) - WINDOW_RADIUS
+    powers = 4 ** np.arange(WINDOW_SIZE, dtype=np.int64)
+    index = np.arange(count)[:, None]
+    black_table = vectorized.table_array(variant.table(1))
+    white_table = vectorized.table_array(variant.table(2))
+
+    shapes = np.empty((count, 4), dtype=np.uint8)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        rows = moves[:, 0:1] + WINDOW_RADIUS + dx * steps
+        cols = moves[:, 1:2] + WINDOW_RADIUS + dy * steps
+        digits = padded[index, rows, cols]
+        digits[:, WINDOW_RADIUS] = 1  # 中心点视为己方棋子
+        codes = digits.astype(np.int64) @ powers
+        shapes[:, d] = np.where(colors == 1, black_table[codes], white_table[codes])
+    return shapes
+
+
+def batch_check_win(boards, moves, colors=None, variant=None):
+    """每个局面中在候选点落子(或已落的子)是否形成五连获胜，返回布尔向量"""
+    if colors is None:
+        colors = infer_colors(boards, moves)
+    shapes = batch_shapes(boards, moves, colors, variant)
+    if not vectorized.HAS_NUMPY:
+        return [FIVE in row for row in shapes]
+    return (shapes == FIVE).any(axis=1)
+
+
+def batch_forbidden(boards, moves, variant=None):
+    """每个局面中黑棋在候选点落子是否为禁手，返回布尔向量(已有棋子的点、没有禁手的规则均为False)"""
+    if not get_variant(variant).forbidden:
+        if not vectorized.HAS_NUMPY:
+            return [False] * len(moves)
+        return np.zeros(len(moves), dtype=bool)
+    if not vectorized.HAS_NUMPY:
+        return [not grid[row][col] and analysis.is_forbidden(_analyze(grid, (row, col), 1))
+                for grid, (row, col) in zip(boards, moves)]
+
+    boards = np.asarray(boards, dtype=np.int8)
+    moves = np.asarray(moves, dtype=np.int64)
+    shapes = batch_shapes(boards, moves, np.ones(len(boards), dtype=np.int8))
+    empty = boards[np.arange(len(boards)), moves[:, 0], moves[:, 1]] == 0
+    return empty & vectorized.forbidden_from_shapes(shapes, axis=1)
+
+
+def _analyze(grid, move, color, variant=None):
+    """标量计算：分析单个局面中的候选落子"""
+    board = Board(len(grid))
+    board.load(grid)
+    return rules.analyze_move(board, move[0], move[1], color, variant)
@@ -0,0 +1,177 @@
+# coding:utf-8
+"""五子棋位棋盘
+
+每种颜色在四个方向（竖、横、正斜、反斜）上各保存一组整数掩码，
+每条线一个整数，第i位表示该线上第i个交叉点是否有该颜色的棋子。
+连子、长连和棋型查询都可以通过移位和掩码完成，不需要逐格遍历。
+"""
+
+from gomoku.core.patterns import SPREAD
+
+# 四个方向(行号增量, 列号增量)：竖、横、正斜、反斜
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+# 11格窗口的掩码
+WINDOW_MASK = (1 << 11) - 1
+# 窗口中心点对应的位
+CENTER_BIT = 1 << 5
+
+# 各棋盘尺寸的几何信息缓存
+_GEOMETRY_CACHE = {}
+
+
+def _window_off_mask(pos, length, radius=5):
+    """以pos为中心的窗口中落在棋盘外的格子掩码，第i位对应偏移i-radius"""
+    mask = 0
+    for i in range(2 * radius + 1):
+        p = pos - radius + i
+        if p < 0 or p >= length:
+            mask |= 1 << i
+    return mask
+
+
+def _build_geometry(size):
+    """计算每个交叉点在四个方向上所在的线编号、线内位置、线长度和窗口的棋盘外掩码"""
+    geometry = []
+    for row in range(size):
+        for col in range(size):
+            diag = row - col + size - 1       # 正斜线编号
+            anti = row + col                  # 反斜线编号
+            lines = (
+                (col, row, size),                                             # 竖线：沿行号递增
+                (row, col, size),                                             # 横线：沿列号递增
+                (diag, min(row, col), size - abs(row - col)),                 # 正斜线
+                (anti, row - max(0, anti - size + 1), size - abs(anti - size + 1)),  # 反斜线
+            )
+            geometry.append(tuple(
+                (line, pos, length, _window_off_mask(pos, length))
+                for line, pos, length in lines
+            ))
+    line_counts = (size, size, 2 * size - 1, 2 * size - 1)
+    return tuple(geometry), line_counts
+
+
+def get_geometry(size):
+    """获取指定尺寸棋盘的几何信息(带缓存)"""
+    if size not in _GEOMETRY_CACHE:
+        _GEOMETRY_CACHE[size] = _build_geometry(size)
+    return _GEOMETRY_CACHE[size]
+
+
+class BitBoard:
+    """位棋盘 - 1表示黑棋，2表示白棋"""
+
+    def __init__(self, size=15):
+        self.size = size
+        self.geometry, self.line_counts = get_geometry(size)
+        self.clear()
+
+    def clear(self):
+        """清空棋盘"""
+        # lines[color][direction][line]，下标0留空以便直接用颜色编号索引
+        self.lines = [None] + [[[0] * count for count in self.line_counts] for _ in range(2)]
+
+    def load(self, board_data):
+        """从二维列表加载棋盘"""
+        self.clear()
+        for row, values in enumerate(board_data):
+            for col, value in enumerate(values):
+                if value:
+                    self.place(row, col, value)
+
+    def place(self, row, col, color):
+        """在指定位置放置棋子"""
+        dirs = self.lines[color]
+        for d, (line, pos, _, _) in enumerate(self.geometry[row * self.size + col]):
+            dirs[d][line] |= 1 << pos
+
+    def remove(self, row, col):
+        """移除指定位置的棋子"""
+        for color in (1, 2):
+            dirs = self.lines[color]
+            for d, (line, pos, _, _) in enumerate(self.geometry[row * self.size + col]):
+                dirs[d][line] &= ~(1 << pos)
+
+    def with_stone(self, row, col, color):
+        """返回在(row, col)放置棋子后的新位棋盘，不修改自身
+        只复制经过该点的四条线所在的列表，其余数据与原位棋盘共享"""
+        copy = BitBoard.__new__(BitBoard)
+        copy.size = self.size
+        copy.geometry = self.geometry
+        copy.line_counts = self.line_counts
+        dirs = list(self.lines[color])
+        for d, (line, pos, _, _) in enumerate(self.geometry[row * self.size + col]):
+            dirs[d] = list(dirs[d])
+            dirs[d][line] |= 1 << pos
+        copy.lines = list(self.lines)
+        copy.lines[color] = dirs
+        return copy
+
+    def get(self, row, col):
+        """获取指定位置的棋子颜色，0表示空"""
+        bit = 1 << col
+        if self.lines[1][1][row] & bit:
+            return 1
+        if self.lines[2][1][row] & bit:
+            return 2
+        return 0
+
+    def run_lengths(self, row, col, d, color):
+        """计算指定方向上与该点相连的同色棋子数(不含该点本身)
+        返回(正方向数量, 反方向数量)"""
+        line, pos, _, _ = self.geometry[row * self.size + col][d]
+        mask = self.lines[color][d][line]
+
+        # 正方向：统计pos之上连续的1
+        above = mask >> (pos + 1)
+        forward = (above ^ (above + 1)).bit_length() - 1
+
+        # 反方向：统计pos之下连续的1
+        low_mask = (1 << pos) - 1
+        gaps = ~mask & low_mask
+        backward = pos - gaps.bit_length() if gaps else pos
+        return forward, backward
+
+    def count_line(self, row, col, d, color, reach=None):
+        """统计指定方向上经过该点的连子数(含该点)
+        reach限制每一侧最多计入的棋子数，None表示不限制"""
+        forward, backward = self.run_lengths(row, col, d, color)
+        if reach is not None:
+            forward = min(forward, reach)
+            backward = min(backward, reach)
+        return 1 + forward + backward
+
+    def window_code(self, row, col, d, color):
+        """计算以该点为中心、指定方向上11格窗口的4进制编码(用于查棋型分类表)
+        各位含义：0空位，1己方，2对方，3棋盘外；中心点总是视为己方棋子"""
+        line, pos, _, off = self.geometry[row * self.size + col][d]
+        own = self.lines[color][d][line]
+        opp = self.lines[3 - color][d][line]
+        shift = pos - 5
+        if shift >= 0:
+            own >>= shift
+            opp >>= shift
+        else:
+            own <<= -shift
+            opp <<= -shift
+        own = (own & WINDOW_MASK) | CENTER_BIT
+        opp = opp & WINDOW_MASK & ~CENTER_BIT
+        return SPREAD[own] + 2 * SPREAD[opp] + 3 * SPREAD[off]
+
+    def line_pattern(self, row, col, d, radius=5):
+        """获取指定方向的棋型字符串
+        '0'表示空位，'1'表示黑子，'2'表示白棋，'.'表示棋盘外"""
+        line, pos, length, _ = self.geometry[row * self.size + col][d]
+        black = self.lines[1][d][line]
+        white = self.lines[2][d][line]
+        pattern = []
+        for p in range(pos - radius, pos + radius + 1):
+            if p < 0 or p >= length:
+                pattern.append('.')
+            elif black >> p & 1:
+                pattern.append('1')
+            elif white >> p & 1:
+                pattern.append('2')
+            else:
+                pattern.append('0')
+        return ''.join(pattern)
@@ -0,0 +1,176 @@
+# coding:utf-8
+"""棋盘：二维列表形式的棋子数据，并与位棋盘、Zobrist哈希保持同步
+
+棋盘同时维护稀疏的已落子集合和"邻域"：四个方向上距离棋子不超过NEIGHBOR_RADIUS的空位。
+邻域之外的空位窗口内没有任何棋子，不可能形成棋型，整盘扫描只需遍历邻域，
+工作量随棋子数增长，而不是随棋盘面积增长。
+另外维护候选着法集合：任一棋子周围(切比雪夫距离不超过CANDIDATE_RADIUS)的空位，
+搜索只在其中选点，落子和提子时按计数增量更新。
+"""
+
+from gomoku.core.bitboard import BitBoard
+from gomoku.core.forbidden import get_affected_cells
+from gomoku.core.zobrist import get_keys, compute_hash
+
+# 支持的棋盘尺寸
+BOARD_SIZES = (15, 19, 20)
+
+# 邻域半径：棋型至少需要窗口中心4格以内有己方棋子
+NEIGHBOR_RADIUS = 4
+
+# 候选着法半径：只考虑已有棋子周围两格以内的空位
+CANDIDATE_RADIUS = 2
+
+# 各棋盘尺寸的候选邻域缓存
+_SQUARE_CACHE = {}
+
+
+def get_square_neighbors(size, radius=CANDIDATE_RADIUS):
+    """获取每个点周围(切比雪夫距离不超过radius)的点，不含自身"""
+    key = (size, radius)
+    if key not in _SQUARE_CACHE:
+        table = []
+        for row in range(size):
+            for col in range(size):
+                table.append(tuple(
+                    (x, y)
+                    for x in range(max(0, row - radius), min(size, row + radius + 1))
+                    for y in range(max(0, col - radius), min(size, col + radius + 1))
+                    if (x, y) != (row, col)
+                ))
+        _SQUARE_CACHE[key] = tuple(table)
+    return _SQUARE_CACHE[key]
+
+
+def star_points(size):
+    """棋盘上的星位：距边第4路的四个角星，奇数路棋盘加天元，19路及以上再加四个边星"""
+    edge = 3 if size >= 13 else 2
+    far = size - 1 - edge
+    points = [(edge, edge), (edge, far), (far, edge), (far, far)]
+    if size % 2:
+        center = size // 2
+        points.append((center, center))
+        if size >= 19:
+            points += [(edge, center), (center, edge), (center, far), (far, center)]
+    return points
+
+
+class Board:
+    """五子棋棋盘 - 0表示空，1表示黑棋，2表示白棋"""
+
+    def __init__(self, size=15):
+        self.size = size
+        self.bits = BitBoard(size)  # 位棋盘，用于连子和棋型查询
+        self.grid = [[0] * size for _ in range(size)]
+        self.zobrist = get_keys(size)
+        self.hash = 0  # 64位局面哈希，落子和提子时增量更新
+        self.neighbors = get_affected_cells(size, NEIGHBOR_RADIUS)
+        self.square_neighbors = get_square_neighbors(size)
+        self._reset_sparse()
+
+    def _reset_sparse(self):
+        """清空稀疏结构"""
+        self.occupied = set()                     # 已落子的点
+        self.zone = set()                         # 邻域内的空位
+        self._near = [0] * (self.size * self.size)  # 每个点邻域内的棋子数
+        self.candidates = set()                   # 候选着法(棋子周围的空位)
+        self._close = [0] * (self.size * self.size)  # 每个点周围CANDIDATE_RADIUS以内的棋子数
+
+    @classmethod
+    def from_state(cls, state):
+        """根据GameState(或其快照)创建独立的棋盘，之后与state互不影响"""
+        board = cls(state.size)
+        board.load(state.to_rows())
+        return board
+
+    def clear(self):
+        """清空棋盘"""
+        self.grid = [[0] * self.size for _ in range(self.size)]
+        self.bits.clear()
+        self.hash = 0
+        self._reset_sparse()
+
+    def load(self, rows):
+        """从二维列表加载棋盘"""
+        self.grid = [list(row) for row in rows]
+        self.bits.load(self.grid)
+        self.hash = compute_hash(self.grid)
+        self._reset_sparse()
+        for row in range(self.size):
+            for col in range(self.size):
+                if self.grid[row][col]:
+                    self._add_stone(row, col)
+
+    def to_rows(self):
+        """导出二维列表(副本)"""
+        return [list(row) for row in self.grid]
+
+    def in_bounds(self, row, col):
+        """判断坐标是否在棋盘内"""
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def get(self, row, col):
+        """获取指定位置的棋子"""
+        return self.grid[row][col]
+
+    def is_empty(self, row, col):
+        """判断指定位置是否为空"""
+        return self.grid[row][col] == 0
+
+    def place(self, row, col, color):
+        """在指定位置落子"""
+        self.grid[row][col] = color
+        self.bits.place(row, col, color)
+        self.hash ^= self.zobrist[color][row * self.size + col]
+        self._add_stone(row, col)
+
+    def remove(self, row, col):
+        """移除指定位置的棋子"""
+        color = self.grid[row][col]
+        if color:
+            self.hash ^= self.zobrist[color][row * self.size + col]
+            self._remove_stone(row, col)
+        self.grid[row][col] = 0
+        self.bits.remove(row, col)
+
+    def _add_stone(self, row, col):
+        """更新稀疏结构：(row, col)处落子"""
+        self.occupied.add((row, col))
+        self.zone.discard((row, col))
+        near, grid = self._near, self.grid
+        for x, y in self.neighbors[row * self.size + col]:
+            index = x * self.size + y
+            near[index] += 1
+            if near[index] == 1 and not grid[x][y]:
+                self.zone.add((x, y))
+        self.candidates.discard((row, col))
+        close = self._close
+        for x, y in self.square_neighbors[row * self.size + col]:
+            index = x * self.size + y
+            close[index] += 1
+            if close[index] == 1 and not grid[x][y]:
+                self.candidates.add((x, y))
+
+    def _remove_stone(self, row, col):
+        """更新稀疏结构：移除(row, col)处的棋子"""
+        self.occupied.discard((row, col))
+        near = self._near
+        for x, y in self.neighbors[row * self.size + col]:
+            index = x * self.size + y
+            near[index] -= 1
+            if not near[index]:
+                self.zone.discard((x, y))
+        if near[row * self.size + col]:
+            self.zone.add((row, col))
+        close = self._close
+        for x, y in self.square_neighbors[row * self.size + col]:
+            index = x * self.size + y
+            close[index] -= 1
+            if not close[index]:
+                self.candidates.discard((x, y))
+        if close[row * self.size + col]:
+            self.candidates.add((row, col))
+
+    def has_stones(self):
+        """棋盘上是否有棋子"""
+        return bool(self.occupied)
@@ -0,0 +1,53 @@
+# coding:utf-8
+"""按局面哈希缓存计算结果的LRU缓存
+
+禁手表、威胁点等结果只与局面有关，悔棋、重做和回放时会反复遇到同一局面，
+以Zobrist哈希为键缓存即可直接取回。缓存可能被工作线程和界面线程同时访问，内部用锁保护。
+"""
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """容量固定的LRU缓存，超出容量时淘汰最久未使用的条目"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0    # 命中次数
+        self.misses = 0  # 未命中次数
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """取出缓存的结果并标记为最近使用，不存在时返回default"""
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def put(self, key, value):
+        """写入结果，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        """丢弃一个条目，不存在时什么也不做"""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,132 @@
+# coding:utf-8
+"""增量维护的黑棋禁手表
+
+落子或提子只会影响经过该点的四条线上、距离不超过棋型窗口半径的空位，
+因此每步只需重新判断这些空位，而不必重扫整个棋盘。
+例外是需要递归识别假三的点(按棋型有两个以上活三)，它们的结果可能受更远处棋子的影响，
+这些"易变点"每步都要重新判断。
+每次更新得到的增量(新增和移除的禁手点、易变点)被压入栈中，悔棋时反向应用即可恢复；
+增量也可以保存下来，重做时直接正向应用而不必重新判断。
+"""
+
+from gomoku.core.bitboard import DIRECTIONS
+
+# 棋型窗口半径：禁手判断只看中心点两侧各5格
+WINDOW_RADIUS = 5
+
+# 各棋盘尺寸的受影响点缓存
+_AFFECTED_CACHE = {}
+
+
+def get_affected_cells(size, radius=WINDOW_RADIUS):
+    """获取每个点落子后需要重新判断的点(四个方向、半径范围内，不含自身)"""
+    key = (size, radius)
+    if key not in _AFFECTED_CACHE:
+        table = []
+        for row in range(size):
+            for col in range(size):
+                cells = []
+                for dx, dy in DIRECTIONS:
+                    for step in range(-radius, radius + 1):
+                        x, y = row + dx * step, col + dy * step
+                        if step and 0 <= x < size and 0 <= y < size:
+                            cells.append((x, y))
+                table.append(tuple(cells))
+        _AFFECTED_CACHE[key] = tuple(table)
+    return _AFFECTED_CACHE[key]
+
+
+class ForbiddenDelta:
+    """一次update造成的禁手表变化，只对产生它的那一代禁手表(rebuild之间)有效"""
+
+    __slots__ = ('generation', 'added', 'removed', 'volatile_added', 'volatile_removed')
+
+    def __init__(self, generation, added, removed, volatile_added, volatile_removed):
+        self.generation = generation
+        self.added = added
+        self.removed = removed
+        self.volatile_added = volatile_added
+        self.volatile_removed = volatile_removed
+
+
+class ForbiddenMap:
+    """黑棋禁手表
+
+    board: 棋盘对象(Board)
+    evaluate: 判断空位是否为禁手的函数，签名为evaluate(row, col)
+    scan: 可选的全盘扫描函数，返回禁手候选点(如按棋型的向量化扫描)，候选点再逐个由evaluate确认；
+          未提供时对棋盘邻域内的所有空位调用evaluate
+    volatile: 可选的易变点判断函数，签名为volatile(row, col)，返回True的空位每步都会重新判断
+    """
+
+    def __init__(self, board, evaluate, scan=None, volatile=None):
+        self.board = board
+        self.evaluate = evaluate
+        self.scan = scan
+        self.is_volatile = volatile
+        self.positions = frozenset()  # 当前所有禁手点
+        self.volatile = frozenset()   # 当前所有易变点
+        self.generation = 0           # 每次rebuild加一，之前的增量随之失效
+        self._history = []            # 已应用的增量，用于悔棋恢复
+
+    def rebuild(self):
+        """全盘重新计算禁手点，并清空悔棋栈"""
+        self.generation += 1
+        if self.scan is not None:
+            candidates = list(self.scan())
+        else:
+            candidates = list(self.board.zone)
+        self.positions = frozenset(cell for cell in candidates if self.evaluate(*cell))
+        if self.is_volatile is not None:
+            self.volatile = frozenset(cell for cell in candidates if self.is_volatile(*cell))
+        self._history = []
+
+    def update(self, row, col):
+        """在(row, col)落子后增量更新禁手点(调用前棋盘上已放置该子)，返回本次的增量"""
+        forbidden = set(self.positions)
+        forbidden.discard((row, col))
+        volatile = set(self.volatile)
+        volatile.discard((row, col))
+
+        affected = get_affected_cells(self.board.size)[row * self.board.size + col]
+        if self.is_volatile is not None:
+            for x, y in affected:
+                if self.board.get(x, y) == 0 and self.is_volatile(x, y):
+                    volatile.add((x, y))
+                else:
+                    volatile.discard((x, y))
+
+        for x, y in set(affected) | volatile:
+            if self.board.get(x, y) != 0:
+                continue
+            if self.evaluate(x, y):
+                forbidden.add((x, y))
+            else:
+                forbidden.discard((x, y))
+        delta = ForbiddenDelta(
+            self.generation,
+            frozenset(forbidden - self.positions), self.positions - forbidden,
+            frozenset(volatile - self.volatile), self.volatile - volatile,
+        )
+        self.positions = frozenset(forbidden)
+        self.volatile = frozenset(volatile)
+        self._history.append(delta)
+        return delta
+
+    def apply(self, delta):
+        """重新应用之前update返回的增量(重做)，增量已失效时返回False，需要调用方改用update"""
+        if delta is None or delta.generation != self.generation:
+            return False
+        self.positions = (self.positions - delta.removed) | delta.added
+        self.volatile = (self.volatile - delta.volatile_removed) | delta.volatile_added
+        self._history.append(delta)
+        return True
+
+    def undo(self):
+        """撤销最近一次update或apply，返回是否成功恢复(栈为空时需要调用方重新rebuild)"""
+        if not self._history:
+            return False
+        delta = self._history.pop()
+        self.positions = (self.positions - delta.added) | delta.removed
+        self.volatile = (self.volatile - delta.volatile_added) | delta.volatile_removed
+        return True
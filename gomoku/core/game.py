@@ -0,0 +1,280 @@
+# coding:utf-8
+"""一局五子棋的状态与流程控制(不依赖界面)
+
+对局记录保存在GameState中(棋盘、棋步、当前玩家和胜负)，可以O(1)取快照；
+Board(位棋盘、哈希、邻域)和MoveHistory(序号表)是由它派生、随落子同步更新的索引。
+ThreatTracker维护双方的成五、成四、活三点，胜负和禁手判断直接查表。
+Timeline记录每步棋的增量和变化分支，悔棋、重做都按增量恢复，不重新扫描棋盘。
+"""
+
+from gomoku.core import rules
+from gomoku.core.board import Board
+from gomoku.core.forbidden import ForbiddenMap
+from gomoku.core.history import MoveHistory
+from gomoku.core.renju import RenjuChecker
+from gomoku.core.state import GameState
+from gomoku.core.threats import ThreatTracker
+from gomoku.core.timeline import Timeline
+from gomoku.core.variants import get_variant
+
+# 落子结果
+MOVE_OK = "ok"                # 落子成功，轮到对方
+MOVE_WIN = "win"              # 落子成功并获胜
+MOVE_FORBIDDEN = "forbidden"  # 黑棋禁手，不允许落子
+MOVE_INVALID = "invalid"      # 游戏未进行、越界或该位置已有棋子
+
+
+def _state_property(name, doc):
+    """把对局的标量状态转发到self.state"""
+
+    def getter(self):
+        return getattr(self.state, name)
+
+    def setter(self, value):
+        setattr(self.state, name, value)
+
+    return property(getter, setter, doc=doc)
+
+
+class Game:
+    """五子棋对局：棋盘、棋步、当前玩家、胜负和禁手表
+
+    variant为规则变体或其名称(默认连珠规则)，没有禁手的规则不做任何禁手计算。
+    track_forbidden为False时不维护禁手表(forbidden为None)，
+    由调用方自行计算禁手点(如界面在后台线程中计算)，落子时的禁手检测不受影响。
+    """
+
+    current_player = _state_property('current_player', "当前玩家 - 1表示黑棋，2表示白棋")
+    game_started = _state_property('game_started', "游戏是否已开始")
+    game_over = _state_property('game_over', "游戏是否已结束")
+    winner = _state_property('winner', "胜者 - 0表示无胜者，1表示黑棋胜，2表示白棋胜")
+
+    def __init__(self, size=15, track_forbidden=True, variant=None):
+        self.size = size
+        self.state = GameState(size)
+        self.board = Board(size)
+        self.history = MoveHistory(size=size)
+        self.timeline = Timeline()
+        self.track_forbidden = track_forbidden
+
+        # 连珠禁手判断(递归识别假三，结果按局面哈希缓存)
+        self.renju = RenjuChecker()
+
+        self.variant = None
+        self.forbidden = None
+        self.threats = None
+        self.set_variant(variant)
+
+    def set_variant(self, variant):
+        """切换规则变体，并按新规则重建威胁表和禁手表"""
+        self.variant = get_variant(variant)
+
+        # 双方的威胁点表，随落子、悔棋增量更新
+        if self.threats is None:
+            self.threats = ThreatTracker(self.board, self.variant)
+        else:
+            self.threats.set_variant(self.variant)
+
+        # 增量维护的黑棋禁手表：候选点直接取自威胁表，再由renju确认
+        self.forbidden = None
+        if self.track_forbidden and self.variant.forbidden:
+            self.forbidden = ForbiddenMap(
+                self.board, self.is_forbidden_move,
+                scan=lambda: list(self.threats.forbidden_candidates),
+                volatile=lambda row, col: self.renju.needs_recursion(self.board, row, col),
+            )
+            self.forbidden.rebuild()
+
+    @property
+    def position_hash(self):
+        """当前局面的64位Zobrist哈希(只与棋子分布有关)"""
+        return self.board.hash
+
+    def is_forbidden_move(self, row, col):
+        """判断黑棋在该空位落子是否为禁手"""
+        return (self.variant.forbidden and (row, col) in self.threats.forbidden_candidates
+                and self.renju.is_forbidden(self.board, row, col))
+
+    def find_threats(self, color):
+        """color的所有威胁点{(row, col): 棋型}，黑棋的禁手点不计入"""
+        threats = self.threats.threats(color)
+        if color == 1 and self.variant.forbidden:
+            for cell in self.threats.forbidden_candidates & threats.keys():
+                if self.forbidden is not None:
+                    forbidden = cell in self.forbidden.positions
+                else:
+                    forbidden = self.renju.is_forbidden(self.board, *cell)
+                if forbidden:
+                    del threats[cell]
+        return threats
+
+    def snapshot(self):
+        """当前对局状态的O(1)快照(写时复制)，可用load_state恢复或交给搜索、分析使用"""
+        return self.state.snapshot()
+
+    def load_state(self, state):
+        """加载对局状态(取快照，之后的落子不会影响传入的state)，并重建派生的索引和禁手表"""
+        if state.size != self.size:
+            raise ValueError(f"棋盘尺寸不一致: 对局为{self.size}路，状态为{state.size}路")
+        self.state = state.snapshot()
+        self.board.load(self.state.to_rows())
+        self.threats.rebuild()
+        self.history = MoveHistory(self.state.move_list(), self.size)
+        self._load_timeline()
+        if self.forbidden is not None:
+            self.forbidden.rebuild()
+
+    def _load_timeline(self):
+        """按当前棋步重建时间线(加载的棋步没有增量记录，悔棋时禁手表需要重算)"""
+        moves = self.state.move_list()
+        self.timeline.load(moves, [self.state.get(row, col) for row, col in moves])
+        node = self.timeline.current
+        node.hash = self.board.hash
+        if node.parent is not None and self.game_over and self.winner == node.color:
+            node.game_over = True
+            node.winner = node.color
+
+    def load_position(self, rows, moves=None):
+        """加载棋盘和棋步(未给出棋步时保留当前棋步)，其余状态不变"""
+        state = self.state.snapshot()
+        state.load(rows, self.state.move_list() if moves is None else [tuple(move) for move in moves])
+        self.load_state(state)
+
+    def reset(self, start_immediately=True):
+        """重置对局，黑棋先行"""
+        self.state.reset(start_immediately)
+        self.board.clear()
+        self.threats.rebuild()
+        self.history.clear()
+        self.timeline.clear()
+        if self.forbidden is not None:
+            self.forbidden.rebuild()
+
+    def play(self, row, col):
+        """当前玩家在(row, col)落子，返回落子结果(MOVE_*)"""
+        if not self.game_started or self.game_over:
+            return MOVE_INVALID
+        if not self.board.in_bounds(row, col) or not self.board.is_empty(row, col):
+            return MOVE_INVALID
+
+        color = self.current_player
+
+        # 禁手检测和胜负判断都直接读取威胁表(落子前的棋型)
+        if (color == 1 and self.variant.forbidden and (row, col) in self.threats.forbidden_candidates
+                and self.renju.is_forbidden(self.board, row, col)):
+            return MOVE_FORBIDDEN
+        wins = (row, col) in self.threats.fives(color)
+
+        self.state.place(row, col, color)
+        self.board.place(row, col, color)
+        self.threats.update(row, col)
+        self.history.append(row, col)
+
+        # 记入时间线：与已有变化相同时沿用该变化，否则新建分支
+        node = self.timeline.advance((row, col), color)
+        node.hash = self.board.hash
+
+        # 增量更新禁手表(无论哪方落子都要更新，保证悔棋时可以直接恢复)，增量留给重做使用
+        if self.forbidden is not None:
+            node.forbidden_delta = self.forbidden.update(row, col)
+
+        # 沿用已有的变化时，节点上的胜负可能是在其他规则下记录的，按这次的结果重写
+        node.game_over = wins
+        node.winner = color if wins else 0
+        if wins:
+            self.game_over = True
+            self.winner = color
+            return MOVE_WIN
+
+        self.current_player = 3 - color
+        return MOVE_OK
+
+    def undo(self):
+        """悔棋 - 撤销最后一步，没有棋步时返回False"""
+        if not self.history:
+            return False
+
+        row, col = self.history.pop()
+        self.state.pop()
+        self.timeline.back()
+
+        # 轮回到被撤销的那一方(获胜的一步不会切换玩家，不能简单取反)
+        self.current_player = self.board.get(row, col) or 3 - self.current_player
+        self.board.remove(row, col)
+        self.threats.update(row, col)
+
+        # 恢复落子前的禁手表，没有可恢复的记录时(如加载的棋局)全盘重算
+        if self.forbidden is not None and not self.forbidden.undo():
+            self.forbidden.rebuild()
+
+        # 如果游戏已结束，则恢复为未结束状态
+        if self.game_over:
+            self.game_over = False
+            self.winner = 0
+        return True
+
+    def redo(self, move=None):
+        """重做 - 沿时间线前进一步(move指定进入哪个变化，默认为上次所在的变化)，
+        没有可重做的棋步或该步在当前规则下是禁手时返回False"""
+        if not self.game_started or self.game_over:
+            return False
+        node = self.timeline.forward(move)
+        if node is None:
+            return False
+
+        # 记录的胜负和合法性属于落子时的规则，中途切换过规则时可能不再成立，按当前规则重新判断
+        row, col = node.move
+        color = node.color
+        if (color == 1 and self.variant.forbidden and (row, col) in self.threats.forbidden_candidates
+                and self.renju.is_forbidden(self.board, row, col)):
+            self.timeline.back()
+            return False
+        node.game_over = (row, col) in self.threats.fives(color)
+        node.winner = color if node.game_over else 0
+
+        self.state.place(row, col, color)
+        self.board.place(row, col, color)
+        self.threats.update(row, col)
+        self.history.append(row, col)
+
+        # 直接应用记录的禁手表增量，增量已失效时(如中途切换过规则)改为增量更新
+        if self.forbidden is not None and not self.forbidden.apply(node.forbidden_delta):
+            node.forbidden_delta = self.forbidden.update(row, col)
+
+        self.game_over = node.game_over
+        self.winner = node.winner
+        self.current_player = color if node.game_over else 3 - color
+        return True
+
+    def can_undo(self):
+        """是否有可以悔的棋"""
+        return bool(self.history)
+
+    def can_redo(self):
+        """是否有可以重做的棋步"""
+        return self.game_started and not self.game_over and self.timeline.can_redo()
+
+    def variations(self):
+        """当前局面之后的所有变化(下一步的位置列表)，可传给redo进入指定变化"""
+        return self.timeline.variations()
+
+    def surrender(self):
+        """当前玩家认输"""
+        if self.game_started and not self.game_over:
+            self.game_over = True
+            self.winner = 3 - self.current_player  # 对方获胜
+            return True
+        return False
+
+    def shows_forbidden(self):
+        """当前是否需要显示禁手点：只在有禁手的规则下、黑棋回合且游戏进行中显示"""
+        return (self.variant.forbidden and self.current_player == 1
+                and self.game_started and not self.game_over)
+
+    def visible_forbidden_positions(self):
+        """当前需要显示的禁手点(不维护禁手表时全盘计算)"""
+        if not self.shows_forbidden():
+            return []
+        if self.forbidden is None:
+            return rules.find_forbidden_positions(self.board, self.renju, self.variant)
+        return sorted(self.forbidden.positions)
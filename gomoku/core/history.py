@@ -0,0 +1,70 @@
+# coding:utf-8
+"""棋步记录"""
+
+
+class MoveHistory:
+    """按顺序保存的棋步列表，每一步为(row, col)
+
+    同时维护一张size*size的序号表，numbers[row * size + col]为该点棋子的序号(从1开始)，
+    没有棋子时为0，查询序号不需要遍历棋步。
+    """
+
+    def __init__(self, moves=None, size=15):
+        self.size = size
+        self.moves = [tuple(move) for move in moves] if moves else []
+        self.rebuild_numbers()
+
+    def rebuild_numbers(self):
+        """根据棋步重建序号表(同一点出现多次时取第一次)"""
+        size = self.size
+        self.numbers = [0] * (size * size)
+        for number in range(len(self.moves), 0, -1):
+            row, col = self.moves[number - 1]
+            if 0 <= row < size and 0 <= col < size:
+                self.numbers[row * size + col] = number
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def __getitem__(self, index):
+        return self.moves[index]
+
+    def __bool__(self):
+        return bool(self.moves)
+
+    def append(self, row, col):
+        """记录一步棋"""
+        self.moves.append((row, col))
+        index = row * self.size + col
+        if not self.numbers[index]:
+            self.numbers[index] = len(self.moves)
+
+    def pop(self):
+        """撤销最后一步，返回该步(row, col)"""
+        row, col = self.moves.pop()
+        index = row * self.size + col
+        if self.numbers[index] == len(self.moves) + 1:
+            self.numbers[index] = 0
+        return row, col
+
+    def last(self):
+        """最后一步，没有棋步时返回None"""
+        return self.moves[-1] if self.moves else None
+
+    def clear(self):
+        """清空棋步"""
+        self.moves = []
+        self.numbers = [0] * (self.size * self.size)
+
+    def find_move_number(self, row, col):
+        """查找指定位置棋子的序号(从1开始)，未找到返回0"""
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return self.numbers[row * self.size + col]
+        return 0
+
+    def to_list(self):
+        """导出为可JSON序列化的列表"""
+        return [list(move) for move in self.moves]
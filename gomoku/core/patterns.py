@@ -0,0 +1,177 @@
+# coding:utf-8
+"""棋型分类表
+
+以某点为中心、沿一个方向取11格(两侧各5格)，每格编码为一个4进制位：
+0表示空位，1表示己方棋子，2表示对方棋子，3表示棋盘外。
+第i位对应中心点偏移i-5的位置，整个窗口编码为一个整数，直接作为下标查表得到棋型分类。
+中心点总是视为己方棋子，因此同一张表既能判断已落的子，也能判断假设落子。
+
+成五的条件有三种：五连及以上(free)、恰好五连(exact)、以及两端都被对方堵住的五连不算数(blocked，
+长连不受此限制)，每种条件各生成一张表。
+分类表只需生成一次，之后以压缩文件的形式缓存在磁盘上。
+"""
+import os
+import zlib
+
+# 棋型分类
+NONE = 0         # 无棋型
+OPEN_THREE = 1   # 活三：再下一子可以形成活四
+FOUR = 2         # 冲四：只有一个点可以成五
+DOUBLE_FOUR = 3  # 同一条线上的两个四(如 ●_●●●_●)
+OPEN_FOUR = 4    # 活四：两端都可以成五
+FIVE = 5         # 五连(按该表的成五条件)
+OVERLINE = 6     # 长连(仅在要求恰好五连时出现)
+
+SHAPE_NAMES = {
+    NONE: "无", OPEN_THREE: "活三", FOUR: "冲四", DOUBLE_FOUR: "双四",
+    OPEN_FOUR: "活四", FIVE: "五连", OVERLINE: "长连",
+}
+
+WINDOW_RADIUS = 5
+WINDOW_SIZE = 2 * WINDOW_RADIUS + 1
+TABLE_SIZE = 4 ** WINDOW_SIZE
+TABLE_VERSION = 1
+
+EMPTY, OWN, OPPONENT, OFF_BOARD = 0, 1, 2, 3
+
+# 把11位掩码展开为4进制数字：第i位为1时对应4进制第i位为1
+SPREAD = tuple(
+    sum(4 ** i for i in range(WINDOW_SIZE) if mask >> i & 1)
+    for mask in range(1 << WINDOW_SIZE)
+)
+
+# 缓存目录默认位于项目根目录，可通过环境变量GOMOKU_CACHE_DIR指定(如只读部署的服务器)
+CACHE_DIR = os.environ.get("GOMOKU_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache")
+
+# 已加载的分类表，键为(是否要求恰好五连, 两端被堵的五连是否无效)
+_TABLES = {}
+
+
+def encode_window(cells):
+    """把11个格子的编码列表转换为窗口编码"""
+    code = 0
+    for i, value in enumerate(cells):
+        code += value * 4 ** i
+    return code
+
+
+def decode_window(code):
+    """把窗口编码还原为11个格子的编码列表"""
+    return [code // 4 ** i % 4 for i in range(WINDOW_SIZE)]
+
+
+def _half_windows(side):
+    """枚举中心一侧5格的所有合法取值，棋盘外的格子只能出现在远离中心的一端
+    返回(编码, 己方棋子数)列表"""
+    halves = []
+    positions = range(WINDOW_RADIUS) if side < 0 else range(WINDOW_RADIUS + 1, WINDOW_SIZE)
+    # 远离中心的位置排在前面，便于处理棋盘外前缀
+    ordered = list(positions) if side < 0 else list(reversed(positions))
+    for off_count in range(WINDOW_RADIUS + 1):
+        inner = ordered[off_count:]
+        for n in range(3 ** len(inner)):
+            code = sum(OFF_BOARD * 4 ** i for i in ordered[:off_count])
+            own = 0
+            for i in inner:
+                value = n % 3
+                n //= 3
+                code += value * 4 ** i
+                own += value == OWN
+            halves.append((code, own))
+    return halves
+
+
+def _center_run(cells):
+    """计算经过中心点的己方连子长度"""
+    lo = hi = WINDOW_RADIUS
+    while lo > 0 and cells[lo - 1] == OWN:
+        lo -= 1
+    while hi < WINDOW_SIZE - 1 and cells[hi + 1] == OWN:
+        hi += 1
+    return hi - lo + 1
+
+
+def _is_blocked_five(cells):
+    """经过中心点的恰好五连是否两端都是对方棋子"""
+    lo = hi = WINDOW_RADIUS
+    while cells[lo - 1] == OWN:
+        lo -= 1
+    while cells[hi + 1] == OWN:
+        hi += 1
+    return cells[lo - 1] == OPPONENT and cells[hi + 1] == OPPONENT
+
+
+def build_table(exact_five, blocked_five=False):
+    """生成棋型分类表
+    exact_five为True时只有恰好五连算五，超过五子为长连(黑棋禁手规则)
+    blocked_five为True时两端都被对方堵住的恰好五连不算五(Caro规则)，此时exact_five应为False"""
+    table = bytearray(TABLE_SIZE)
+    center = OWN * 4 ** WINDOW_RADIUS
+
+    # 按己方棋子数从多到少分组，保证查询"再下一子"的结果时该窗口已经分类
+    buckets = [[] for _ in range(WINDOW_SIZE + 1)]
+    for left, left_own in _half_windows(-1):
+        for right, right_own in _half_windows(1):
+            buckets[left_own + right_own + 1].append(left + center + right)
+
+    for own_count in range(WINDOW_SIZE, 0, -1):
+        for code in buckets[own_count]:
+            cells = decode_window(code)
+            run = _center_run(cells)
+            if run >= 5:
+                if run == 5 and blocked_five and _is_blocked_five(cells):
+                    continue  # 无效的五连，分类为NONE
+                table[code] = FIVE if run == 5 or not exact_five else OVERLINE
+                continue
+
+            empties = [i for i in range(WINDOW_SIZE) if cells[i] == EMPTY]
+            five_points = [i for i in empties if table[code + 4 ** i] == FIVE]
+            if five_points:
+                # 两个成五点相距5格，说明是两端都能成五的活四
+                if any(p + 5 in five_points for p in five_points):
+                    table[code] = OPEN_FOUR
+                elif len(five_points) >= 2:
+                    table[code] = DOUBLE_FOUR
+                else:
+                    table[code] = FOUR
+            elif any(table[code + 4 ** i] == OPEN_FOUR for i in empties):
+                table[code] = OPEN_THREE
+    return table
+
+
+def _cache_path(exact_five, blocked_five=False):
+    """分类表缓存文件路径"""
+    rule = "exact" if exact_five else "free"
+    if blocked_five:
+        rule += "_blocked"
+    return os.path.join(CACHE_DIR, f"pattern_table_v{TABLE_VERSION}_{rule}.bin")
+
+
+def get_table(exact_five=True, blocked_five=False):
+    """获取棋型分类表，优先从内存和磁盘缓存读取"""
+    key = (exact_five, blocked_five)
+    table = _TABLES.get(key)
+    if table is not None:
+        return table
+
+    path = _cache_path(exact_five, blocked_five)
+    try:
+        with open(path, 'rb') as f:
+            table = zlib.decompress(f.read())
+        if len(table) != TABLE_SIZE:
+            table = None
+    except (OSError, zlib.error):
+        table = None
+
+    if table is None:
+        table = bytes(build_table(exact_five, blocked_five))
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(zlib.compress(table))
+        except OSError as e:
+            print(f"保存棋型分类表失败: {str(e)}")
+
+    _TABLES[key] = table
+    return table
@@ -0,0 +1,133 @@
+# coding:utf-8
+"""按连珠规则的完整定义判断黑棋禁手
+
+棋型表中的"活三"只看一条线上的棋子分布，其中一部分是假三：
+能把它变成活四的点本身是禁手，这样的三不能算作活三。
+判断成活四的点是否为禁手又可能涉及新的三三，因此需要递归判断。
+递归结果按(局面哈希, 落子点)缓存，递归深度受max_depth限制。
+
+递归中的试探落子使用BitBoard.with_stone得到的覆盖层，局面哈希按Zobrist键异或得到，
+不会修改传入的棋盘，因此可以在工作线程中对快照调用。
+缓存的读写都是单次字典操作，多线程共用一个判断器时不需要加锁(统计计数为近似值)。
+"""
+from gomoku.core.analysis import analyze_point, has_five, has_overline, count_fours
+from gomoku.core.bitboard import DIRECTIONS
+from gomoku.core.patterns import get_table, OPEN_THREE, OPEN_FOUR, WINDOW_RADIUS
+from gomoku.core.zobrist import get_keys
+
+
+class RenjuChecker:
+    """连珠禁手判断器(递归识别假三)
+
+    max_depth: 最大递归深度，超过后按棋型表的结果处理(把所有活三都视为真三)
+    max_entries: 缓存的最大条目数，超过后清空
+    """
+
+    def __init__(self, max_depth=4, max_entries=200000):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.table = get_table(exact_five=True)
+        self.memo = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清零统计计数"""
+        self.hits = 0           # 缓存命中次数
+        self.misses = 0         # 缓存未命中(实际计算)次数
+        self.depth_cutoffs = 0  # 因达到深度上限而未继续递归的次数
+
+    @property
+    def hit_rate(self):
+        """缓存命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """统计信息"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "depth_cutoffs": self.depth_cutoffs,
+            "entries": len(self.memo),
+        }
+
+    def clear(self):
+        """清空缓存"""
+        self.memo = {}
+
+    def is_forbidden(self, board, row, col):
+        """判断黑棋在(row, col)落子是否为禁手(board为Board，不会被修改)"""
+        return self._check(board.bits, board.hash, row, col, 0)[0]
+
+    def needs_recursion(self, board, row, col):
+        """该点是否只能靠递归判断(按棋型是三三，且没有五连、长连和四四)
+        这类点的结果会受远处棋子影响，增量更新禁手表时每步都要重新判断"""
+        lines = analyze_point(board.bits, row, col, 1, self.table)
+        if has_five(lines, exact_five=True) or has_overline(lines) or count_fours(lines) >= 2:
+            return False
+        return sum(1 for info in lines if info.shape == OPEN_THREE) >= 2
+
+    def _check(self, bits, position_hash, row, col, depth):
+        """返回(是否禁手, 结果是否精确)，只有精确的结果才写入缓存"""
+        key = (position_hash, row * bits.size + col)
+        cached = self.memo.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        self.misses += 1
+
+        result, exact = self._evaluate(bits, position_hash, row, col, depth)
+        if exact:
+            if len(self.memo) >= self.max_entries:
+                self.memo = {}
+            self.memo[key] = result
+        return result, exact
+
+    def _evaluate(self, bits, position_hash, row, col, depth):
+        """计算禁手，返回(是否禁手, 结果是否精确)"""
+        lines = analyze_point(bits, row, col, 1, self.table)
+        if has_five(lines, exact_five=True):
+            return False, True
+        if has_overline(lines) or count_fours(lines) >= 2:
+            return True, True
+
+        threes = [d for d, info in enumerate(lines) if info.shape == OPEN_THREE]
+        if len(threes) < 2:
+            return False, True
+        if depth >= self.max_depth:
+            self.depth_cutoffs += 1
+            return True, False
+
+        # 在该点试探落子(覆盖层)后逐个确认活三是否为真三
+        placed = bits.with_stone(row, col, 1)
+        placed_hash = position_hash ^ get_keys(bits.size)[1][row * bits.size + col]
+        real_threes = 0
+        exact = True
+        for d in threes:
+            is_real, is_exact = self._is_real_three(placed, placed_hash, row, col, d, depth)
+            exact = exact and is_exact
+            if is_real:
+                real_threes += 1
+                if real_threes >= 2:
+                    return True, exact
+        return False, exact
+
+    def _is_real_three(self, bits, position_hash, row, col, d, depth):
+        """(row, col)处已落黑子，判断d方向上的活三是否存在一个不是禁手的成活四点"""
+        dx, dy = DIRECTIONS[d]
+        size = bits.size
+        code = bits.window_code(row, col, d, 1)
+        exact = True
+        for step in range(-WINDOW_RADIUS + 1, WINDOW_RADIUS):
+            x, y = row + dx * step, col + dy * step
+            if not step or not (0 <= x < size and 0 <= y < size) or bits.get(x, y):
+                continue
+            # 在该点补一子后，经过(row, col)的这条线是否成为活四
+            if self.table[code + 4 ** (WINDOW_RADIUS + step)] != OPEN_FOUR:
+                continue
+            forbidden, is_exact = self._check(bits, position_hash, x, y, depth + 1)
+            exact = exact and is_exact
+            if not forbidden:
+                return True, exact
+        return False, exact
@@ -0,0 +1,120 @@
+# coding:utf-8
+"""五子棋规则：胜负判断与黑棋禁手(三三、四四、长连)
+
+各函数的variant参数为规则变体(variants.RuleVariant或其名称)，默认为连珠规则：
+黑棋需要恰好五连才能获胜，白棋五连及以上均获胜，黑棋有禁手。
+没有禁手的规则下，禁手相关函数直接返回空结果，不做任何计算。
+按棋型表判断的三三禁手包含假三；需要按连珠规则识别假三时，
+向禁手相关函数传入checker(renju.RenjuChecker)，由它对候选点做递归确认。
+
+所有判断都按"假设在此落子"计算，不会修改棋盘。*_in_state函数接受GameState快照，
+在内部建立私有的棋盘，可以在工作线程中调用而不需要加锁。
+"""
+
+from gomoku.core import analysis, patterns
+from gomoku.core.board import Board
+from gomoku.core.variants import get_variant
+
+
+def get_shape_table(color, variant=None):
+    """获取指定颜色在该规则下使用的棋型分类表"""
+    return get_variant(variant).table(color)
+
+
+def analyze_move(board, row, col, color, variant=None):
+    """单次遍历四个方向，得到落子点的连子长度、活端和棋型
+    该点为空时按假设在此落子计算，不会修改棋盘"""
+    return analysis.analyze_point(board.bits, row, col, color, get_shape_table(color, variant))
+
+
+def is_winning_analysis(lines, color, variant=None):
+    """根据分析结果判断该落子是否获胜(分析结果需使用同一规则的分类表)"""
+    return get_variant(variant).is_win(lines)
+
+
+def check_win(board, row, col, variant=None):
+    """检查(row, col)处已落的棋子是否形成五连获胜"""
+    color = board.get(row, col)
+    return is_winning_analysis(analyze_move(board, row, col, color, variant), color, variant)
+
+
+def is_forbidden_move(board, row, col, checker=None, variant=None):
+    """完整的黑棋禁手检测
+    包括：三三禁手、四四禁手、长连禁手；同时形成五连时优先判定为胜局而非禁手
+    传入checker时按连珠规则递归排除假三"""
+    if not get_variant(variant).forbidden:
+        return False
+    if not analysis.is_forbidden(analyze_move(board, row, col, 1)):
+        return False
+    return checker is None or checker.is_forbidden(board, row, col)
+
+
+def line_shape(board, row, col, d, color, variant=None):
+    """查表获取color在指定方向上的棋型分类"""
+    return get_shape_table(color, variant)[board.bits.window_code(row, col, d, color)]
+
+
+def find_forbidden_positions(board, checker=None, variant=None):
+    """全盘扫描所有黑棋禁手点，安装了NumPy时使用向量化扫描
+    按棋型的扫描结果是候选点，传入checker时再逐个递归确认"""
+    if not get_variant(variant).forbidden:
+        return []
+    # 延迟导入，避免导入规则模块时就加载NumPy(后台进程只需要标量规则时可以快速启动)
+    from gomoku.core import vectorized
+    if vectorized.HAS_NUMPY:
+        mask = vectorized.forbidden_mask(vectorized.to_array(board.grid), get_shape_table(1))
+        candidates = vectorized.positions(mask)
+    else:
+        # 只有邻域内的空位才可能形成棋型
+        candidates = sorted((row, col) for row, col in board.zone if is_forbidden_move(board, row, col))
+    if checker is None:
+        return candidates
+    return [(row, col) for row, col in candidates if checker.is_forbidden(board, row, col)]
+
+
+def best_shape(lines):
+    """分析结果中最强的棋型(长连不计)"""
+    shapes = [info.shape for info in lines if info.shape != patterns.OVERLINE]
+    return max(shapes) if shapes else patterns.NONE
+
+
+def find_threats(board, color, checker=None, variant=None):
+    """全盘扫描color的威胁点：在该空位落子能形成活三及以上棋型
+    返回{(row, col): 最强棋型}；黑棋的禁手点不计入(checker用法同find_forbidden_positions)。
+    安装了NumPy时使用向量化扫描"""
+    variant = get_variant(variant)
+    check_forbidden = color == 1 and variant.forbidden
+    from gomoku.core import vectorized
+    if vectorized.HAS_NUMPY:
+        array = vectorized.to_array(board.grid)
+        best = vectorized.threat_map(array, color, variant.table(color))
+        if check_forbidden:
+            for row, col in find_forbidden_positions(board, checker, variant):
+                best[row, col] = patterns.NONE
+        return {(row, col): int(best[row, col]) for row, col in vectorized.positions(best)}
+
+    threats = {}
+    for row, col in board.zone:
+        lines = analyze_move(board, row, col, color, variant)
+        if check_forbidden and analysis.is_forbidden(lines) and (
+                checker is None or checker.is_forbidden(board, row, col)):
+            continue
+        shape = best_shape(lines)
+        if shape >= patterns.OPEN_THREE:
+            threats[(row, col)] = shape
+    return threats
+
+
+def is_forbidden_in_state(state, row, col, checker=None, variant=None):
+    """判断黑棋在state局面中(row, col)落子是否为禁手，不修改任何共享数据"""
+    return is_forbidden_move(Board.from_state(state), row, col, checker, variant)
+
+
+def find_forbidden_in_state(state, checker=None, variant=None):
+    """state局面中所有黑棋禁手点，不修改任何共享数据"""
+    return find_forbidden_positions(Board.from_state(state), checker, variant)
+
+
+def find_threats_in_state(state, color, checker=None, variant=None):
+    """state局面中color的所有威胁点，不修改任何共享数据"""
+    return find_threats(Board.from_state(state), color, checker, variant)
@@ -0,0 +1,59 @@
+# coding:utf-8
+"""对局数据与JSON字典之间的转换，字段与历史记录文件保持一致"""
+
+from gomoku.core.game import Game
+from gomoku.core.state import GameState
+from gomoku.core.variants import DEFAULT_VARIANT
+
+
+def game_to_dict(game):
+    """导出对局的基本数据(不含时间戳、棋盘风格等界面信息)"""
+    state = game.state
+    return {
+        "board_size": state.size,
+        "rule": game.variant.name,
+        "board_data": state.to_rows(),
+        "current_player": state.current_player,
+        "game_started": state.game_started,
+        "game_over": state.game_over,
+        "move_history": [list(move) for move in state.move_list()],
+        "winner": state.winner,
+    }
+
+
+def load_game_dict(game, game_data):
+    """把历史记录中的对局数据加载到已有的对局对象中
+    缺少字段或规则未知时抛出KeyError，棋盘尺寸与对局不一致时抛出ValueError
+    对局对象会切换为记录中的规则"""
+    size = data_board_size(game_data)
+    if size != game.size:
+        raise ValueError(f"棋盘尺寸不一致: 对局为{game.size}路，数据为{size}路")
+    game.set_variant(data_rule(game_data))
+    game.load_state(state_from_dict(game_data, size))
+    return game
+
+
+def state_from_dict(game_data, size=None):
+    """把对局数据转换为GameState(棋盘和棋步转为紧凑数组)，缺少字段时抛出KeyError"""
+    state = GameState(size or data_board_size(game_data))
+    state.load(game_data['board_data'], [tuple(move) for move in game_data['move_history']])
+    state.current_player = game_data['current_player']
+    state.game_started = game_data['game_started']
+    state.game_over = game_data['game_over']
+    state.winner = game_data['winner']
+    return state
+
+
+def data_board_size(game_data):
+    """对局数据的棋盘尺寸(早期的记录没有board_size字段，按棋盘数据的行数计算)"""
+    return game_data.get('board_size', len(game_data['board_data']))
+
+
+def data_rule(game_data):
+    """对局数据使用的规则名称(早期的记录没有rule字段，均为连珠规则)"""
+    return game_data.get('rule', DEFAULT_VARIANT.name)
+
+
+def game_from_dict(game_data):
+    """根据历史记录中的对局数据创建新的对局对象"""
+    return load_game_dict(Game(data_board_size(game_data), variant=data_rule(game_data)), game_data)
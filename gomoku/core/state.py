@@ -0,0 +1,98 @@
+# coding:utf-8
+"""紧凑的对局状态
+
+棋盘用bytearray(size*size)保存，棋步用array保存每步的点编号(row * size + col)，
+再加上当前玩家和胜负等几个标量。snapshot()与原对象共享两个缓冲区，复制是O(1)的；
+任何一方第一次修改时才真正复制(写时复制)。
+搜索、回放和分析可以随意派生局面，而不必深拷贝嵌套列表。
+"""
+from array import array
+
+
+def move_typecode(size):
+    """保存点编号所需的数组类型：15路棋盘用单字节，更大的棋盘点编号超过255，用双字节"""
+    return 'B' if size * size <= 256 else 'H'
+
+
+class GameState:
+    """对局状态 - 棋盘0表示空，1表示黑棋，2表示白棋"""
+
+    __slots__ = ('size', 'cells', 'moves', 'current_player', 'game_started', 'game_over', 'winner',
+                 '_shared')
+
+    def __init__(self, size=15):
+        self.size = size
+        self.reset()
+
+    def reset(self, start_immediately=False):
+        """清空棋盘和棋步，黑棋先行"""
+        self.cells = bytearray(self.size * self.size)
+        self.moves = array(move_typecode(self.size))
+        self.current_player = 1  # 1表示黑棋，2表示白棋
+        self.game_started = start_immediately
+        self.game_over = False
+        self.winner = 0  # 0表示无胜者，1表示黑棋胜，2表示白棋胜
+        self._shared = False  # 缓冲区是否与其他快照共享
+
+    def snapshot(self):
+        """O(1)复制当前状态，缓冲区在下一次修改时才复制"""
+        copy = GameState.__new__(GameState)
+        copy.size = self.size
+        copy.cells = self.cells
+        copy.moves = self.moves
+        copy.current_player = self.current_player
+        copy.game_started = self.game_started
+        copy.game_over = self.game_over
+        copy.winner = self.winner
+        copy._shared = self._shared = True
+        return copy
+
+    def _own(self):
+        """修改前确保缓冲区为自己独有"""
+        if self._shared:
+            self.cells = bytearray(self.cells)
+            self.moves = array(self.moves.typecode, self.moves)
+            self._shared = False
+
+    def get(self, row, col):
+        """获取指定位置的棋子"""
+        return self.cells[row * self.size + col]
+
+    def place(self, row, col, color):
+        """落子并记录棋步"""
+        self._own()
+        index = row * self.size + col
+        self.cells[index] = color
+        self.moves.append(index)
+
+    def pop(self):
+        """撤销最后一步，返回该步(row, col)"""
+        self._own()
+        index = self.moves.pop()
+        self.cells[index] = 0
+        return divmod(index, self.size)
+
+    def move_count(self):
+        """已下的步数"""
+        return len(self.moves)
+
+    def move_list(self):
+        """棋步列表[(row, col), ...]"""
+        return [divmod(index, self.size) for index in self.moves]
+
+    def to_rows(self):
+        """导出棋盘为二维列表"""
+        size, cells = self.size, self.cells
+        return [list(cells[row * size:(row + 1) * size]) for row in range(size)]
+
+    def load(self, rows, moves=()):
+        """从二维列表和棋步列表加载(不回放棋步，两者分别保存)"""
+        size = self.size
+        if len(rows) != size or any(len(values) != size for values in rows):
+            raise ValueError(f"棋盘数据不是{size}x{size}")
+        cells = bytearray(size * size)
+        for row, values in enumerate(rows):
+            cells[row * size:(row + 1) * size] = bytes(values)
+        self.cells = cells
+        self.moves = array(move_typecode(size), (row * size + col for row, col in moves))
+        self._shared = False
@@ -0,0 +1,167 @@
+# coding:utf-8
+"""增量维护的双方威胁表
+
+对每个空位、每个方向、每种颜色保存"假设在此落子"的棋型，并按棋型汇总成点集：
+FIVE是成五点(冲四、活四的完成点)，OPEN_FOUR是活三变活四的点，FOUR/DOUBLE_FOUR是成四点，
+OPEN_THREE是成活三的点。某点某方向的棋型只取决于该方向上两侧各5格的棋子，
+因此落子或提子后只需重新查表同一条线上半径5以内的空位(每个方向10个点)，
+胜负判断、禁手候选和威胁提示都可以直接读取点集，而不必重新扫描棋盘。
+"""
+from gomoku.core.bitboard import DIRECTIONS
+from gomoku.core.patterns import (
+    WINDOW_RADIUS, NONE, OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE, OVERLINE,
+)
+from gomoku.core.variants import get_variant
+
+# 汇总成点集的棋型
+TRACKED_SHAPES = (OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE, OVERLINE)
+
+# 各棋盘尺寸的同线点缓存
+_LINE_CELLS_CACHE = {}
+
+
+def get_line_cells(size, radius=WINDOW_RADIUS):
+    """获取每个点在各方向上、半径范围内的同线点(不含自身)：table[index][d]为(row, col)元组"""
+    key = (size, radius)
+    if key not in _LINE_CELLS_CACHE:
+        table = []
+        for row in range(size):
+            for col in range(size):
+                dirs = []
+                for dx, dy in DIRECTIONS:
+                    cells = []
+                    for step in range(-radius, radius + 1):
+                        x, y = row + dx * step, col + dy * step
+                        if step and 0 <= x < size and 0 <= y < size:
+                            cells.append((x, y))
+                    dirs.append(tuple(cells))
+                table.append(tuple(dirs))
+        _LINE_CELLS_CACHE[key] = tuple(table)
+    return _LINE_CELLS_CACHE[key]
+
+
+def is_forbidden_shapes(shapes):
+    """根据黑棋四个方向的棋型判断是否为禁手候选(与analysis.is_forbidden等价，需使用恰好五连的分类表)"""
+    if FIVE in shapes:
+        return False
+    if OVERLINE in shapes:
+        return True
+    fours = sum(2 if shape == DOUBLE_FOUR else shape in (FOUR, OPEN_FOUR) for shape in shapes)
+    return fours >= 2 or shapes.count(OPEN_THREE) >= 2
+
+
+class ThreatTracker:
+    """双方的威胁点表，随棋盘的每次落子、提子增量更新
+
+    board: 棋盘对象(Board)，调用update前棋盘上已完成落子或提子
+    variant: 规则变体(决定双方使用的棋型分类表，以及是否维护黑棋禁手候选)
+    """
+
+    def __init__(self, board, variant=None):
+        self.board = board
+        self.line_cells = get_line_cells(board.size)
+        self.set_variant(variant)
+
+    def set_variant(self, variant):
+        """切换规则变体并重建"""
+        self.variant = get_variant(variant)
+        self.tables = {color: self.variant.table(color) for color in (1, 2)}
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前棋盘重新计算所有空位的棋型"""
+        count = self.board.size * self.board.size
+        # _shapes[color][index * 4 + d]: 该空位在方向d上的棋型(有子的点为NONE)
+        self._shapes = {color: bytearray(count * 4) for color in (1, 2)}
+        # _present[color][index]: 该空位各方向棋型的集合，按位记录(1 << 棋型)
+        self._present = {color: bytearray(count) for color in (1, 2)}
+        self._points = {color: {shape: set() for shape in TRACKED_SHAPES} for color in (1, 2)}
+        self.forbidden_candidates = set()  # 按棋型判断的黑棋禁手候选点(未递归排除假三)
+        for row, col in self.board.zone:
+            for color in (1, 2):
+                index = row * self.board.size + col
+                for d in range(4):
+                    self._shapes[color][index * 4 + d] = self._lookup(row, col, d, color)
+                self._refresh(row, col, color)
+
+    def _lookup(self, row, col, d, color):
+        """查表获取color在空位(row, col)方向d上的棋型"""
+        return self.tables[color][self.board.bits.window_code(row, col, d, color)]
+
+    def _refresh(self, row, col, color):
+        """按该点四个方向的棋型更新点集成员"""
+        index = row * self.board.size + col
+        shapes = self._shapes[color][index * 4:index * 4 + 4]
+        present = 0
+        for shape in shapes:
+            present |= 1 << shape
+        present &= ~(1 << NONE)
+        changed = present ^ self._present[color][index]
+        if changed:
+            self._present[color][index] = present
+            points = self._points[color]
+            for shape in TRACKED_SHAPES:
+                if changed >> shape & 1:
+                    if present >> shape & 1:
+                        points[shape].add((row, col))
+                    else:
+                        points[shape].discard((row, col))
+        if color == 1 and self.variant.forbidden:
+            if is_forbidden_shapes(list(shapes)):
+                self.forbidden_candidates.add((row, col))
+            else:
+                self.forbidden_candidates.discard((row, col))
+
+    def update(self, row, col):
+        """(row, col)处落子或提子后，更新该点及四条线上受影响的空位"""
+        board = self.board
+        size = board.size
+        index = row * size + col
+        occupied = not board.is_empty(row, col)
+        for color in (1, 2):
+            shapes = self._shapes[color]
+            touched = {(row, col)}
+            for d in range(4):
+                shapes[index * 4 + d] = NONE if occupied else self._lookup(row, col, d, color)
+                for x, y in self.line_cells[index][d]:
+                    if board.is_empty(x, y):
+                        shapes[(x * size + y) * 4 + d] = self._lookup(x, y, d, color)
+                        touched.add((x, y))
+            for x, y in touched:
+                self._refresh(x, y, color)
+
+    def shapes(self, color, row, col):
+        """color在空位(row, col)落子后四个方向的棋型"""
+        index = (row * self.board.size + col) * 4
+        return tuple(self._shapes[color][index:index + 4])
+
+    def points(self, color, shape):
+        """某个方向上能形成该棋型的所有空位(返回内部集合，调用方不要修改)"""
+        return self._points[color][shape]
+
+    def fives(self, color):
+        """成五点：在此落子即获胜"""
+        return self._points[color][FIVE]
+
+    def open_fours(self, color):
+        """成活四的点"""
+        return self._points[color][OPEN_FOUR]
+
+    def fours(self, color):
+        """成冲四(含同线双四)的点"""
+        return self._points[color][FOUR] | self._points[color][DOUBLE_FOUR]
+
+    def open_threes(self, color):
+        """成活三的点"""
+        return self._points[color][OPEN_THREE]
+
+    def best_shape(self, color, row, col):
+        """该点最强的棋型(长连不计)"""
+        return max((shape for shape in self.shapes(color, row, col) if shape != OVERLINE), default=NONE)
+
+    def threats(self, color):
+        """color的所有威胁点{(row, col): 最强棋型}(活三及以上，不排除禁手点)"""
+        cells = set()
+        for shape in (OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE):
+            cells |= self._points[color][shape]
+        return {cell: self.best_shape(color, *cell) for cell in cells}
@@ -0,0 +1,99 @@
+# coding:utf-8
+"""棋步时间线：支持悔棋、重做和变化分支
+
+每个节点记录一步棋的增量：落子位置和颜色、落子后的局面哈希、禁手表的增减、落子后的胜负状态。
+悔棋和重做只需要按节点中的增量撤销或重新应用，不需要重新扫描棋盘。
+在某个节点上下出与原来不同的棋时会新建分支，原来的后续棋步保留为另一个变化。
+"""
+
+
+class TimelineNode:
+    """时间线上的一步棋(根节点没有棋步)"""
+
+    __slots__ = ('move', 'color', 'hash', 'forbidden_delta', 'game_over', 'winner',
+                 'parent', 'children', 'active')
+
+    def __init__(self, move=None, color=0, parent=None):
+        self.move = move              # (row, col)
+        self.color = color            # 落子方
+        self.hash = 0                 # 落子后的局面哈希
+        self.forbidden_delta = None   # 禁手表的增量(ForbiddenMap.update的返回值)，没有时为None
+        self.game_over = False        # 落子后游戏是否结束
+        self.winner = 0               # 落子后的胜者
+        self.parent = parent
+        self.children = []            # 各个变化的下一步
+        self.active = -1              # 重做时默认进入的变化
+
+    def child(self, move):
+        """查找下一步为move的变化，没有时返回None"""
+        for node in self.children:
+            if node.move == move:
+                return node
+        return None
+
+    def active_child(self):
+        """重做时默认进入的变化，没有后续棋步时返回None"""
+        return self.children[self.active] if self.children else None
+
+
+class Timeline:
+    """棋步时间线(棋步树)，current为当前局面对应的节点"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """清空所有棋步和变化"""
+        self.root = TimelineNode()
+        self.current = self.root
+
+    def load(self, moves, colors):
+        """从棋步列表建立一条没有增量记录的主线，当前节点为最后一步"""
+        self.clear()
+        for move, color in zip(moves, colors):
+            self.advance(tuple(move), color)
+
+    def advance(self, move, color):
+        """在当前节点后落子：已有相同的变化时进入该变化，否则新建分支；返回新的当前节点"""
+        node = self.current.child(move)
+        if node is None:
+            node = TimelineNode(move, color, self.current)
+            self.current.children.append(node)
+        self.current.active = self.current.children.index(node)
+        self.current = node
+        return node
+
+    def back(self):
+        """回到上一步，返回被撤销的节点，已在开头时返回None"""
+        node = self.current
+        if node.parent is None:
+            return None
+        self.current = node.parent
+        return node
+
+    def forward(self, move=None):
+        """进入下一步(默认进入上次所在的变化)，返回该节点，没有后续棋步时返回None"""
+        node = self.current.child(tuple(move)) if move is not None else self.current.active_child()
+        if node is None:
+            return None
+        self.current.active = self.current.children.index(node)
+        self.current = node
+        return node
+
+    def can_redo(self):
+        """是否有可以重做的棋步"""
+        return bool(self.current.children)
+
+    def variations(self):
+        """当前局面之后的所有变化(下一步的位置列表)"""
+        return [node.move for node in self.current.children]
+
+    def path(self):
+        """从开局到当前节点的棋步"""
+        moves = []
+        node = self.current
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
@@ -0,0 +1,61 @@
+# coding:utf-8
+"""规则变体
+
+每种规则由三项决定：黑白双方各自的成五条件(对应一张棋型分类表)，以及黑棋是否有禁手。
+胜负判断统一为"某个方向的棋型为FIVE"，成五条件的差别全部体现在分类表里；
+没有禁手的规则完全跳过禁手相关的计算。
+"""
+from gomoku.core import patterns
+
+# 成五条件：(恰好五连, 两端被堵的五连无效)
+FREE = (False, False)      # 五连及以上
+EXACT = (True, False)      # 恰好五连，长连不算
+BLOCKED = (False, True)    # 五连及以上，但两端都被堵住的恰好五连不算
+
+
+class RuleVariant:
+    """规则变体
+
+    name: 规则名称(保存在对局记录中)
+    title: 界面上显示的名称
+    black_five, white_five: 黑白双方的成五条件
+    forbidden: 黑棋是否有禁手(三三、四四、长连)
+    """
+
+    def __init__(self, name, title, black_five, white_five, forbidden=False):
+        self.name = name
+        self.title = title
+        self.five_rules = {1: black_five, 2: white_five}
+        self.forbidden = forbidden
+
+    def __repr__(self):
+        return f"RuleVariant({self.name!r})"
+
+    def table(self, color):
+        """color使用的棋型分类表"""
+        exact_five, blocked_five = self.five_rules[color]
+        return patterns.get_table(exact_five=exact_five, blocked_five=blocked_five)
+
+    def is_win(self, lines):
+        """根据落子点的分析结果判断是否成五获胜"""
+        return any(info.shape == patterns.FIVE for info in lines)
+
+
+FREESTYLE = RuleVariant("freestyle", "无禁手", FREE, FREE)
+STANDARD = RuleVariant("standard", "标准(恰好五连)", EXACT, EXACT)
+RENJU = RuleVariant("renju", "连珠(黑棋禁手)", EXACT, FREE, forbidden=True)
+CARO = RuleVariant("caro", "Caro(两端被堵的五连无效)", BLOCKED, BLOCKED)
+
+VARIANTS = {variant.name: variant for variant in (FREESTYLE, STANDARD, RENJU, CARO)}
+
+# 未指定规则时(包括早期没有记录规则的对局)使用连珠规则
+DEFAULT_VARIANT = RENJU
+
+
+def get_variant(variant=None):
+    """按名称获取规则变体，传入RuleVariant时原样返回，None时返回默认规则；未知名称抛出KeyError"""
+    if variant is None:
+        return DEFAULT_VARIANT
+    if isinstance(variant, RuleVariant):
+        return variant
+    return VARIANTS[variant]
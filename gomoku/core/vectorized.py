@@ -0,0 +1,103 @@
+# coding:utf-8
+"""基于NumPy的整盘向量化扫描
+
+把棋盘四周补上5格"棋盘外"，对四个方向分别用步长视图取出每个点的11格窗口，
+一次矩阵运算得到所有点的窗口编码，再整体查棋型分类表。
+禁手和威胁点的整盘扫描只需十几次数组运算，不再逐点调用Python代码。
+没有安装NumPy时HAS_NUMPY为False，调用方应退回逐点计算。
+"""
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import as_strided
+except ImportError:  # 没有安装NumPy时使用逐点计算
+    np = None
+
+from gomoku.core.bitboard import DIRECTIONS
+from gomoku.core.patterns import (WINDOW_RADIUS, WINDOW_SIZE, OFF_BOARD, NONE, OPEN_THREE,
+                                  FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE, OVERLINE)
+
+HAS_NUMPY = np is not None
+
+if HAS_NUMPY:
+    # 窗口第i格的权重4^i
+    _POWERS = 4 ** np.arange(WINDOW_SIZE, dtype=np.int64)
+    # 把棋盘上的颜色换算为相对于己方的编码(0空位，1己方，2对方)
+    _RELATIVE = {
+        1: np.array([0, 1, 2], dtype=np.int8),
+        2: np.array([0, 2, 1], dtype=np.int8),
+    }
+    # 已转换为数组的棋型分类表
+    _TABLE_ARRAYS = {}
+
+
+def table_array(table):
+    """把bytes形式的分类表包装为数组(共享内存，不复制)"""
+    key = id(table)
+    array = _TABLE_ARRAYS.get(key)
+    if array is None:
+        array = _TABLE_ARRAYS[key] = np.frombuffer(table, dtype=np.uint8)
+    return array
+
+
+def to_array(grid):
+    """把二维列表转换为int8数组"""
+    return np.asarray(grid, dtype=np.int8)
+
+
+def window_codes(board, color):
+    """计算color在每个点落子时四个方向的窗口编码，返回形状为(4, size, size)的数组
+    board为int8数组；已有棋子的点也会计算(中心视为己方)，由调用方自行屏蔽"""
+    size = board.shape[0]
+    padded = np.full((size + 2 * WINDOW_RADIUS, size + 2 * WINDOW_RADIUS), OFF_BOARD, dtype=np.int8)
+    padded[WINDOW_RADIUS:-WINDOW_RADIUS, WINDOW_RADIUS:-WINDOW_RADIUS] = _RELATIVE[color][board]
+
+    row_stride, col_stride = padded.strides
+    codes = np.empty((4, size, size), dtype=np.int64)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        # 窗口起点为中心点沿反方向移动5格的位置
+        start = padded[WINDOW_RADIUS - WINDOW_RADIUS * dx:, WINDOW_RADIUS - WINDOW_RADIUS * dy:]
+        windows = as_strided(
+            start,
+            shape=(size, size, WINDOW_SIZE),
+            strides=(row_stride, col_stride, dx * row_stride + dy * col_stride),
+            writeable=False,
+        )
+        codes[d] = windows @ _POWERS
+    # 中心点统一视为己方棋子
+    center = _POWERS[WINDOW_RADIUS]
+    codes += (1 - padded[WINDOW_RADIUS:-WINDOW_RADIUS, WINDOW_RADIUS:-WINDOW_RADIUS]) * center
+    return codes
+
+
+def shape_planes(board, color, table):
+    """color在每个点落子时四个方向的棋型分类，形状为(4, size, size)"""
+    return table_array(table)[window_codes(board, color)]
+
+
+def forbidden_from_shapes(shapes, axis=0):
+    """根据黑棋四个方向的棋型判断禁手，axis为方向所在的维度
+    形成五连时不算禁手；否则长连、四四、三三均为禁手"""
+    five = (shapes == FIVE).any(axis=axis)
+    overline = (shapes == OVERLINE).any(axis=axis)
+    fours = ((shapes == FOUR) | (shapes == OPEN_FOUR)).sum(axis=axis) + 2 * (shapes == DOUBLE_FOUR).sum(axis=axis)
+    threes = (shapes == OPEN_THREE).sum(axis=axis)
+    return ~five & (overline | (fours >= 2) | (threes >= 2))
+
+
+def forbidden_mask(board, table):
+    """所有黑棋禁手空位的布尔矩阵；table为黑棋(恰好五连)的分类表"""
+    return (board == 0) & forbidden_from_shapes(shape_planes(board, 1, table))
+
+
+def threat_map(board, color, table):
+    """color在每个空位落子能形成的最强棋型(活三及以上)，其余点为NONE"""
+    shapes = shape_planes(board, color, table)
+    shapes[shapes == OVERLINE] = NONE
+    best = shapes.max(axis=0)
+    best[(board != 0) | (best < OPEN_THREE)] = NONE
+    return best
+
+
+def positions(mask):
+    """把布尔矩阵转换为(row, col)列表"""
+    return [(int(row), int(col)) for row, col in zip(*np.nonzero(mask))]
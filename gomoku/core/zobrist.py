@@ -0,0 +1,38 @@
+# coding:utf-8
+"""Zobrist局面哈希
+
+为每个交叉点的黑子和白子各分配一个64位随机数，局面哈希为所有棋子对应随机数的异或。
+落子和提子时只需异或一次即可增量更新。随机数使用固定种子生成，
+因此不同进程、不同次运行得到的哈希值一致，可以用于缓存和跨进程共享。
+"""
+import random
+
+ZOBRIST_SEED = 0x5A0B1E57
+
+# 各棋盘尺寸的随机数表缓存
+_KEYS_CACHE = {}
+
+
+def get_keys(size):
+    """获取指定尺寸棋盘的随机数表，keys[color][row * size + col]，下标0留空"""
+    keys = _KEYS_CACHE.get(size)
+    if keys is None:
+        rng = random.Random(ZOBRIST_SEED + size)
+        keys = (None,) + tuple(
+            tuple(rng.getrandbits(64) for _ in range(size * size))
+            for _ in range(2)
+        )
+        _KEYS_CACHE[size] = keys
+    return keys
+
+
+def compute_hash(grid):
+    """从二维列表完整计算局面哈希"""
+    size = len(grid)
+    keys = get_keys(size)
+    value = 0
+    for row, values in enumerate(grid):
+        for col, color in enumerate(values):
+            if color:
+                value ^= keys[color][row * size + col]
+    return value
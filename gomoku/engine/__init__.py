@@ -0,0 +1,15 @@
+# coding:utf-8
+"""五子棋搜索引擎：在GameState快照上搜索，不依赖Qt，可在工作线程中运行
+
+多进程并行的Alpha-Beta(gomoku.engine.smp)不在这里导入，
+这样 python -m gomoku.engine.smp 直接运行扩展测试时该模块只会被加载一次。
+"""
+
+from gomoku.engine.alphabeta import AlphaBetaEngine, SearchResult, WIN_SCORE
+from gomoku.engine.mcts import MCTSEngine
+from gomoku.engine.position import SearchPosition
+from gomoku.engine.ttable import TranspositionTable, SharedTranspositionTable
+from gomoku.engine.vcf import VCFSolver
+from gomoku.engine.vct import VCTSolver, VCTResult
+
+__all__ = ['AlphaBetaEngine', 'MCTSEngine', 'SearchResult', 'SearchPosition', 'TranspositionTable', 'SharedTranspositionTable', 'VCFSolver', 'VCTSolver', 'VCTResult', 'WIN_SCORE']
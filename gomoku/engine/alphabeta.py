@@ -0,0 +1,250 @@
+# coding:utf-8
+"""Alpha-Beta搜索
+
+负极大值形式的Alpha-Beta剪枝，迭代加深：从1层开始逐层加深，
+每完成一层就记下最佳着法，并把它排在下一层的最前面；时间用完时返回最后完成的一层的结果。
+节点上先处理必然的走法：己方有成五点直接获胜，对方有成五点只能去堵，
+己方有活四点且对方没有成五点和冲四反击时两步内获胜；其余节点按排序分取前max_branch个候选着法。
+搜索结果保存在置换表中，经不同着法顺序到达的同一局面直接取回评分或剪枝范围，
+表中记录的最佳着法排在该节点的最前面。
+搜索之前先用VCF求解器检查己方能否连续冲四取胜，能则直接按取胜序列落子。
+"""
+import time
+from collections import namedtuple
+
+from gomoku.engine.evaluation import evaluate
+from gomoku.engine.position import SearchPosition
+from gomoku.engine.ttable import TranspositionTable, DEFAULT_SIZE_MB, EXACT, LOWER, UPPER
+from gomoku.engine.vcf import VCFSolver
+
+# 胜负分：获胜为WIN_SCORE减去到达的步数，越快获胜分数越高
+WIN_SCORE = 1000000
+WIN_THRESHOLD = WIN_SCORE - 1000
+# 有活四点但对方还有冲四反击时的评分：远高于普通局面，但低于胜负分
+OPEN_FOUR_SCORE = WIN_THRESHOLD // 10
+
+# 每搜索多少个节点检查一次时间
+CHECK_INTERVAL = 256
+
+# move: 最佳着法(row, col)，没有可走的棋时为None；score: 从走棋方角度的评分；
+# depth: 完成的搜索深度；nodes: 搜索的节点数；elapsed: 用时(秒)
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+
+class SearchTimeout(Exception):
+    """搜索超时或被中止"""
+
+
+class AlphaBetaEngine:
+    """迭代加深的Alpha-Beta搜索引擎
+
+    time_limit: 每步的思考时间(秒)
+    max_depth: 最大搜索深度
+    max_branch: 每个节点最多展开的候选着法数
+    hash_size_mb: 置换表的内存上限(MB)，置换表在多次搜索之间保留
+    tt: 可选的置换表(例如多个进程共享的置换表)，提供时忽略hash_size_mb
+    """
+
+    def __init__(self, time_limit=2.0, max_depth=10, max_branch=12, hash_size_mb=DEFAULT_SIZE_MB, tt=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.max_branch = max_branch
+        self.tt = tt if tt is not None else TranspositionTable(hash_size_mb)
+        self.vcf = VCFSolver()
+        self.renju = None
+        self.stop_event = None  # 可选的进程间中止信号(multiprocessing.Event)
+        self._variant = None  # 置换表中的条目所属的规则名称
+        self._stopped = False
+
+    def stop(self):
+        """中止正在进行的搜索(可以从其他线程调用)，搜索会尽快返回已完成的结果"""
+        self._stopped = True
+
+    def reset_stop(self):
+        """清除中止标记：由调用方在启动搜索线程之前调用，
+        这样线程进入search之前发出的stop()不会丢失"""
+        self._stopped = False
+
+    def stopped(self):
+        """是否已被要求中止"""
+        return self._stopped or (self.stop_event is not None and self.stop_event.is_set())
+
+    def search(self, state, variant=None, start_depth=1, new_search=True, root_rotation=0):
+        """为state的当前玩家搜索最佳着法，返回SearchResult
+        start_depth: 迭代加深的起始深度
+        new_search: 是否开始置换表的新一轮并在规则改变时清空置换表(共享置换表时由创建者统一负责)
+        root_rotation: 每一层搜索时根节点着法顺序轮转的位数(并行搜索时使各进程先搜不同的着法)"""
+        from gomoku.core.renju import RenjuChecker
+        if self.renju is None:
+            self.renju = RenjuChecker()
+
+        start = time.monotonic()
+        self._deadline = start + self.time_limit
+        self.nodes = 0
+        position = SearchPosition(state, variant, self.renju)
+        if new_search:
+            # 置换表只以局面哈希为键，同一局面在不同规则下的结论不同，换规则时清空
+            if position.variant.name != self._variant:
+                self.tt.clear()
+                self._variant = position.variant.name
+            self.tt.new_search()
+        color = state.current_player
+
+        forced = self._forced_moves(position, color)
+        if forced is not None and len(forced) <= 1:
+            # 堵点全是禁手时已经输了，仍随便走一步合法的棋
+            moves = forced or position.ordered_moves(color, 1)
+            move = moves[0] if moves else None
+            return SearchResult(move, 0, 0, self.nodes, time.monotonic() - start)
+
+        # 连续冲四取胜时不必搜索
+        if forced is None:
+            line = self.vcf.solve(position, color, should_stop=self.stopped)
+            if line:
+                return SearchResult(line[0], WIN_SCORE - len(line), 0, self.nodes, time.monotonic() - start)
+
+        moves = forced or position.ordered_moves(color, self.max_branch)
+        if not moves:
+            return SearchResult(None, 0, 0, self.nodes, time.monotonic() - start)
+
+        best_move, best_score, completed = moves[0], 0, 0
+        for depth in range(min(start_depth, self.max_depth), self.max_depth + 1):
+            if self.stopped():
+                break
+            # 轮转后从另一个着法开始搜索，该着法的子树先确定alpha，各进程搜索的树因此不同
+            shift = root_rotation % len(moves)
+            try:
+                move, score = self._search_root(position, moves[shift:] + moves[:shift], color, depth)
+            except SearchTimeout:
+                break
+            best_move, best_score, completed = move, score, depth
+            # 上一层的最佳着法排在最前面
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= WIN_THRESHOLD:
+                break
+        return SearchResult(best_move, best_score, completed, self.nodes, time.monotonic() - start)
+
+    def _forced_moves(self, position, color):
+        """必然的走法：己方能成五时返回成五点，对方能成五时返回所有合法的堵点，否则返回None"""
+        threats = position.threats
+        wins = position.legal_points(threats.fives(color), color)
+        if wins:
+            return wins[:1]
+        blocks = threats.fives(3 - color)
+        if blocks:
+            return position.legal_points(sorted(blocks), color)
+        return None
+
+    def _search_root(self, position, moves, color, depth):
+        """根节点搜索，返回(最佳着法, 评分)"""
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = moves[0]
+        for row, col in moves:
+            position.make(row, col, color)
+            try:
+                score = -self._negamax(position, depth - 1, -beta, -alpha, 3 - color)
+            finally:
+                position.unmake(row, col)
+            if score > alpha:
+                alpha, best_move = score, (row, col)
+        return best_move, alpha
+
+    def _negamax(self, position, depth, alpha, beta, color):
+        """负极大值搜索，返回从color角度的评分"""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and (time.monotonic() > self._deadline or self.stopped()):
+            raise SearchTimeout()
+
+        threats = position.threats
+        ply = position.ply
+        opponent = 3 - color
+        alpha_orig = alpha
+
+        # 己方有成五点：下一步获胜
+        if position.legal_points(threats.fives(color), color):
+            return WIN_SCORE - ply - 1
+
+        blocks = threats.fives(opponent)
+        if blocks:
+            # 对方有两个以上成五点，堵不住
+            if len(blocks) > 1:
+                return -(WIN_SCORE - ply - 2)
+            moves = position.legal_points(blocks, color)
+            if not moves:
+                return -(WIN_SCORE - ply - 2)
+        else:
+            # 己方有活四点，对方没有成五点：对方也没有成四的手段时两步后获胜；
+            # 对方能连续冲四反击时不能算作胜局，继续搜索，搜索到底时按接近胜负的高分评估
+            open_four = position.legal_points(threats.open_fours(color), color)
+            if open_four and not position.legal_points(threats.fours(opponent) | threats.open_fours(opponent), opponent):
+                return WIN_SCORE - ply - 3
+            if depth <= 0:
+                return OPEN_FOUR_SCORE if open_four else evaluate(position, color)
+
+            tt_move = None
+            entry = self.tt.probe(position.hash)
+            if entry is not None:
+                tt_depth, flag, score, move = entry
+                score = _score_from_tt(score, ply)
+                if tt_depth >= depth:
+                    if flag == EXACT:
+                        return score
+                    if flag == LOWER:
+                        alpha = max(alpha, score)
+                    elif flag == UPPER:
+                        beta = min(beta, score)
+                    if alpha >= beta:
+                        return score
+                if move:
+                    tt_move = divmod(move - 1, position.size)
+
+            moves = position.ordered_moves(color, self.max_branch)
+            if not moves:
+                return 0
+            if tt_move in moves:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+
+        best, best_move = -WIN_SCORE - 1, None
+        for row, col in moves:
+            position.make(row, col, color)
+            try:
+                score = -self._negamax(position, depth - 1, -beta, -alpha, opponent)
+            finally:
+                position.unmake(row, col)
+            if score > best:
+                best, best_move = score, (row, col)
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if depth > 0:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(position.hash, depth, flag, _score_to_tt(best, ply),
+                          best_move[0] * position.size + best_move[1] + 1)
+        return best
+
+
+def _score_to_tt(score, ply):
+    """胜负分改为相对当前节点的步数再保存，使其与到达该局面的路径无关"""
+    if score >= WIN_THRESHOLD:
+        return score + ply
+    if score <= -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    """把置换表中的胜负分换算回相对根节点的步数"""
+    if score >= WIN_THRESHOLD:
+        return score - ply
+    if score <= -WIN_THRESHOLD:
+        return score + ply
+    return score
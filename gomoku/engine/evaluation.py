@@ -0,0 +1,149 @@
+# coding:utf-8
+"""静态局面评估
+
+由两部分组成：
+1. 线上棋型分：把每条线(横、竖、两条斜线)上双方的活二、眠二、活三、眠三、冲四、活四、五连分别计数，
+   按LINE_WEIGHTS加权求和。每条线的得分以(黑棋掩码, 白棋掩码, 线长)为键缓存在线型表中，
+   LineEvaluator保存每条线当前的得分和双方总分，落子和提子时只重算经过该点的四条线，
+   叶节点评估直接读取总分，不需要扫描全盘。
+2. 威胁点分：直接读取威胁表中双方各类棋型的点数：活三有两个成活四点、冲四有一个成五点，
+   点数越多说明潜在的进攻手段越多(也反映了线与线之间的配合)。
+轮到走棋的一方有先手优势，其分值略微放大。
+"""
+from gomoku.core.patterns import OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE
+
+# 各类点的分值
+POINT_WEIGHTS = (
+    (FIVE, 2000),
+    (OPEN_FOUR, 500),
+    (DOUBLE_FOUR, 120),
+    (FOUR, 60),
+    (OPEN_THREE, 25),
+)
+
+# 线上棋型
+LINE_FIVE = 0
+LINE_OPEN_FOUR = 1
+LINE_FOUR = 2
+LINE_OPEN_THREE = 3
+LINE_THREE = 4
+LINE_OPEN_TWO = 5
+LINE_TWO = 6
+
+# 线上棋型的分值，下标为棋型编号
+LINE_WEIGHTS = (10000, 2000, 120, 100, 20, 12, 2)
+
+# 线上棋型的模式，按棋型从强到弱匹配：x为己方棋子，_为空位，o为对方棋子或棋盘边缘。
+# 已经计入某个棋型的棋子不再参与较弱棋型的匹配，同一组棋子只计一次
+LINE_PATTERNS = (
+    (LINE_FIVE, ("xxxxx",)),
+    (LINE_OPEN_FOUR, ("_xxxx_",)),
+    (LINE_FOUR, ("xxxx_", "_xxxx", "xxx_x", "x_xxx", "xx_xx")),
+    (LINE_OPEN_THREE, ("_xxx__", "__xxx_", "_xx_x_", "_x_xx_")),
+    (LINE_THREE, ("xxx__", "__xxx", "xx_x_", "_x_xx", "x_xx_", "_xx_x", "xx__x", "x__xx", "x_x_x", "_xxx_")),
+    (LINE_OPEN_TWO, ("__xx__", "_x_x__", "__x_x_", "_x__x_")),
+    (LINE_TWO, ("xx___", "___xx", "x_x__", "__x_x", "x__x_", "_x__x", "x___x", "_xx__", "__xx_", "_x_x_")),
+)
+
+# 线型表的最大条目数，超过后清空
+MAX_LINE_ENTRIES = 200000
+
+# 线型表：(黑棋掩码, 白棋掩码, 线长) -> (黑棋得分, 白棋得分)
+_LINE_CACHE = {}
+
+
+def side_score(threats, color):
+    """color的威胁点分"""
+    return sum(len(threats.points(color, shape)) * weight for shape, weight in POINT_WEIGHTS)
+
+
+def line_shapes(own, other, length):
+    """一条线上己方的各棋型数量；own、other为双方的棋子掩码，第i位对应线上第i个点"""
+    chars = ["o"]
+    for i in range(length):
+        bit = 1 << i
+        chars.append("x" if own & bit else "o" if other & bit else "_")
+    chars.append("o")
+    text = "".join(chars)
+
+    used = [False] * len(text)
+    counts = [0] * len(LINE_WEIGHTS)
+    for shape, patterns in LINE_PATTERNS:
+        for pattern in patterns:
+            start = text.find(pattern)
+            while start >= 0:
+                stones = [start + i for i, char in enumerate(pattern) if char == "x"]
+                if not any(used[i] for i in stones):
+                    for i in stones:
+                        used[i] = True
+                    counts[shape] += 1
+                start = text.find(pattern, start + 1)
+    return counts
+
+
+def line_score(black, white, length):
+    """一条线上(黑棋得分, 白棋得分)，结果缓存在线型表中"""
+    global _LINE_CACHE
+    key = (black, white, length)
+    score = _LINE_CACHE.get(key)
+    if score is None:
+        score = tuple(
+            sum(count * weight for count, weight in zip(line_shapes(own, other, length), LINE_WEIGHTS))
+            if own else 0
+            for own, other in ((black, white), (white, black))
+        )
+        if len(_LINE_CACHE) >= MAX_LINE_ENTRIES:
+            _LINE_CACHE = {}
+        _LINE_CACHE[key] = score
+    return score
+
+
+class LineEvaluator:
+    """增量维护的线上棋型分
+
+    board: 棋盘(Board)，落子或提子之后调用update(row, col)
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.rebuild()
+
+    def rebuild(self):
+        """重新计算所有线的得分"""
+        bits = self.board.bits
+        size = bits.size
+        self.scores = [[(0, 0)] * count for count in bits.line_counts]
+        self.totals = [0, 0, 0]  # 下标为颜色
+        for d, count in enumerate(bits.line_counts):
+            for line in range(count):
+                black, white = bits.lines[1][d][line], bits.lines[2][d][line]
+                if black or white:
+                    # 横竖线长为size，斜线长度随编号变化
+                    length = size if d < 2 else size - abs(line - size + 1)
+                    self._set(d, line, line_score(black, white, length))
+
+    def _set(self, d, line, score):
+        old = self.scores[d][line]
+        self.scores[d][line] = score
+        self.totals[1] += score[0] - old[0]
+        self.totals[2] += score[1] - old[1]
+
+    def update(self, row, col):
+        """(row, col)处落子或提子之后，只重算经过该点的四条线"""
+        bits = self.board.bits
+        black_lines, white_lines = bits.lines[1], bits.lines[2]
+        for d, (line, _, length, _) in enumerate(bits.geometry[row * bits.size + col]):
+            self._set(d, line, line_score(black_lines[d][line], white_lines[d][line], length))
+
+    def score(self, color):
+        """color的线上棋型分"""
+        return self.totals[color]
+
+
+def evaluate(position, color):
+    """从color(轮到走棋的一方)的角度评估局面"""
+    threats = position.threats
+    evaluator = position.evaluator
+    own = evaluator.score(color) + side_score(threats, color)
+    other = evaluator.score(3 - color) + side_score(threats, 3 - color)
+    return own * 6 // 5 - other
@@ -0,0 +1,339 @@
+# coding:utf-8
+"""蒙特卡洛树搜索(MCTS)
+
+按UCT公式选择子节点，扩展时只取排序分最高的max_branch个候选着法，
+模拟时双方优先成五、堵五和成活四，其余着法在威胁点和候选着法中随机选择，
+走满rollout_depth步后用静态评估换算成胜率，作为这次模拟的结果。
+
+根节点并行：每个工作进程独立搜索一棵树，时间到后合并各棵树根节点上的访问次数和胜场，
+选择访问次数最多的着法。搜索在进程中进行，不受GIL限制，可以用满所有CPU核心。
+进程池在多次搜索之间保留，中止信号通过进程间共享的Event传递。
+"""
+import math
+import os
+import random
+import time
+
+from gomoku.engine.alphabeta import SearchResult, WIN_SCORE
+from gomoku.engine.evaluation import evaluate
+from gomoku.engine.position import SearchPosition
+from gomoku.engine.vcf import VCFSolver
+
+# UCT公式中的探索系数
+EXPLORATION = 1.0
+
+# 静态评估换算胜率时的缩放：评分为EVAL_SCALE时胜率约为73%
+EVAL_SCALE = 300
+
+# 每模拟多少次检查一次时间和中止信号
+CHECK_INTERVAL = 16
+
+# 工作进程中的中止信号(由进程池的initializer设置)
+_worker_stop = None
+
+
+class MCTSNode:
+    """搜索树节点
+
+    move: 到达该节点的着法；color: 下出该着法的一方
+    wins: 从color角度累计的胜场(和棋或评估结果按比例计入)
+    terminal: 该着法成五时为True
+    """
+
+    __slots__ = ('move', 'color', 'parent', 'children', 'untried', 'visits', 'wins', 'terminal')
+
+    def __init__(self, move, color, parent=None, terminal=False):
+        self.move = move
+        self.color = color
+        self.parent = parent
+        self.children = []
+        self.untried = None  # 尚未扩展的着法，第一次访问时生成
+        self.visits = 0
+        self.wins = 0.0
+        self.terminal = terminal
+
+    def select(self, exploration):
+        """按UCT公式选出子节点"""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+
+class MCTSTree:
+    """一棵蒙特卡洛搜索树，在SearchPosition上反复做选择、扩展、模拟和回传"""
+
+    def __init__(self, position, color, max_branch=12, rollout_depth=8, exploration=EXPLORATION, seed=None):
+        self.position = position
+        self.root = MCTSNode(None, 3 - color)
+        self.max_branch = max_branch
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.playouts = 0
+        self.max_ply = 0
+
+    def run(self, deadline, should_stop):
+        """模拟到deadline或should_stop()为真"""
+        while True:
+            for _ in range(CHECK_INTERVAL):
+                self.playout()
+            if should_stop() or time.monotonic() > deadline:
+                break
+
+    def playout(self):
+        """一次完整的模拟，position在返回时恢复原状"""
+        position = self.position
+        node = self.root
+        path = []
+
+        # 选择：沿已完全扩展的节点下行
+        while not node.terminal and node.untried is not None and not node.untried and node.children:
+            node = node.select(self.exploration)
+            position.make(node.move[0], node.move[1], node.color)
+            path.append(node.move)
+
+        # 扩展
+        if not node.terminal:
+            if node.untried is None:
+                node.untried = self._expand_moves(3 - node.color)
+            if node.untried:
+                row, col = node.untried.pop(0)
+                color = 3 - node.color
+                terminal = (row, col) in position.threats.fives(color)
+                child = MCTSNode((row, col), color, node, terminal)
+                node.children.append(child)
+                position.make(row, col, color)
+                path.append((row, col))
+                node = child
+
+        # 模拟
+        if node.terminal:
+            result = 1.0
+        elif node.untried is not None and not node.untried and not node.children:
+            result = 0.5  # 没有可走的棋
+        else:
+            result = self._rollout(node.color)
+        self.max_ply = max(self.max_ply, len(path))
+
+        for row, col in reversed(path):
+            position.unmake(row, col)
+
+        # 回传：result是node.color一方的胜率
+        color = node.color
+        while node is not None:
+            node.visits += 1
+            node.wins += result if node.color == color else 1.0 - result
+            node = node.parent
+        self.playouts += 1
+
+    def _expand_moves(self, color):
+        """节点的候选着法：先处理成五和堵五，否则按排序分取前max_branch个"""
+        position = self.position
+        threats = position.threats
+        wins = position.legal_points(threats.fives(color), color)
+        if wins:
+            return wins[:1]
+        blocks = threats.fives(3 - color)
+        if blocks:
+            return position.legal_points(sorted(blocks), color)
+        return position.ordered_moves(color, self.max_branch)
+
+    def _rollout(self, color):
+        """color刚落子，从对方开始随机走rollout_depth步，返回color一方的胜率"""
+        position = self.position
+        threats = position.threats
+        made = []
+        to_move = 3 - color
+        result = None
+        try:
+            for _ in range(self.rollout_depth):
+                opponent = 3 - to_move
+                if position.legal_points(threats.fives(to_move), to_move):
+                    result = 1.0 if to_move == color else 0.0
+                    break
+                blocks = threats.fives(opponent)
+                if blocks:
+                    moves = position.legal_points(blocks, to_move)
+                    if len(blocks) > 1 or not moves:
+                        result = 0.0 if to_move == color else 1.0
+                        break
+                    move = moves[0]
+                elif position.legal_points(threats.open_fours(to_move), to_move):
+                    result = 1.0 if to_move == color else 0.0
+                    break
+                else:
+                    move = self._random_move(to_move)
+                    if move is None:
+                        result = 0.5
+                        break
+                position.make(move[0], move[1], to_move)
+                made.append(move)
+                to_move = opponent
+            if result is None:
+                score = evaluate(position, to_move)
+                if to_move != color:
+                    score = -score
+                result = 1.0 / (1.0 + math.exp(-score / EVAL_SCALE))
+        finally:
+            for row, col in reversed(made):
+                position.unmake(row, col)
+        return result
+
+    def _random_move(self, color):
+        """模拟中的着法：一半概率从双方的威胁点中选，否则从候选着法中选"""
+        position = self.position
+        threats = position.threats
+        rand = self.random
+        if rand.random() < 0.5:
+            cells = (threats.open_threes(color) | threats.fours(color)
+                     | threats.open_fours(3 - color) | threats.open_threes(3 - color))
+            if cells:
+                cells = sorted(cells)
+                for _ in range(3):
+                    row, col = rand.choice(cells)
+                    if position.is_legal(row, col, color):
+                        return row, col
+        cells = position.candidates()
+        for _ in range(8):
+            row, col = rand.choice(cells)
+            if position.is_legal(row, col, color):
+                return row, col
+        moves = position.legal_points(cells, color)
+        return rand.choice(moves) if moves else None
+
+    def root_stats(self):
+        """根节点各着法的(着法, 访问次数, 胜场)"""
+        return [(child.move, child.visits, child.wins) for child in self.root.children]
+
+
+def _init_worker(stop_event):
+    """工作进程初始化：保存中止信号"""
+    global _worker_stop
+    _worker_stop = stop_event
+
+
+def _search_tree(state, variant, time_limit, max_branch, rollout_depth, seed):
+    """在工作进程中搜索一棵树，返回(根节点统计, 模拟次数, 最大深度)"""
+    position = SearchPosition(state, variant)
+    tree = MCTSTree(position, state.current_player, max_branch, rollout_depth, seed=seed)
+    stop = _worker_stop.is_set if _worker_stop is not None else (lambda: False)
+    tree.run(time.monotonic() + time_limit, stop)
+    return tree.root_stats(), tree.playouts, tree.max_ply
+
+
+class MCTSEngine:
+    """根节点并行的蒙特卡洛树搜索引擎
+
+    time_limit: 每步的思考时间(秒)
+    workers: 工作进程数(即并行搜索的树数)，None表示CPU核心数；为1时在调用线程中搜索，不启动进程
+    max_branch: 每个节点最多扩展的候选着法数
+    rollout_depth: 每次模拟随机走的步数
+    """
+
+    def __init__(self, time_limit=2.0, workers=None, max_branch=12, rollout_depth=8):
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.max_branch = max_branch
+        self.rollout_depth = rollout_depth
+        self.vcf = VCFSolver()
+        self.renju = None
+        self._pool = None
+        self._pool_size = 0
+        self._stop_event = None
+        self._stopped = False
+
+    def stop(self):
+        """中止正在进行的搜索(可以从其他线程调用)，各棵树尽快返回已有的统计"""
+        self._stopped = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def reset_stop(self):
+        """清除中止标记：由调用方在启动搜索线程之前调用，
+        这样线程进入search之前发出的stop()不会丢失"""
+        self._stopped = False
+        if self._stop_event is not None:
+            self._stop_event.clear()
+
+    def close(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        """进程池，工作进程数改变时重新创建"""
+        if self._pool is None or self._pool_size != self.workers:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self.close()
+            context = multiprocessing.get_context("spawn")
+            self._stop_event = context.Event()
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._stop_event,))
+            self._pool_size = self.workers
+        return self._pool
+
+    def search(self, state, variant=None):
+        """为state的当前玩家搜索最佳着法，返回SearchResult(评分为胜率换算的分数，深度为树的最大深度)"""
+        from gomoku.core.renju import RenjuChecker
+        if self.renju is None:
+            self.renju = RenjuChecker()
+
+        start = time.monotonic()
+        position = SearchPosition(state, variant, self.renju)
+        color = state.current_player
+        threats = position.threats
+
+        # 必然的走法和连续冲四取胜不必搜索
+        wins = position.legal_points(threats.fives(color), color)
+        if wins:
+            return SearchResult(wins[0], WIN_SCORE - 1, 0, 0, time.monotonic() - start)
+        blocks = position.legal_points(sorted(threats.fives(3 - color)), color)
+        if len(blocks) == 1 or (threats.fives(3 - color) and not blocks):
+            # 堵点全是禁手时已经输了，仍随便走一步合法的棋
+            moves = blocks or position.ordered_moves(color, 1)
+            return SearchResult(moves[0] if moves else None, 0, 0, 0, time.monotonic() - start)
+        if not threats.fives(3 - color):
+            line = self.vcf.solve(position, color, should_stop=lambda: self._stopped)
+            if line:
+                return SearchResult(line[0], WIN_SCORE - len(line), 0, 0, time.monotonic() - start)
+
+        remaining = max(0.05, self.time_limit - (time.monotonic() - start))
+        variant_name = position.variant.name
+        seeds = [random.randrange(1 << 30) for _ in range(self.workers)]
+        if self.workers <= 1:
+            tree = MCTSTree(position, color, self.max_branch, self.rollout_depth, seed=seeds[0])
+            tree.run(time.monotonic() + remaining, lambda: self._stopped)
+            results = [(tree.root_stats(), tree.playouts, tree.max_ply)]
+        else:
+            pool = self._get_pool()
+            if self._stopped:
+                self._stop_event.set()
+            futures = [pool.submit(_search_tree, state, variant_name, remaining,
+                                   self.max_branch, self.rollout_depth, seed) for seed in seeds]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"MCTS工作进程失败: {str(e)}")
+
+        # 合并各棵树根节点的统计
+        visits, wins = {}, {}
+        playouts = max_ply = 0
+        for stats, count, ply in results:
+            playouts += count
+            max_ply = max(max_ply, ply)
+            for move, move_visits, move_wins in stats:
+                visits[move] = visits.get(move, 0) + move_visits
+                wins[move] = wins.get(move, 0.0) + move_wins
+        if not visits:
+            moves = position.ordered_moves(color, 1)
+            move = moves[0] if moves else None
+            return SearchResult(move, 0, 0, playouts, time.monotonic() - start)
+
+        move = max(visits, key=visits.get)
+        rate = wins[move] / visits[move]
+        score = int((rate - 0.5) * 2 * EVAL_SCALE * 10)
+        return SearchResult(move, score, max_ply, playouts, time.monotonic() - start)
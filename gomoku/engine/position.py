@@ -0,0 +1,110 @@
+# coding:utf-8
+"""搜索用的局面
+
+在私有的Board上落子和提子(make/unmake)，ThreatTracker和LineEvaluator随之增量更新，
+搜索节点可以直接读取双方的成五、活四、冲四、活三点和线上棋型分。
+局面由GameState快照建立，与界面使用的对局互不影响，可以在工作线程中使用。
+"""
+from gomoku.core.board import Board
+from gomoku.core.patterns import NONE, OPEN_THREE, FOUR, DOUBLE_FOUR, OPEN_FOUR, FIVE
+from gomoku.core.renju import RenjuChecker
+from gomoku.core.threats import ThreatTracker
+from gomoku.core.variants import get_variant
+from gomoku.engine.evaluation import LineEvaluator
+
+# 着法排序时各棋型的分值(己方形成该棋型，或在此落子可以破坏对方的该棋型)
+ORDER_WEIGHTS = {
+    NONE: 0, OPEN_THREE: 20, FOUR: 30, DOUBLE_FOUR: 100, OPEN_FOUR: 100, FIVE: 1000,
+}
+
+
+class SearchPosition:
+    """搜索局面
+
+    state: 对局状态(GameState)，只读取，不会被修改
+    variant: 规则变体
+    renju: 可选的连珠禁手判断器，未提供时新建(其缓存可以在多次搜索间复用)
+    """
+
+    def __init__(self, state, variant=None, renju=None):
+        self.variant = get_variant(variant)
+        self.board = Board.from_state(state)
+        self.size = self.board.size
+        self.threats = ThreatTracker(self.board, self.variant)
+        self.evaluator = LineEvaluator(self.board)
+        self.renju = renju if renju is not None else RenjuChecker()
+        self.ply = 0
+
+    @property
+    def hash(self):
+        """当前局面的Zobrist哈希"""
+        return self.board.hash
+
+    def make(self, row, col, color):
+        """落子"""
+        self.board.place(row, col, color)
+        self.threats.update(row, col)
+        self.evaluator.update(row, col)
+        self.ply += 1
+
+    def unmake(self, row, col):
+        """撤销落子"""
+        self.board.remove(row, col)
+        self.threats.update(row, col)
+        self.evaluator.update(row, col)
+        self.ply -= 1
+
+    def is_legal(self, row, col, color):
+        """color能否在空位(row, col)落子(黑棋不能下禁手)"""
+        if color != 1 or not self.variant.forbidden or (row, col) not in self.threats.forbidden_candidates:
+            return True
+        return not self.renju.is_forbidden(self.board, row, col)
+
+    def legal_points(self, points, color):
+        """从点集中筛选出color可以落子的点"""
+        return [cell for cell in points if self.is_legal(cell[0], cell[1], color)]
+
+    def candidates(self):
+        """已有棋子周围的所有空位(由棋盘增量维护)；空棋盘时返回天元"""
+        if not self.board.candidates:
+            center = self.size // 2
+            return [(center, center)]
+        return list(self.board.candidates)
+
+    def moves(self, color):
+        """color的候选着法，按威胁剪枝：
+        对方有合法的成活四点(即有活三)时，不应对就会输，只保留堵点和反击点：
+        对方的成活四点、冲四点，以及己方的成四点(冲四反击)；成五和堵五由调用方先行处理"""
+        threats = self.threats
+        opponent = 3 - color
+        if self.legal_points(threats.open_fours(opponent), opponent):
+            cells = (threats.open_fours(opponent) | threats.fours(opponent)
+                     | threats.open_fours(color) | threats.fours(color))
+            # 全是禁手时无法按威胁应对，退回全部候选
+            if any(self.is_legal(row, col, color) for row, col in cells):
+                return list(cells)
+        return self.candidates()
+
+    def order_score(self, row, col, color):
+        """着法排序分：己方在此形成的棋型和对方在此形成的棋型(即落子可以破坏的棋型)"""
+        threats = self.threats
+        score = 0
+        for shape in threats.shapes(color, row, col):
+            score += ORDER_WEIGHTS.get(shape, 0)
+        for shape in threats.shapes(3 - color, row, col):
+            score += ORDER_WEIGHTS.get(shape, 0) * 9 // 10
+        return score
+
+    def ordered_moves(self, color, limit=None):
+        """按排序分从高到低排列的合法候选着法(经过威胁剪枝)，limit限制返回的数量"""
+        scored = sorted(
+            ((self.order_score(row, col, color), (row, col)) for row, col in self.moves(color)),
+            reverse=True,
+        )
+        moves = []
+        for _, (row, col) in scored:
+            if self.is_legal(row, col, color):
+                moves.append((row, col))
+                if limit is not None and len(moves) >= limit:
+                    break
+        return moves
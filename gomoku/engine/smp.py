@@ -0,0 +1,200 @@
+# coding:utf-8
+"""Lazy SMP：多进程并行的Alpha-Beta搜索
+
+每个工作进程都从根节点开始做完整的迭代加深搜索，彼此之间不做任何分工，
+只通过共享内存中的置换表交换结果：一个进程搜过的局面，其他进程直接取回评分或最佳着法。
+各进程按编号错开起始深度(1到START_DEPTHS层循环)，起始深度相同的进程再从不同的根节点着法开始搜索，
+使每个进程搜索的树都不相同，更快地填充不同深度、不同分支的条目。
+时间到后取完成深度最深的结果(深度相同时取编号小的进程)，节点数为各进程之和。
+
+搜索在进程中进行，不受GIL限制；进程池和共享置换表在多次搜索之间保留。
+直接运行本模块会在一个开局局面上用1到N个进程各搜索一次，打印每秒节点数的扩展情况。
+"""
+import os
+import time
+
+from gomoku.engine.alphabeta import AlphaBetaEngine, SearchResult
+from gomoku.engine.ttable import SharedTranspositionTable, DEFAULT_SIZE_MB
+
+# 各进程起始深度的种类数：第i个进程从第1 + i % START_DEPTHS层开始，根节点着法轮转i // START_DEPTHS位
+START_DEPTHS = 3
+
+# 工作进程中的中止信号和搜索引擎(引擎连接的共享置换表按名称缓存)
+_worker_stop = None
+_worker_engine = None
+
+
+def _init_worker(stop_event):
+    """工作进程初始化：保存中止信号"""
+    global _worker_stop
+    _worker_stop = stop_event
+
+
+def _worker_search(state, variant, time_limit, max_depth, max_branch, tt_name, size_mb, generation,
+                   start_depth, root_rotation):
+    """在工作进程中搜索，返回SearchResult"""
+    global _worker_engine
+    engine = _worker_engine
+    if engine is None or engine.tt.name != tt_name:
+        if engine is not None:
+            engine.tt.release()
+        tt = SharedTranspositionTable(size_mb, name=tt_name)
+        engine = _worker_engine = AlphaBetaEngine(tt=tt)
+        engine.stop_event = _worker_stop
+    engine.time_limit = time_limit
+    engine.max_depth = max_depth
+    engine.max_branch = max_branch
+    engine.tt.generation = generation
+    return engine.search(state, variant, start_depth=start_depth, new_search=False, root_rotation=root_rotation)
+
+
+class LazySMPEngine:
+    """Lazy SMP并行搜索引擎
+
+    time_limit: 每步的思考时间(秒)
+    workers: 工作进程数，None表示CPU核心数
+    max_depth, max_branch: 同AlphaBetaEngine
+    hash_size_mb: 共享置换表的内存上限(MB)
+    """
+
+    def __init__(self, time_limit=2.0, workers=None, max_depth=10, max_branch=12, hash_size_mb=DEFAULT_SIZE_MB):
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.max_branch = max_branch
+        self.hash_size_mb = hash_size_mb
+        self.tt = None
+        self._variant = None  # 共享置换表中的条目所属的规则名称
+        self.last_results = []  # 上一次搜索各进程的SearchResult
+        self._pool = None
+        self._pool_size = 0
+        self._stop_event = None
+        self._stopped = False
+
+    def stop(self):
+        """中止正在进行的搜索(可以从其他线程调用)，各进程尽快返回已完成的结果"""
+        self._stopped = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def reset_stop(self):
+        """清除中止标记：由调用方在启动搜索线程之前调用，
+        这样线程进入search之前发出的stop()不会丢失"""
+        self._stopped = False
+        if self._stop_event is not None:
+            self._stop_event.clear()
+
+    def close(self):
+        """关闭进程池并释放共享置换表(创建者删除共享内存，否则会一直留在/dev/shm中)"""
+        try:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+        finally:
+            if self.tt is not None:
+                self.tt.release()
+                self.tt = None
+
+    def _prepare(self):
+        """按当前设置准备进程池和共享置换表"""
+        if self._pool is None or self._pool_size != self.workers:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+            context = multiprocessing.get_context("spawn")
+            self._stop_event = context.Event()
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._stop_event,))
+            self._pool_size = self.workers
+        if self.tt is None:
+            self.tt = SharedTranspositionTable(self.hash_size_mb)
+        elif self.tt.size_mb != self.hash_size_mb:
+            self.tt.resize(self.hash_size_mb)
+
+    @property
+    def nps(self):
+        """上一次搜索的每秒节点数(各进程之和)"""
+        return sum(result.nodes / result.elapsed for result in self.last_results if result.elapsed > 0)
+
+    def search(self, state, variant=None):
+        """为state的当前玩家搜索最佳着法，返回SearchResult"""
+        from gomoku.core.variants import get_variant
+        start = time.monotonic()
+        self._prepare()
+        if self._stopped:
+            self._stop_event.set()
+        variant_name = get_variant(variant).name
+        # 置换表只以局面哈希为键，换规则时清空
+        if variant_name != self._variant:
+            self.tt.clear()
+            self._variant = variant_name
+        self.tt.new_search()
+        remaining = max(0.05, self.time_limit - (time.monotonic() - start))
+        futures = [
+            self._pool.submit(_worker_search, state, variant_name, remaining, self.max_depth, self.max_branch,
+                              self.tt.name, self.tt.size_mb, self.tt.generation,
+                              1 + index % START_DEPTHS, index // START_DEPTHS)
+            for index in range(self.workers)
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"并行搜索工作进程失败: {str(e)}")
+        self.last_results = results
+        if not results:
+            return SearchResult(None, 0, 0, 0, time.monotonic() - start)
+
+        best = results[0]
+        for result in results[1:]:
+            if result.move is not None and (best.move is None or result.depth > best.depth):
+                best = result
+        nodes = sum(result.nodes for result in results)
+        return SearchResult(best.move, best.score, best.depth, nodes, time.monotonic() - start)
+
+
+def scaling_report(state, variant=None, worker_counts=None, time_limit=5.0, **kwargs):
+    """用不同的进程数各搜索一次state，返回[(进程数, 完成深度, 节点数, 每秒节点数, 相对单进程的倍数)]
+    每次都使用新的引擎和空的置换表；worker_counts默认为1、2、4……直到CPU核心数"""
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cores:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cores:
+            worker_counts.append(cores)
+
+    rows = []
+    base = None
+    for count in worker_counts:
+        engine = LazySMPEngine(time_limit=time_limit, workers=count, **kwargs)
+        try:
+            # 第一次搜索包含进程启动的时间，只用来预热
+            engine.time_limit = 0.1
+            engine.search(state, variant)
+            engine.tt.clear()
+            engine.time_limit = time_limit
+            result = engine.search(state, variant)
+            nps = engine.nps
+        finally:
+            engine.close()
+        base = base or nps
+        rows.append((count, result.depth, result.nodes, nps, nps / base if base else 0.0))
+    return rows
+
+
+if __name__ == "__main__":
+    from gomoku.core.state import GameState
+
+    opening = [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (8, 6)]
+    state = GameState(15)
+    state.reset(start_immediately=True)
+    for row, col in opening:
+        state.place(row, col, state.current_player)
+        state.current_player = 3 - state.current_player
+
+    print("进程数  深度  节点数  每秒节点数  倍数")
+    for count, depth, nodes, nps, speedup in scaling_report(state):
+        print(f"{count:>6}  {depth:>4}  {nodes:>6}  {nps:>10.0f}  {speedup:>4.2f}")
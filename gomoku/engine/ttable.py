@@ -0,0 +1,194 @@
+# coding:utf-8
+"""置换表
+
+以64位Zobrist哈希为键，保存搜索过的局面的深度、评分类型、评分和最佳着法。
+表的大小固定(按内存上限换算成桶数，取2的幂)，每个桶有两个槽位：
+第一个槽位深度优先(只被更深的结果或旧一轮搜索留下的条目替换)，第二个槽位总是替换。
+条目用array('Q')紧凑保存，每个槽位两个64位整数：哈希与数据的异或值和打包后的数据，
+读取时用两者的异或还原出完整哈希再比较，不同局面落在同一个桶里不会被误用；
+多个进程不加锁地同时读写共享内存中的表时，只写了一半的条目也会因为校验不一致而被忽略。
+五子棋的轮次由双方棋子数决定，局面哈希中不需要再编码走棋方。
+"""
+from array import array
+
+# 评分类型
+EXACT = 1  # 精确值
+LOWER = 2  # 下界(发生了beta剪枝)
+UPPER = 3  # 上界(所有着法都没有超过alpha)
+
+# 数据字段的位置：评分32位(加偏移后存为无符号数)、深度8位、类型2位、着法16位、搜索轮次6位
+SCORE_BITS = 32
+SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+DEPTH_SHIFT = 32
+FLAG_SHIFT = 40
+MOVE_SHIFT = 42
+GENERATION_SHIFT = 58
+
+# 每个桶占用的字节数：两个槽位 × (校验 + 数据) × 8字节
+BUCKET_BYTES = 32
+
+# 默认内存上限(MB)
+DEFAULT_SIZE_MB = 64
+
+
+def bucket_count(size_mb):
+    """内存上限对应的桶数(不超过上限的最大2的幂，至少1个)"""
+    count = max(1, size_mb * 1024 * 1024 // BUCKET_BYTES)
+    return 1 << (count.bit_length() - 1)
+
+
+class TranspositionTable:
+    """固定大小的置换表
+
+    size_mb: 内存上限(MB)
+    着法以点编号加一保存(0表示没有着法)，由调用方负责与(row, col)换算。
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """按新的内存上限重新分配(清空所有条目)"""
+        self.size_mb = size_mb
+        self.buckets = bucket_count(size_mb)
+        self.mask = self.buckets - 1
+        self._allocate()
+        self.generation = 0
+        self.reset_stats()
+
+    def _allocate(self):
+        """分配清零的条目数组"""
+        self.table = array('Q', [0]) * (self.buckets * 4)
+
+    def clear(self):
+        """清空所有条目和统计"""
+        self._allocate()
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清零统计计数"""
+        self.probes = 0      # 查询次数
+        self.hits = 0        # 命中次数
+        self.stores = 0      # 写入次数
+        self.collisions = 0  # 写入时覆盖了其他局面的条目的次数
+
+    def new_search(self):
+        """开始新一轮搜索：旧一轮的条目在深度优先槽位中可以被替换"""
+        self.generation = (self.generation + 1) & 63
+
+    @property
+    def hit_rate(self):
+        """命中率"""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        """统计信息"""
+        return {
+            "size_mb": self.size_mb,
+            "buckets": self.buckets,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "collisions": self.collisions,
+        }
+
+    def probe(self, key):
+        """查询局面，命中时返回(深度, 类型, 评分, 着法)，否则返回None"""
+        self.probes += 1
+        table = self.table
+        index = (key & self.mask) * 4
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                self.hits += 1
+                return (
+                    data >> DEPTH_SHIFT & 0xFF,
+                    data >> FLAG_SHIFT & 0x3,
+                    (data & 0xFFFFFFFF) - SCORE_OFFSET,
+                    data >> MOVE_SHIFT & 0xFFFF,
+                )
+        return None
+
+    def store(self, key, depth, flag, score, move=0):
+        """保存局面的搜索结果(depth为剩余深度，负数按0保存)"""
+        self.stores += 1
+        table = self.table
+        index = (key & self.mask) * 4
+        data = (
+            (score + SCORE_OFFSET)
+            | max(0, min(depth, 0xFF)) << DEPTH_SHIFT
+            | flag << FLAG_SHIFT
+            | (move & 0xFFFF) << MOVE_SHIFT
+            | self.generation << GENERATION_SHIFT
+        )
+
+        # 深度优先槽位：空位、同一局面、更深的结果或旧一轮的条目才替换，
+        # 被替换的其他局面降到总是替换槽位；否则直接写入总是替换槽位
+        old = table[index + 1]
+        old_key = table[index] ^ old
+        if (not old or old_key == key or depth >= (old >> DEPTH_SHIFT & 0xFF)
+                or old >> GENERATION_SHIFT != self.generation):
+            if old and old_key != key:
+                self._write(index + 2, old_key, old, key)
+            table[index] = key ^ data
+            table[index + 1] = data
+        else:
+            self._write(index + 2, key, data, key)
+
+    def _write(self, slot, key, data, new_key):
+        """写入总是替换槽位，丢弃的条目不属于new_key对应的局面时计为一次冲突"""
+        table = self.table
+        old = table[slot + 1]
+        if old and table[slot] ^ old not in (key, new_key):
+            self.collisions += 1
+        table[slot] = key ^ data
+        table[slot + 1] = data
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """保存在共享内存(multiprocessing.shared_memory)中的置换表，供多个进程同时使用
+
+    name: 为None时新建共享内存(创建者负责在release时删除)，否则按名称连接已有的共享内存，
+    连接方的size_mb必须与创建者相同。
+    读写不加锁，靠条目的异或校验丢弃被并发写坏的条目；统计计数只是本进程的。
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, name=None):
+        self.name = name
+        self.owner = name is None
+        self.shm = None
+        self.table = None
+        super().__init__(size_mb)
+
+    def _allocate(self):
+        from multiprocessing import shared_memory
+        nbytes = self.buckets * BUCKET_BYTES
+        if self.owner:
+            self.release()
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.name = self.shm.name
+        elif self.shm is None:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        else:
+            raise ValueError("连接方不能改变共享置换表的大小")
+        self.table = self.shm.buf[:nbytes].cast('Q')
+
+    def clear(self):
+        """清空所有条目和统计(就地清零，其他进程的连接仍然有效)"""
+        nbytes = self.buckets * BUCKET_BYTES
+        self.shm.buf[:nbytes] = bytes(nbytes)
+        self.generation = 0
+        self.reset_stats()
+
+    def release(self):
+        """断开共享内存，创建者同时删除它"""
+        if self.shm is None:
+            return
+        self.table.release()
+        self.table = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
@@ -0,0 +1,131 @@
+# coding:utf-8
+"""连续冲四取胜(VCF)求解
+
+进攻方每一步都必须成四(冲四或活四)，防守方只能去堵唯一的成五点，
+因此每层只需展开进攻方的成四点，防守方没有选择，搜索空间很小，通常几毫秒就能得出结论。
+成四点和成五点直接取自威胁表(相当于按棋型判断的活四、冲四)：
+进攻方落子后有两个以上成五点(活四或四四)即获胜；防守方能先成五、或堵点之后反成四时本线失败。
+连珠规则下防守方黑棋的堵点是禁手时，进攻方同样获胜。
+
+求解结果按(局面哈希, 进攻方, 规则名称)缓存(同一局面在不同规则下的结论不同)：找到的取胜序列直接保存；
+未找到的记录已经搜索过的深度，只有要求更深的搜索时才重新计算。
+"""
+from gomoku.engine.position import SearchPosition
+
+# 默认最大进攻步数
+DEFAULT_MAX_DEPTH = 16
+
+
+class VCFSolver:
+    """连续冲四求解器
+
+    max_depth: 最多连续冲四的步数
+    max_nodes: 每次求解最多展开的节点数(超过后按无解处理，结果不写入缓存)
+    max_entries: 缓存的最大条目数，超过后清空
+    缓存的读写都是单次字典操作，多个线程共用一个求解器时不需要加锁(统计计数为近似值)。
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=20000, max_entries=200000):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.cache = {}
+        self.hits = 0
+        self.nodes = 0
+        self._should_stop = None
+
+    def clear(self):
+        """清空缓存"""
+        self.cache = {}
+
+    def solve_state(self, state, variant=None, renju=None):
+        """state的当前玩家是否有连续冲四取胜，返回取胜序列或None
+        序列为主要变化中双方交替的着法，第一步是进攻方应下的位置，最后一步是进攻方的成五点"""
+        position = SearchPosition(state, variant, renju)
+        return self.solve(position, state.current_player)
+
+    def solve(self, position, color, max_depth=None, should_stop=None):
+        """color(轮到走棋)在position中是否有连续冲四取胜，返回取胜序列或None
+        should_stop: 可选的中止检查函数，返回真时按节点数用完处理
+        position在返回时恢复原状"""
+        depth = self.max_depth if max_depth is None else max_depth
+        budget = [self.max_nodes]
+        self._should_stop = should_stop
+        line = self._search(position, color, depth, budget)
+        return list(line) if line is not None else None
+
+    def _search(self, position, color, depth, budget):
+        threats = position.threats
+        opponent = 3 - color
+
+        wins = position.legal_points(threats.fives(color), color)
+        if wins:
+            return (wins[0],)
+        # 对方已有成五点时，只冲四不堵必败
+        if threats.fives(opponent) or depth <= 0:
+            return None
+
+        key = (position.hash, color, position.variant.name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if isinstance(cached, tuple):
+                self.hits += 1
+                return cached
+            if cached >= depth:
+                self.hits += 1
+                return None
+
+        # 先试成活四的点，再按排序分试冲四点
+        attacks = position.legal_points(threats.open_fours(color), color)
+        attacks += sorted(position.legal_points(threats.fours(color) - threats.open_fours(color), color),
+                          key=lambda cell: -position.order_score(cell[0], cell[1], color))
+
+        result = None
+        for row, col in attacks:
+            budget[0] -= 1
+            self.nodes += 1
+            if budget[0] >= 0 and self._should_stop is not None and budget[0] % 64 == 0 and self._should_stop():
+                budget[0] = -1
+            if budget[0] < 0:
+                break
+            position.make(row, col, color)
+            try:
+                line = self._defend(position, color, depth, budget)
+            finally:
+                position.unmake(row, col)
+            if line is not None:
+                result = ((row, col),) + line
+                break
+
+        # 节点数用完时的失败不可靠，不写入缓存
+        if result is not None or budget[0] >= 0:
+            if len(self.cache) >= self.max_entries:
+                self.cache = {}
+            self.cache[key] = result if result is not None else depth
+        return result
+
+    def _defend(self, position, color, depth, budget):
+        """进攻方刚成四，防守方应对，返回之后的取胜序列或None"""
+        threats = position.threats
+        opponent = 3 - color
+        fives = threats.fives(color)
+        if len(fives) >= 2:
+            # 活四或四四：堵住一个，进攻方在另一个成五
+            block, win = sorted(fives)[:2]
+            return (block, win)
+        if not fives:
+            return None
+        if position.legal_points(threats.fives(opponent), opponent):
+            return None
+
+        block = next(iter(fives))
+        if not position.is_legal(block[0], block[1], opponent):
+            # 防守方的堵点是禁手，进攻方下一步在此成五(防守方的着法不计入序列)
+            return (block,)
+
+        position.make(block[0], block[1], opponent)
+        try:
+            line = self._search(position, color, depth - 1, budget)
+        finally:
+            position.unmake(block[0], block[1])
+        return (block,) + line if line is not None else None
@@ -0,0 +1,272 @@
+# coding:utf-8
+"""连续进攻取胜(VCT)求解：证明数搜索
+
+进攻方每一步都必须形成威胁(成五、成四或活三)，防守方只考虑有效的应对：
+堵成五点；面对活三时，占进攻方的成活四点、成四点，或者自己冲四反击。
+进攻方的节点是"或"节点(任一着法取胜即可)，防守方的节点是"与"节点(所有应对都要被击败)。
+
+使用深度优先的证明数搜索(df-pn)：每个节点保存证明数和反证数，
+总是沿最有希望被证明或反证的子节点深入，阈值超出时返回上层。
+证明数表以(局面哈希, 进攻方, 规则名称)为键，经不同着法顺序到达的同一局面共用一个条目，
+不会被重复展开(局面图是有向无环图而不是树)。条目同时记录展开时剩余的进攻步数：
+证明在任何深度下都成立，反证(包括因步数用完得出的反证)只对不超过该步数的搜索有效，
+更深的搜索遇到较浅的反证时把它当作未展开的节点重新计算。
+搜索受节点数和时间限制，达到限制时返回"未知"。
+"""
+import time
+from collections import namedtuple
+
+from gomoku.engine.position import SearchPosition
+
+# 无穷大的证明数/反证数
+INF = 10 ** 9
+
+# proven: True表示找到取胜序列，False表示没有(在深度和宽度限制内)，None表示达到节点或时间限制；
+# line: 取胜的主要变化(双方交替的着法)；nodes: 展开的节点数；elapsed: 用时(秒)
+VCTResult = namedtuple('VCTResult', ['proven', 'line', 'nodes', 'elapsed'])
+
+
+class VCTLimit(Exception):
+    """达到节点数或时间限制，或被中止"""
+
+
+class VCTSolver:
+    """连续进攻求解器
+
+    max_depth: 进攻方最多连续进攻的步数
+    max_nodes: 每次求解最多展开的节点数
+    time_limit: 每次求解的时间上限(秒)
+    max_branch: 进攻方每步最多尝试的威胁着法数
+    max_entries: 证明数表的最大条目数，超过后清空
+    """
+
+    def __init__(self, max_depth=10, max_nodes=200000, time_limit=10.0, max_branch=20, max_entries=1000000):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.max_branch = max_branch
+        self.max_entries = max_entries
+        self.table = {}
+        self.nodes = 0
+        self._stopped = False
+
+    def clear(self):
+        """清空证明数表"""
+        self.table = {}
+
+    def stop(self):
+        """中止正在进行的求解(可以从其他线程调用)"""
+        self._stopped = True
+
+    def reset_stop(self):
+        """清除中止标记：由调用方在提交求解任务之前调用，
+        这样任务开始之前发出的stop()不会丢失"""
+        self._stopped = False
+
+    def solve_state(self, state, variant=None, renju=None):
+        """求解state的当前玩家能否连续进攻取胜，返回VCTResult"""
+        return self.solve(SearchPosition(state, variant, renju), state.current_player)
+
+    def solve(self, position, color):
+        """求解color(轮到走棋)在position中能否连续进攻取胜，返回VCTResult；position在返回时恢复原状"""
+        start = time.monotonic()
+        self._deadline = start + self.time_limit
+        self.nodes = 0
+        self.attacker = color
+        self.variant_name = position.variant.name
+        if len(self.table) >= self.max_entries:
+            self.table = {}
+
+        try:
+            self._mid(position, True, self.max_depth, INF, INF)
+        except VCTLimit:
+            pass
+
+        pn, dn = self._lookup((position.hash, color, self.variant_name), self.max_depth)
+        if pn == 0:
+            proven = True
+        elif dn == 0:
+            proven = False
+        else:
+            proven = None
+        line = self._principal_line(position, self.max_depth) if proven else []
+        return VCTResult(proven, line, self.nodes, time.monotonic() - start)
+
+    def _lookup(self, key, depth):
+        """读取节点的(证明数, 反证数)；未展开的节点和剩余步数不足depth时得出的反证都按(1, 1)处理"""
+        entry = self.table.get(key)
+        if entry is None or (entry[1] == 0 and entry[2] < depth):
+            return 1, 1
+        return entry[0], entry[1]
+
+    def _children(self, position, attacking, depth):
+        """生成子节点着法；叶节点返回(证明数, 反证数)"""
+        threats = position.threats
+        attacker = self.attacker
+        defender = 3 - attacker
+
+        if attacking:
+            if position.legal_points(threats.fives(attacker), attacker):
+                return 0, INF
+            blocks = threats.fives(defender)
+            if blocks:
+                # 必须先堵对方的四，堵点本身还要形成威胁才能保持先手
+                if len(blocks) > 1:
+                    return INF, 0
+                block = next(iter(blocks))
+                keeps = (block in threats.open_threes(attacker) or block in threats.open_fours(attacker)
+                         or block in threats.fours(attacker))
+                if depth <= 0 or not keeps or not position.is_legal(block[0], block[1], attacker):
+                    return INF, 0
+                return [block]
+            if depth <= 0:
+                return INF, 0
+            cells = (threats.open_fours(attacker) | threats.fours(attacker)
+                     | threats.open_threes(attacker))
+            ordered = sorted(cells, key=lambda cell: -position.order_score(cell[0], cell[1], attacker))
+            moves = []
+            for row, col in ordered:
+                if position.is_legal(row, col, attacker):
+                    moves.append((row, col))
+                    if len(moves) >= self.max_branch:
+                        break
+            return moves if moves else (INF, 0)
+
+        # 防守方：能成五则进攻失败
+        if position.legal_points(threats.fives(defender), defender):
+            return INF, 0
+        fives = threats.fives(attacker)
+        if len(fives) >= 2:
+            return 0, INF
+        if fives:
+            block = next(iter(fives))
+            if not position.is_legal(block[0], block[1], defender):
+                return 0, INF
+            return [block]
+        # 进攻方的活三：没有合法的成活四点说明并不构成威胁
+        if not position.legal_points(threats.open_fours(attacker), attacker):
+            return INF, 0
+        cells = (threats.open_fours(attacker) | threats.fours(attacker)
+                 | threats.fours(defender) | threats.open_fours(defender))
+        moves = position.legal_points(sorted(cells), defender)
+        return moves if moves else (0, INF)
+
+    def _mid(self, position, attacking, depth, pn_threshold, dn_threshold):
+        """df-pn的多重迭代加深：展开节点直到其证明数或反证数超出阈值"""
+        self.nodes += 1
+        if self.nodes > self.max_nodes or self._stopped or (
+                self.nodes % 256 == 0 and time.monotonic() > self._deadline):
+            raise VCTLimit()
+
+        key = (position.hash, self.attacker, self.variant_name)
+        children = self._children(position, attacking, depth)
+        if isinstance(children, tuple):
+            self.table[key] = children + (depth,)
+            return
+
+        color = self.attacker if attacking else 3 - self.attacker
+        keys = position.board.zobrist[color]
+        size = position.size
+        child_depth = depth - 1 if attacking else depth
+        child_keys = [(position.hash ^ keys[row * size + col], self.attacker, self.variant_name)
+                      for row, col in children]
+
+        table = self.table
+        lookup = self._lookup
+        while True:
+            # 从表中读取子节点的证明数和反证数(未展开的子节点为(1, 1))
+            values = [lookup(child, child_depth) for child in child_keys]
+            if attacking:
+                pn = min(value[0] for value in values)
+                dn = min(INF, sum(value[1] for value in values))
+                best, second = _two_smallest([value[0] for value in values])
+            else:
+                pn = min(INF, sum(value[0] for value in values))
+                dn = min(value[1] for value in values)
+                best, second = _two_smallest([value[1] for value in values])
+            table[key] = (pn, dn, depth)
+            if pn >= pn_threshold or dn >= dn_threshold:
+                return
+
+            child_pn, child_dn = values[best]
+            if attacking:
+                child_pn_threshold = min(pn_threshold, second + 1)
+                child_dn_threshold = min(INF, dn_threshold - dn + child_dn)
+            else:
+                child_pn_threshold = min(INF, pn_threshold - pn + child_pn)
+                child_dn_threshold = min(dn_threshold, second + 1)
+
+            row, col = children[best]
+            position.make(row, col, color)
+            try:
+                self._mid(position, not attacking, child_depth, child_pn_threshold, child_dn_threshold)
+            finally:
+                position.unmake(row, col)
+
+    def _principal_line(self, position, depth):
+        """沿证明数为0的子节点取出取胜的主要变化"""
+        line = []
+        made = []
+        attacking = True
+        try:
+            for _ in range(2 * depth + 2):
+                children = self._children(position, attacking, depth)
+                if isinstance(children, tuple):
+                    if children[0] == 0:
+                        line.extend(self._finish(position, attacking, made))
+                    break
+                color = self.attacker if attacking else 3 - self.attacker
+                keys = position.board.zobrist[color]
+                move = None
+                for row, col in children:
+                    child = (position.hash ^ keys[row * position.size + col], self.attacker, self.variant_name)
+                    if self.table.get(child, (1, 1))[0] == 0:
+                        move = (row, col)
+                        break
+                if move is None:
+                    break
+                line.append(move)
+                position.make(move[0], move[1], color)
+                made.append(move)
+                if attacking:
+                    depth -= 1
+                attacking = not attacking
+        finally:
+            for row, col in reversed(made):
+                position.unmake(row, col)
+        return line
+
+    def _finish(self, position, attacking, made):
+        """已证明的叶节点之后的收尾着法，使主要变化可以逐步落子直到成五：
+        防守方先走一步合法的棋(能堵则堵，堵点都是禁手时随便走一步)，
+        进攻方有成五点时成五，否则先成活四；落下的着法记入made，由调用方撤销"""
+        attacker, defender = self.attacker, 3 - self.attacker
+        threats = position.threats
+        line = []
+        for _ in range(4):
+            if attacking:
+                moves = position.legal_points(sorted(threats.fives(attacker)), attacker)
+                if moves:
+                    line.append(moves[0])
+                    break
+                moves = position.legal_points(sorted(threats.open_fours(attacker)), attacker)
+                color = attacker
+            else:
+                moves = (position.legal_points(sorted(threats.fives(attacker)), defender)
+                         or position.ordered_moves(defender, 1))
+                color = defender
+            if not moves:
+                break
+            row, col = moves[0]
+            line.append((row, col))
+            position.make(row, col, color)
+            made.append((row, col))
+            attacking = not attacking
+        return line
+
+
+def _two_smallest(values):
+    """最小值的下标和次小值"""
+    best = min(range(len(values)), key=values.__getitem__)
+    second = min((value for i, value in enumerate(values) if i != best), default=INF)
+    return best, second
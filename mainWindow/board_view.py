@@ -1,5 +1,5 @@
 # coding:utf-8
-from PyQt5.QtCore import Qt, QRect, QPoint, QSize, pyqtSignal
+from PyQt5.QtCore import Qt, QRect, QPoint, QSize, QThreadPool, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont, QPainter, QPen, QBrush, QColor, QPaintEvent
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QApplication, QSizePolicy, QFrame, QFileDialog, QMessageBox, QScrollArea
 import sys
@@ -7,19 +7,44 @@ import os
 import json
 import datetime
 
-from qfluentwidgets import FluentIcon as FIF, PushButton, ComboBox, isDarkTheme, InfoBar, InfoBarPosition
+from qfluentwidgets import FluentIcon as FIF, PushButton, ComboBox, CheckBox, isDarkTheme, InfoBar, InfoBarPosition
 from qframelesswindow import FramelessWindow
 
 # 修改导入历史记录管理器
 from mainWindow.game_history_manager import GameHistoryManager
+from gomoku.core import Game, VARIANTS, MOVE_FORBIDDEN, MOVE_INVALID, MOVE_WIN
+from gomoku.core.board import BOARD_SIZES, star_points
+from gomoku.core.serialization import game_to_dict, load_game_dict, data_board_size
+from gomoku.core import patterns
+from gomoku.core.cache import LRUCache
+from gomoku.engine import AlphaBetaEngine, MCTSEngine, SearchPosition
+from gomoku.engine.smp import LazySMPEngine
+from mainWindow.config import cfg
+from gomoku.engine.vcf import VCFSolver
+from gomoku.engine.vct import VCTSolver
+from mainWindow.workers import ForbiddenTask, EngineThread, VCFTask, AnalysisTask
+
+
+def _game_property(name, doc):
+    """把棋盘组件上的状态属性转发到对局对象，保持原有的访问方式"""
+    def getter(self):
+        return getattr(self.game, name)
+
+    def setter(self, value):
+        setattr(self.game, name, value)
+
+    return property(getter, setter, doc=doc)
 
 
 class GoBoardWidget(QWidget):
-    """15x15的五子棋棋盘组件"""
+    """五子棋棋盘组件(15/19/20路) - 只负责绘制和交互，规则和对局状态由gomoku.core.Game处理"""
     
     # 添加玩家变更信号
     playerChanged = pyqtSignal(int)  # 当前玩家变更信号，参数为玩家ID(1为黑棋，2为白棋)
     gameStatusChanged = pyqtSignal(bool, int)  # 游戏状态变更信号(是否结束，胜者ID)
+    forcedWinChanged = pyqtSignal(int, object)  # 必胜提示变更信号(有连续冲四取胜的一方，0表示没有；取胜序列)
+    
+    MIN_CELL_SIZE = 24  # 最小格子大小
     
     # 棋盘样式 - 背景颜色
     BOARD_STYLES = {
@@ -30,11 +55,17 @@ class GoBoardWidget(QWidget):
         "暗黑模式": {"background": QColor("#2D2D2D"), "line": QColor("#FFFFFF")}
     }
     
-    def __init__(self, parent=None, style_index=0):
+    # 对局状态，转发到self.game
+    current_player = _game_property('current_player', "当前轮到谁下棋 - 1表示黑棋，2表示白棋")
+    game_started = _game_property('game_started', "游戏是否已开始 - 只有游戏开始后才能下棋")
+    game_over = _game_property('game_over', "游戏是否已结束")
+    winner = _game_property('winner', "胜者 - 0表示无胜者，1表示黑棋胜，2表示白棋胜")
+    
+    def __init__(self, parent=None, style_index=0, board_size=15):
         super().__init__(parent)
         
         # 棋盘属性 - 增加基础尺寸
-        self.board_size = 15  # 15x15的棋盘
+        self.board_size = board_size  # 棋盘路数
         self.base_cell_size = 40  # 基础格子大小，实际大小会根据组件尺寸自动计算
         self.base_padding = 25  # 基础边距，实际边距会根据组件尺寸自动计算
         self.base_stone_size = 36  # 基础棋子大小，实际大小会根据组件尺寸自动计算
@@ -44,33 +75,100 @@ class GoBoardWidget(QWidget):
         # 确保style_index在有效范围内
         self.current_style = style_names[min(style_index, len(style_names)-1)]
         
-        # 棋盘数据 - 0表示空，1表示黑棋，2表示白棋
-        self.board_data = [[0 for _ in range(self.board_size)] for _ in range(self.board_size)]
-        
-        # 棋步记录
-        self.move_history = []
+        # 对局(棋盘、棋步和规则)，禁手表由对局随落子、悔棋和重做增量维护
+        self.game = Game(self.board_size)
         
-        # 添加禁手位置列表
+        # 添加禁手位置列表 - 当前需要绘制的禁手标记
         self.forbidden_positions = []
+        # 对局没有维护禁手表时改由后台线程计算，结果按局面哈希缓存
+        self.forbidden_cache = LRUCache(512)
+        self._pending_forbidden = set()  # 正在后台计算的局面
+        
+        # 必胜提示 - 当前玩家能否连续冲四取胜，结果按局面缓存，在后台线程中求解
+        self.show_forced_win = False
+        self.forced_win = None  # 当前局面的取胜序列
+        self.vcf_solver = VCFSolver()
+        self.forced_win_cache = LRUCache(256)
+        self._pending_vcf = set()
+        self.analysis = None  # 局面分析结果(局面键, 取胜序列)，只在同一局面下显示
+        
+        # 是否接受鼠标落子(AI回合由BoardWidget关闭)
+        self.input_enabled = True
+        
+        # 威胁点显示 - 按局面哈希缓存扫描结果，避免每次重绘都整盘扫描
+        self.show_threats = False
+        self._threat_cache = None
         
         # 设置组件最小大小
-        min_board_width = self.board_size * self.base_cell_size + 2 * self.base_padding
-        self.setMinimumSize(min_board_width, min_board_width)
+        self.update_minimum_size()
         
         # 设置大小策略为扩展，允许组件随窗口调整而放大
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
-        # 当前轮到谁下棋 - 1表示黑棋，2表示白棋
-        self.current_player = 1
-        
-        # 游戏状态标志 - 只有游戏开始后才能下棋
-        self.game_started = False
-        self.game_over = False
-        self.winner = 0  # 0表示无胜者，1表示黑棋胜，2表示白棋胜
-        
         # 设置组件接受鼠标点击
         self.setMouseTracking(True)
     
+    @property
+    def board_data(self):
+        """棋盘数据(二维列表) - 0表示空，1表示黑棋，2表示白棋"""
+        return self.game.board.grid
+    
+    @board_data.setter
+    def board_data(self, value):
+        self.game.load_position(value)
+    
+    @property
+    def move_history(self):
+        """棋步记录"""
+        return self.game.history
+    
+    @move_history.setter
+    def move_history(self, value):
+        self.game.load_position(self.game.state.to_rows(), value)
+    
+    @property
+    def position_hash(self):
+        """当前局面的64位Zobrist哈希，可作为缓存和去重的键"""
+        return self.game.position_hash
+    
+    def update_minimum_size(self):
+        """根据棋盘路数设置组件最小大小
+        路数更多时缩小最小格子，使最小尺寸与15路棋盘相同，不会撑破主窗口的布局"""
+        cell_size = max(self.MIN_CELL_SIZE, self.base_cell_size * 15 // self.board_size)
+        min_board_width = self.board_size * cell_size + 2 * self.base_padding
+        self.setMinimumSize(min_board_width, min_board_width)
+    
+    def set_board_size(self, size):
+        """更改棋盘路数，会新建一局空的对局；不支持的尺寸返回False"""
+        if size not in BOARD_SIZES:
+            return False
+        if size != self.board_size:
+            self.board_size = size
+            self.game = Game(size, variant=self.game.variant)
+            self.forbidden_positions = []
+            self.forbidden_cache.clear()
+            self.forced_win_cache.clear()
+            self._threat_cache = None
+            self.update_minimum_size()
+            self.update()
+        return True
+    
+    def set_variant(self, name):
+        """更改规则变体(如"renju"、"freestyle")，未知规则返回False"""
+        if name not in VARIANTS:
+            return False
+        if name != self.game.variant.name:
+            self.game.set_variant(name)
+            self._threat_cache = None
+            self.refresh_forbidden_positions()
+            self.refresh_forced_win()
+            self.update()
+        return True
+    
+    def forbidden_key(self):
+        """禁手缓存的键：棋盘尺寸、规则和局面哈希"""
+        return (self.board_size, self.game.variant.name, self.position_hash)
+    
     def set_style(self, style_index):
         """设置棋盘风格"""
         style_names = list(self.BOARD_STYLES.keys())
@@ -80,82 +178,174 @@ class GoBoardWidget(QWidget):
             return True
         return False
     
+    def set_show_threats(self, enabled):
+        """设置是否显示双方的威胁点(活三、冲四、活四、成五点)"""
+        self.show_threats = enabled
+        self.update()
+    
+    def get_threats(self):
+        """获取双方的威胁点{颜色: {(row, col): 棋型}}，同一局面只扫描一次"""
+        key = (self.game.variant.name, self.position_hash)
+        if self._threat_cache is None or self._threat_cache[0] != key:
+            self._threat_cache = (key, {color: self.game.find_threats(color) for color in (1, 2)})
+        return self._threat_cache[1]
+    
     def get_style_names(self):
         """获取所有棋盘风格名称"""
         return list(self.BOARD_STYLES.keys())
     
     def reset_game(self, start_immediately=True):
         """重置游戏状态"""
-        self.board_data = [[0 for _ in range(self.board_size)] for _ in range(self.board_size)]
-        self.current_player = 1  # 黑棋先行
+        # 黑棋先行，根据参数决定游戏是否立即开始，同时重新计算禁手
+        self.game.reset(start_immediately)
         # 发出玩家变更信号
         self.playerChanged.emit(self.current_player)
         print(f"重置游戏时发出玩家变更信号：当前玩家 -> {self.current_player}")
-        self.game_started = start_immediately  # 根据参数决定游戏是否立即开始
-        self.move_history = []  # 清空历史记录
-        self.game_over = False  # 游戏未结束
-        self.winner = 0  # 无胜者
         
-        # 清空禁手位置
-        self.forbidden_positions = []
-        
-        # 如果开始是黑棋回合，检测禁手
-        if start_immediately and self.current_player == 1:
-            self.update_forbidden_positions()
-            
+        self.refresh_forbidden_positions()
+        self.refresh_forced_win()
+        self.update()
+    
+    def load_game(self, game_data):
+        """加载历史记录中的对局数据，缺少字段时抛出KeyError"""
+        # 棋盘尺寸与记录不一致时先切换尺寸
+        self.set_board_size(data_board_size(game_data))
+        load_game_dict(self.game, game_data)
+        self.refresh_forbidden_positions()
+        self.refresh_forced_win()
         self.update()
     
     def update_forbidden_positions(self):
-        """更新所有禁手位置"""
+        """丢弃当前局面的结果，重新计算禁手位置"""
+        if self.game.forbidden is not None:
+            self.game.forbidden.rebuild()
+        self.forbidden_cache.invalidate(self.forbidden_key())
+        self.refresh_forbidden_positions()
+    
+    def refresh_forbidden_positions(self):
+        """根据当前回合刷新需要显示的禁手位置
+        对局维护着禁手表时直接读取(每步只按增量更新)；否则缓存中有当前局面的结果时立即显示，
+        没有时交给后台线程计算，结果到达后再绘制"""
+        if not self.game.shows_forbidden():
+            self.forbidden_positions = []
+            return
+        if self.game.forbidden is not None:
+            self.forbidden_positions = self.game.visible_forbidden_positions()
+            return
+        
+        key = self.forbidden_key()
+        positions = self.forbidden_cache.get(key)
+        if positions is not None:
+            self.forbidden_positions = positions
+            return
+        
+        # 结果到达前不显示旧局面的标记
         self.forbidden_positions = []
-        # 只在黑棋回合且游戏进行中检测禁手
-        if self.current_player != 1 or not self.game_started or self.game_over:
+        if key in self._pending_forbidden:
             return
-            
-        # 检查所有空位
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if self.board_data[row][col] == 0:  # 空位
-                    if self.is_forbidden_move(row, col):
-                        self.forbidden_positions.append((row, col))
+        self._pending_forbidden.add(key)
+        task = ForbiddenTask(key, self.game.snapshot(), self.game.renju, self.game.variant)
+        task.signals.finished.connect(self.on_forbidden_ready)
+        QThreadPool.globalInstance().start(task)
+    
+    def on_forbidden_ready(self, key, positions):
+        """后台禁手计算完成：写入缓存，仍是当前局面时绘制禁手标记"""
+        self._pending_forbidden.discard(key)
+        if positions is None:
+            return
+        self.forbidden_cache.put(key, positions)
+        if key == self.forbidden_key() and self.game.shows_forbidden():
+            self.forbidden_positions = positions
+            self.update()
+    
+    def set_show_forced_win(self, enabled):
+        """设置是否提示当前玩家的连续冲四必胜"""
+        self.show_forced_win = enabled
+        self.refresh_forced_win()
+        self.update()
+    
+    def forced_win_key(self):
+        """必胜提示的缓存键：棋盘尺寸、规则、局面哈希和当前玩家"""
+        return (self.board_size, self.game.variant.name, self.position_hash, self.current_player)
+    
+    def refresh_forced_win(self):
+        """刷新必胜提示：缓存中有当前局面的结果时立即显示，否则交给后台线程求解"""
+        if not self.show_forced_win or not self.game_started or self.game_over:
+            self.set_forced_win(None)
+            return
+        
+        key = self.forced_win_key()
+        line = self.forced_win_cache.get(key)
+        if line is not None:
+            self.set_forced_win(line or None)
+            return
+        
+        self.set_forced_win(None)
+        if key in self._pending_vcf:
+            return
+        self._pending_vcf.add(key)
+        task = VCFTask(key, self.game.snapshot(), self.vcf_solver, self.game.variant, self.game.renju)
+        task.signals.finished.connect(self.on_forced_win_ready)
+        QThreadPool.globalInstance().start(task)
+    
+    def on_forced_win_ready(self, key, line):
+        """后台求解完成：写入缓存(没有必胜时保存空序列)，仍是当前局面时显示"""
+        self._pending_vcf.discard(key)
+        line = tuple(line) if line else ()
+        self.forced_win_cache.put(key, line)
+        if key == self.forced_win_key() and self.show_forced_win and self.game_started and not self.game_over:
+            self.set_forced_win(line or None)
+            self.update()
+    
+    def set_analysis(self, key, line):
+        """显示局面分析得到的取胜序列(局面改变后自动不再显示)"""
+        self.analysis = (key, line)
+        self.update()
+    
+    def set_forced_win(self, line):
+        """更新当前的取胜序列，有变化时发出信号"""
+        if line == self.forced_win:
+            return
+        self.forced_win = line
+        self.forcedWinChanged.emit(self.current_player if line else 0, line)
     
     def undo_move(self):
         """悔棋 - 撤销最后一步"""
         # 修改：移除游戏结束时的限制，只要有历史记录就可以悔棋
-        if not self.move_history:
-            return False
-        
-        # 获取最后一步
-        last_move = self.move_history.pop()
-        
-        # 清除该位置的棋子
-        self.board_data[last_move[0]][last_move[1]] = 0
-        
-        # 切换回前一个玩家
         previous_player = self.current_player
-        self.current_player = 3 - self.current_player
+        if not self.game.undo():
+            return False
         
         # 发出玩家变更信号
         self.playerChanged.emit(self.current_player)
         print(f"悔棋时发出玩家变更信号：{previous_player} -> {self.current_player}")
-        
-        # 如果游戏已结束，则恢复为未结束状态
-        if self.game_over:
-            self.game_over = False
-            self.winner = 0  # 清除胜者信息
             
-        # 如果悔棋后是黑棋回合，更新禁手位置
-        if self.current_player == 1:
-            self.update_forbidden_positions()
+        # 刷新禁手标记
+        self.refresh_forbidden_positions()
+        self.refresh_forced_win()
             
         self.update()
         return True
     
+    def redo_move(self):
+        """重做 - 沿时间线恢复下一步(禁手标记从缓存中取回)"""
+        if not self.game.redo():
+            return False
+        
+        if self.game_over:
+            self.gameStatusChanged.emit(True, self.winner)
+        else:
+            self.playerChanged.emit(self.current_player)
+        
+        self.refresh_forbidden_positions()
+        self.refresh_forced_win()
+        
+        self.update()
+        return True
+    
     def surrender(self):
         """投降操作"""
-        if self.game_started and not self.game_over:
-            self.game_over = True
-            self.winner = 3 - self.current_player  # 对方获胜
+        if self.game.surrender():
             self.update()
             return True
         return False
@@ -165,20 +355,15 @@ class GoBoardWidget(QWidget):
         # 获取当前时间戳
         timestamp = datetime.datetime.now().isoformat()
         
-        game_data = {
-            "board_data": self.board_data,
-            "current_player": self.current_player,
-            "game_started": self.game_started,
-            "game_over": self.game_over,
-            "move_history": self.move_history,
-            "winner": self.winner,
+        game_data = game_to_dict(self.game)
+        game_data.update({
             "timestamp": timestamp,  # 添加时间戳
             "style_index": list(self.BOARD_STYLES.keys()).index(self.current_style),  # 添加棋盘风格索引
             "player_info": {
                 "player1": "玩家",  # 玩家1是人类
                 "player2": "AI"     # 玩家2是AI
             }
-        }
+        })
         
         # 导入历史记录管理器
         from mainWindow.game_history_manager import GameHistoryManager
@@ -254,10 +439,9 @@ class GoBoardWidget(QWidget):
             )
         
         # 绘制天元和星位
-        star_points = [(3, 3), (3, 11), (7, 7), (11, 3), (11, 11)]
         star_size = max(4, int(cell_size / 8))  # 星位点大小随格子大小缩放
         
-        for x, y in star_points:
+        for x, y in star_points(self.board_size):
             painter.setBrush(QBrush(style["line"]))
             painter.drawEllipse(
                 int(padding_x + x * cell_size - star_size / 2),
@@ -265,43 +449,42 @@ class GoBoardWidget(QWidget):
                 star_size, star_size
             )
         
-        # 绘制棋子
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if self.board_data[row][col] != 0:
-                    # 计算棋子位置 - 使用padding_x和padding_y
-                    x = int(padding_x + col * cell_size - stone_size / 2)
-                    y = int(padding_y + row * cell_size - stone_size / 2)
-                    
-                    # 设置棋子颜色 - 1是黑棋，2是白棋
-                    if self.board_data[row][col] == 1:
-                        painter.setBrush(QBrush(Qt.black))
-                        text_color = Qt.white  # 黑棋上使用白色文字
-                    else:
-                        painter.setBrush(QBrush(Qt.white))
-                        text_color = Qt.black  # 白棋上使用黑色文字
-                    
-                    # 绘制棋子边框，使用同样的线宽参数
-                    painter.setPen(QPen(Qt.black if self.board_data[row][col] == 2 else Qt.gray, line_width))
-                    
-                    # 绘制棋子
-                    painter.drawEllipse(x, y, int(stone_size), int(stone_size))
-                    
-                    # 查找该棋子的序号
-                    move_number = self.find_move_number(row, col)
-                    if move_number > 0:
-                        # 设置序号文本字体和颜色
-                        number_font = painter.font()
-                        number_font.setPointSize(int(stone_size / 3))  # 字体大小约为棋子大小的1/3
-                        number_font.setBold(True)
-                        painter.setFont(number_font)
-                        painter.setPen(QPen(text_color))
-                        
-                        # 绘制序号文本
-                        number_rect = QRect(
-                            x, y, int(stone_size), int(stone_size)
-                        )  # 修复: 添加缺失的右括号
-                        painter.drawText(number_rect, Qt.AlignCenter, str(move_number))
+        # 绘制棋子 - 只遍历已落子的点，序号直接从序号表读取
+        move_numbers = self.game.history.numbers
+        for row, col in self.game.board.occupied:
+            # 计算棋子位置 - 使用padding_x和padding_y
+            x = int(padding_x + col * cell_size - stone_size / 2)
+            y = int(padding_y + row * cell_size - stone_size / 2)
+            
+            # 设置棋子颜色 - 1是黑棋，2是白棋
+            if self.board_data[row][col] == 1:
+                painter.setBrush(QBrush(Qt.black))
+                text_color = Qt.white  # 黑棋上使用白色文字
+            else:
+                painter.setBrush(QBrush(Qt.white))
+                text_color = Qt.black  # 白棋上使用黑色文字
+            
+            # 绘制棋子边框，使用同样的线宽参数
+            painter.setPen(QPen(Qt.black if self.board_data[row][col] == 2 else Qt.gray, line_width))
+            
+            # 绘制棋子
+            painter.drawEllipse(x, y, int(stone_size), int(stone_size))
+            
+            # 查找该棋子的序号
+            move_number = move_numbers[row * self.board_size + col]
+            if move_number > 0:
+                # 设置序号文本字体和颜色
+                number_font = painter.font()
+                number_font.setPointSize(int(stone_size / 3))  # 字体大小约为棋子大小的1/3
+                number_font.setBold(True)
+                painter.setFont(number_font)
+                painter.setPen(QPen(text_color))
+                
+                # 绘制序号文本
+                number_rect = QRect(
+                    x, y, int(stone_size), int(stone_size)
+                )  # 修复: 添加缺失的右括号
+                painter.drawText(number_rect, Qt.AlignCenter, str(move_number))
         
         # 绘制禁手标记（如果有）
         if self.current_player == 1 and self.game_started and not self.game_over:
@@ -325,6 +508,45 @@ class GoBoardWidget(QWidget):
                     x - mark_size, y + mark_size
                 )
         
+        # 绘制威胁点：当前玩家用实心点，对手用空心圈，颜色表示棋型强弱
+        if self.show_threats and self.game_started and not self.game_over:
+            threat_colors = {
+                patterns.OPEN_THREE: QColor(255, 200, 0),
+                patterns.FOUR: QColor(255, 120, 0),
+                patterns.DOUBLE_FOUR: QColor(255, 60, 0),
+                patterns.OPEN_FOUR: QColor(230, 0, 0),
+                patterns.FIVE: QColor(160, 0, 160),
+            }
+            dot_size = max(4, int(cell_size * 0.3))
+            for color, threats in self.get_threats().items():
+                is_current = color == self.current_player
+                for (row, col), shape in threats.items():
+                    x = int(padding_x + col * cell_size - dot_size / 2)
+                    y = int(padding_y + row * cell_size - dot_size / 2)
+                    painter.setPen(QPen(threat_colors[shape], line_width * 1.5))
+                    painter.setBrush(QBrush(threat_colors[shape]) if is_current else Qt.NoBrush)
+                    painter.drawEllipse(x, y, dot_size, dot_size)
+        
+        # 绘制必胜提示：取胜序列的第一步用绿色方框标出
+        if self.show_forced_win and self.forced_win and self.game_started and not self.game_over:
+            row, col = self.forced_win[0]
+            box_size = int(cell_size * 0.8)
+            x = int(padding_x + col * cell_size - box_size / 2)
+            y = int(padding_y + row * cell_size - box_size / 2)
+            painter.setPen(QPen(QColor(0, 170, 0), line_width * 2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(x, y, box_size, box_size)
+        
+        # 绘制局面分析结果：取胜序列的第一步用蓝色方框标出
+        if self.analysis is not None and self.analysis[0] == self.forced_win_key() and not self.game_over:
+            row, col = self.analysis[1][0]
+            box_size = int(cell_size * 0.9)
+            x = int(padding_x + col * cell_size - box_size / 2)
+            y = int(padding_y + row * cell_size - box_size / 2)
+            painter.setPen(QPen(QColor(0, 90, 220), line_width * 2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(x, y, box_size, box_size)
+        
         # 如果游戏未开始，绘制提示
         if not self.game_started:
             font = painter.font()
@@ -346,241 +568,12 @@ class GoBoardWidget(QWidget):
     
     def find_move_number(self, row, col):
         """查找指定位置棋子的序号"""
-        for i, move in enumerate(self.move_history):
-            if move[0] == row and move[1] == col:
-                return i + 1  # 序号从1开始
-        return 0  # 如果没找到（棋盘被直接设置而不是通过下棋），返回0
-
-    def is_forbidden_move(self, row, col):
-        """完整的黑棋禁手检测
-        包括：三三禁手、四四禁手、长连禁手"""
-        # 先在棋盘上模拟落子以便后续检测
-        original_value = self.board_data[row][col]
-        self.board_data[row][col] = 1  # 假设是黑子
-        
-        # 首先检查是否形成五连胜利
-        is_winning_move = self.check_win_without_length_limit(row, col)
-        
-        # 长连禁手(超过5子连珠)
-        long_connect = self.check_long_connect(row, col)
-        
-        # 三三禁手 - 检查是否形成两个以上的活三
-        three_three = self.check_three_three(row, col)
-        
-        # 四四禁手 - 检查是否形成两个以上的四(活四或冲四)
-        four_four = self.check_four_four(row, col)
-        
-        # 恢复棋盘状态
-        self.board_data[row][col] = original_value
-        
-        # 如果是五连同时又是长连，优先判定为胜局而非禁手
-        if is_winning_move and long_connect:
-            return False
-            
-        # 其他情况下，如果触发任何禁手规则，则判定为禁手
-        return long_connect or three_three or four_four
-
-    def check_win_without_length_limit(self, row, col):
-        """检查是否形成五连(不考虑长度限制)"""
-        player = self.board_data[row][col]
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、斜、反斜四个方向
-        
-        for dx, dy in directions:
-            count = 1  # 当前落子点计为1
-            
-            # 沿着正方向检查连子
-            for step in range(1, 5):  # 最多检查4步，加上当前位置刚好5子
-                x, y = row + dx * step, col + dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == player:
-                    count += 1
-                else:
-                    break
-                    
-            # 沿着反方向检查连子
-            for step in range(1, 5):
-                x, y = row - dx * step, col - dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == player:
-                    count += 1
-                else:
-                    break
-            
-            # 正好5子连线则获胜
-            if count >= 5:
-                return True
-                
-        return False
-
-    def check_three_three(self, row, col):
-        """检查三三禁手(同时形成两个以上的活三)"""
-        active_threes = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、正斜、反斜四个方向
-        
-        for dx, dy in directions:
-            # 检查当前方向是否形成活三
-            if self.is_active_three(row, col, dx, dy):
-                active_threes += 1
-                # 如果已经找到两个活三，可以提前返回结果
-                if active_threes >= 2:
-                    return True
-        
-        # 未形成两个及以上活三，不构成三三禁手
-        return False
-
-    def is_active_three(self, row, col, dx, dy):
-        """检查指定方向是否形成活三
-        活三：在一条线上有三个相连的棋子，并且两端都是空位，可以形成活四的情况"""
-        pattern = self.get_line_pattern(row, col, dx, dy)
-        
-        # 活三的模式(. 表示空位，1表示黑棋，2表示白棋)
-        active_three_patterns = [
-            '...111..',   # 空空空黑黑黑空空 - 典型活三
-            '..1.11..',   # 空空黑空黑黑空空 - 间隔活三
-            '..11.1..',   # 空空黑黑空黑空空 - 间隔活三
-        ]
-        
-        for p in active_three_patterns:
-            if p in pattern:
-                return True
-        
-        return False
-
-    def check_four_four(self, row, col):
-        """检查四四禁手(同时形成两个以上的四，包括活四和冲四)"""
-        four_count = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、正斜、反斜四个方向
-        
-        # 检查每个方向上是否形成四(活四或冲四)
-        for dx, dy in directions:
-            is_active = self.is_active_four(row, col, dx, dy)
-            is_blocked = self.is_blocked_four(row, col, dx, dy)
-            
-            if is_active or is_blocked:
-                four_count += 1
-                # 如果已经找到两个四，可以提前返回结果
-                if four_count >= 2:
-                    return True
-        
-        # 未形成两个及以上的四，不构成四四禁手
-        return False
-
-    def is_active_four(self, row, col, dx, dy):
-        """检查指定方向是否形成活四
-        活四：在一条线上有四个相连的棋子，一端是空位，下一步可以成五连胜利"""
-        pattern = self.get_line_pattern(row, col, dx, dy)
-        
-        # 活四的模式
-        active_four_patterns = [
-            '..1111.',   # 空空黑黑黑黑空 - 活四
-            '.1111..',   # 空黑黑黑黑空空 - 活四
-        ]
-        
-        for p in active_four_patterns:
-            if p in pattern:
-                return True
-        
-        return False
-
-    def is_blocked_four(self, row, col, dx, dy):
-        """检查指定方向是否形成冲四
-        冲四：在一条线上有四个相连的棋子，但被对方棋子或边界阻挡一端，只有一个方向可以成五连"""
-        pattern = self.get_line_pattern(row, col, dx, dy)
-        
-        # 冲四的模式(2表示白棋或边界阻挡，.表示空位)
-        blocked_four_patterns = [
-            '.11112',    # 空黑黑黑黑白(或边界)
-            '2.1111',    # 白(或边界)空黑黑黑黑
-            '.1.111',    # 空黑空黑黑黑
-            '.11.11',    # 空黑黑空黑黑
-            '.111.1',    # 空黑黑黑空黑
-            '1.111.',    # 黑空黑黑黑空
-            '11.11.',    # 黑黑空黑黑空
-            '111.1.',    # 黑黑黑空黑空
-        ]
-        
-        # 修复：原代码错误地使用了active_four_patterns变量
-        for p in blocked_four_patterns:  # 这里应该用blocked_four_patterns而不是active_four_patterns
-            if p in pattern:
-                return True
-        
-        return False
-
-    def check_long_connect(self, row, col):
-        """检查长连禁手(超过5子连珠)"""
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、正斜、反斜四个方向
-        
-        for dx, dy in directions:
-            count = 1  # 当前位置计为1
-            
-            # 沿正方向检查连子
-            for step in range(1, 6):
-                x, y = row + dx * step, col + dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == 1:
-                    count += 1
-                else:
-                    break
-            
-            # 沿反方向检查连子
-            for step in range(1, 6):
-                x, y = row - dx * step, col - dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == 1:
-                    count += 1
-                else:
-                    break
-            
-            # 超过5个连子属于长连禁手
-            if count > 5:
-                return True
-        
-        return False
-
-    def get_line_pattern(self, row, col, dx, dy):
-        """获取指定方向的棋型模式
-        返回一个字符串，'0'表示空位，'1'表示黑子，'2'表示白棋，'.'表示棋盘外"""
-        pattern = []
-        
-        # 获取当前方向上的11格棋型(中心点+两边各5格)
-        for step in range(-5, 6):
-            x, y = row + dx * step, col + dy * step
-            if 0 <= x < self.board_size and 0 <= y < self.board_size:
-                pattern.append(str(self.board_data[x][y]))
-            else:
-                pattern.append('.')  # 棋盘外用.表示
-        
-        return ''.join(pattern)
-
-    def check_win(self, row, col):
-        """检查当前玩家是否获胜"""
-        player = self.board_data[row][col]
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、斜、反斜四个方向
-        
-        for dx, dy in directions:
-            count = 1  # 当前落子点计为1
-            
-            # 沿着正方向检查连子
-            for step in range(1, 5):  # 最多检查4步，加上当前位置刚好5子
-                x, y = row + dx * step, col + dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == player:
-                    count += 1
-                else:
-                    break
-                    
-            # 沿着反方向检查连子
-            for step in range(1, 5):
-                x, y = row - dx * step, col - dy * step
-                if 0 <= x < self.board_size and 0 <= y < self.board_size and self.board_data[x][y] == player:
-                    count += 1
-                else:
-                    break
-            
-            # 正好5子连线则获胜，超过5子对白棋也算获胜，对黑棋则是禁手
-            if count == 5 or (count > 5 and player == 2):
-                return True
-                
-        return False
+        # 如果没找到（棋盘被直接设置而不是通过下棋），返回0
+        return self.game.history.find_move_number(row, col)
 
     def mousePressEvent(self, event):
         """处理鼠标点击事件，放置棋子"""
-        if not self.game_started or self.game_over:
+        if not self.game_started or self.game_over or not self.input_enabled:
             return
         if event.button() != Qt.LeftButton:
             return
@@ -598,13 +591,19 @@ class GoBoardWidget(QWidget):
         # 计算落子行列
         col = round((event.x() - padding_x) / cell_size)
         row = round((event.y() - padding_y) / cell_size)
-        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
-            return
-        if self.board_data[row][col] != 0:
-            return
+        
+        self.play_move(row, col)
+    
+    def play_move(self, row, col):
+        """当前玩家在(row, col)落子(玩家点击或AI着法)，返回落子结果"""
+        # 由对局对象完成禁手检测、落子记录和胜负判断
+        previous_player = self.current_player
+        result = self.game.play(row, col)
+        if result == MOVE_INVALID:
+            return result
         
         # 黑棋禁手检测
-        if self.current_player == 1 and self.is_forbidden_move(row, col):
+        if result == MOVE_FORBIDDEN:
             InfoBar.warning(
                 title='禁手',
                 content='黑棋禁手，不允许落子',
@@ -614,17 +613,10 @@ class GoBoardWidget(QWidget):
                 duration=2000,
                 parent=self
             )
-            return
-        
-        # 放置棋子并记录
-        self.board_data[row][col] = self.current_player
-        self.move_history.append((row, col))
+            return result
         
         # 检查胜负
-        if self.check_win(row, col):
-            self.game_over = True
-            self.winner = self.current_player
-            
+        if result == MOVE_WIN:
             # 确保立即重绘棋盘，显示最后一步棋子
             self.repaint()
             
@@ -649,27 +641,22 @@ class GoBoardWidget(QWidget):
             # 发出游戏状态变更信号
             self.gameStatusChanged.emit(True, self.winner)
             
-            return
-        
-        # 切换玩家
-        previous_player = self.current_player
-        self.current_player = 3 - self.current_player
+            return result
         
-        # 发出玩家变更信号
+        # 玩家已切换，发出玩家变更信号
         self.playerChanged.emit(self.current_player)
         print(f"发出玩家变更信号：{previous_player} -> {self.current_player}")
         
-        # 如果轮到黑棋，更新禁手位置
-        if self.current_player == 1:
-            self.update_forbidden_positions()
-        else:
-            self.forbidden_positions = []  # 白棋回合清空禁手标记
+        # 如果轮到黑棋，显示禁手位置；白棋回合清空禁手标记
+        self.refresh_forbidden_positions()
+        self.refresh_forced_win()
         
         # 强制打印日志，确认每次下棋都会触发玩家信息更新
         print(f"落子成功，切换到玩家 {self.current_player}，开始更新玩家信息")
         
         # 重绘棋盘
         self.repaint()
+        return result
 
 
 class BoardWidget(QWidget):
@@ -723,6 +710,53 @@ class BoardWidget(QWidget):
         self.side_combo.currentIndexChanged.connect(self.on_side_changed)
         self.is_human_turn = True  # 添加标记判断当前是否为人类玩家回合
         
+        # AI对手：搜索在工作线程中进行，着法通过信号发回
+        self.engine = AlphaBetaEngine(time_limit=cfg.get(cfg.aiThinkTime),
+                                      hash_size_mb=cfg.get(cfg.aiHashSize))
+        # 蒙特卡洛树搜索和并行Alpha-Beta引擎，第一次选用时创建(会启动工作进程)
+        self.mcts_engine = None
+        self.smp_engine = None
+        # 退出程序时停止搜索线程、关闭工作进程(棋盘嵌在主窗口中时BoardWindow.closeEvent不会被调用)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close_engines)
+        self.engine_thread = None
+        self._ai_key = None  # AI正在思考的局面(局面哈希, 步数)
+        self._ai_paused = False  # 悔棋、重做的过程中不开始搜索，整个操作完成后再决定
+        
+        # 局面分析：后台求解当前玩家的连续进攻取胜(VCT)，证明数表在多次分析之间保留
+        self.vct_solver = VCTSolver()
+        self._analysis_key = None  # 正在分析的局面
+        
+        # 棋盘尺寸选择
+        self.size_label = QLabel("棋盘大小：", self)
+        self.size_combo = ComboBox(self)
+        self.size_combo.addItems([f"{size}×{size}" for size in BOARD_SIZES])
+        self.size_combo.setCurrentIndex(BOARD_SIZES.index(self.board.board_size))
+        self.size_combo.currentIndexChanged.connect(self.on_size_changed)
+        
+        # 规则选择
+        self.rule_names = list(VARIANTS.keys())
+        self.rule_label = QLabel("规则：", self)
+        self.rule_combo = ComboBox(self)
+        self.rule_combo.addItems([VARIANTS[name].title for name in self.rule_names])
+        self.rule_combo.setCurrentIndex(self.rule_names.index(self.board.game.variant.name))
+        self.rule_combo.currentIndexChanged.connect(self.on_rule_changed)
+        
+        # 威胁点显示开关
+        self.threat_check = CheckBox("显示威胁点", self)
+        self.threat_check.setChecked(False)
+        self.threat_check.stateChanged.connect(
+            lambda state: self.board.set_show_threats(state == Qt.Checked))
+        
+        # 必胜提示开关和说明
+        self.forced_win_check = CheckBox("提示连续冲四必胜", self)
+        self.forced_win_check.setChecked(False)
+        self.forced_win_check.stateChanged.connect(
+            lambda state: self.board.set_show_forced_win(state == Qt.Checked))
+        self.forced_win_label = QLabel("", self)
+        self.forced_win_label.setWordWrap(True)
+        
         # 将控件从共享布局改为单独的布局
         # 棋盘风格布局
         self.style_layout = QHBoxLayout()
@@ -736,6 +770,18 @@ class BoardWidget(QWidget):
         self.side_layout.addWidget(self.side_combo)
         self.side_layout.addStretch(1)
         
+        # 棋盘尺寸布局
+        self.size_layout = QHBoxLayout()
+        self.size_layout.addWidget(self.size_label)
+        self.size_layout.addWidget(self.size_combo)
+        self.size_layout.addStretch(1)
+        
+        # 规则布局
+        self.rule_layout = QHBoxLayout()
+        self.rule_layout.addWidget(self.rule_label)
+        self.rule_layout.addWidget(self.rule_combo)
+        self.rule_layout.addStretch(1)
+        
         # 创建分隔线
         self.separator = QFrame()
         self.separator.setFrameShape(QFrame.HLine)
@@ -753,7 +799,7 @@ class BoardWidget(QWidget):
             "1. 点击「开始对局」按钮开始游戏\n"
             "2. 黑棋先行，双方轮流下棋\n"
             "3. 先连成五子一线者获胜\n"
-            "4. 点击「悔棋」可撤销最后一步\n"
+            "4. 点击「悔棋」可撤销最后一步，「重做」可恢复撤销的棋步\n"
             "5. 点击「结束游戏」可结束当前游戏\n"
             "6. 游戏会自动保存到历史记录"
         )
@@ -763,22 +809,35 @@ class BoardWidget(QWidget):
         self.button_layout = QVBoxLayout()
         self.start_button = PushButton("开始对局")
         self.undo_button = PushButton("悔棋")
+        self.redo_button = PushButton("重做")
+        self.analyze_button = PushButton("分析局面")
         self.end_game_button = PushButton("结束游戏")
         # 设置按钮尺寸
         self.start_button.setFixedHeight(40)
         self.undo_button.setFixedHeight(40)
+        self.redo_button.setFixedHeight(40)
+        self.analyze_button.setFixedHeight(40)
         self.end_game_button.setFixedHeight(40)
         # 按钮添加到布局
         self.button_layout.addWidget(self.start_button)
         self.button_layout.addSpacing(10)
         self.button_layout.addWidget(self.undo_button)
         self.button_layout.addSpacing(10)
+        self.button_layout.addWidget(self.redo_button)
+        self.button_layout.addSpacing(10)
+        self.button_layout.addWidget(self.analyze_button)
+        self.button_layout.addSpacing(10)
         self.button_layout.addWidget(self.end_game_button)
         # 添加组件到右侧布局，注意将原先的controls_layout替换为两个单独的布局
         self.right_layout.addWidget(self.title_label)
         self.right_layout.addSpacing(10)
         self.right_layout.addLayout(self.style_layout)  # 先添加棋盘风格布局
         self.right_layout.addLayout(self.side_layout)   # 再添加执棋方布局
+        self.right_layout.addLayout(self.size_layout)
+        self.right_layout.addLayout(self.rule_layout)
+        self.right_layout.addWidget(self.threat_check)
+        self.right_layout.addWidget(self.forced_win_check)
+        self.right_layout.addWidget(self.forced_win_label)
         self.right_layout.addWidget(self.separator)
         self.right_layout.addWidget(self.player_info)
         self.right_layout.addSpacing(20)
@@ -794,10 +853,13 @@ class BoardWidget(QWidget):
         # 连接按钮事件
         self.start_button.clicked.connect(self.onStartGame)
         self.undo_button.clicked.connect(self.onUndoMove)
+        self.redo_button.clicked.connect(self.onRedoMove)
+        self.analyze_button.clicked.connect(self.onAnalyzePosition)
         self.end_game_button.clicked.connect(self.onEndGame)
         # 连接棋盘的玩家变更信号到更新方法
         self.board.playerChanged.connect(self.on_player_changed)
         self.board.gameStatusChanged.connect(self.on_game_status_changed)
+        self.board.forcedWinChanged.connect(self.on_forced_win_changed)
         # 初始化时更新玩家信息
         self.update_player_info()
         # 设置初始游戏状态
@@ -828,8 +890,126 @@ class BoardWidget(QWidget):
             
         self.player_side = "black" if index == 0 else "white"
     
+    def on_size_changed(self, index):
+        """更改棋盘尺寸"""
+        # 游戏进行中禁止更改棋盘尺寸
+        if self.board.game_started:
+            self.size_combo.blockSignals(True)
+            self.size_combo.setCurrentIndex(BOARD_SIZES.index(self.board.board_size))
+            self.size_combo.blockSignals(False)
+            
+            InfoBar.warning(
+                title='无法更改',
+                content="游戏已开始，无法更改棋盘大小",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self
+            )
+            return
+        
+        self.board.set_board_size(BOARD_SIZES[index])
+        self.update_player_info()
+    
+    def on_rule_changed(self, index):
+        """更改规则"""
+        # 游戏进行中禁止更改规则
+        if self.board.game_started:
+            self.rule_combo.blockSignals(True)
+            self.rule_combo.setCurrentIndex(self.rule_names.index(self.board.game.variant.name))
+            self.rule_combo.blockSignals(False)
+            
+            InfoBar.warning(
+                title='无法更改',
+                content="游戏已开始，无法更改规则",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self
+            )
+            return
+        
+        self.board.set_variant(self.rule_names[index])
+    
+    def human_color(self):
+        """玩家执棋的颜色"""
+        return 1 if self.player_side == "black" else 2
+    
+    def request_ai_move(self):
+        """轮到AI且游戏进行中时，在工作线程中开始搜索(同一局面只搜索一次)"""
+        if self._ai_paused or not self.board.game_started or self.board.game_over or self.is_human_turn:
+            return
+        key = (self.board.position_hash, len(self.board.move_history))
+        if key == self._ai_key:
+            return
+        self.stop_ai()
+        self._ai_key = key
+        engine = self.current_engine()
+        engine.reset_stop()
+        self.engine_thread = EngineThread(key, engine, self.board.game.snapshot(),
+                                          self.board.game.variant, self)
+        self.engine_thread.moveReady.connect(self.on_ai_move)
+        self.engine_thread.start()
+    
+    def current_engine(self):
+        """按设置选用搜索引擎，并同步思考时间等参数"""
+        if cfg.get(cfg.aiEngine) == "MCTS":
+            if self.mcts_engine is None:
+                self.mcts_engine = MCTSEngine()
+            engine = self.mcts_engine
+            engine.workers = cfg.get(cfg.aiWorkers)
+        elif cfg.get(cfg.aiEngine) == "LazySMP":
+            if self.smp_engine is None:
+                self.smp_engine = LazySMPEngine()
+            engine = self.smp_engine
+            engine.workers = cfg.get(cfg.aiWorkers)
+            engine.hash_size_mb = cfg.get(cfg.aiHashSize)
+        else:
+            engine = self.engine
+            if engine.tt.size_mb != cfg.get(cfg.aiHashSize):
+                engine.tt.resize(cfg.get(cfg.aiHashSize))
+        engine.time_limit = cfg.get(cfg.aiThinkTime)
+        return engine
+    
+    def close_engines(self):
+        """停止AI搜索，关闭并行引擎的工作进程和共享内存(可以重复调用)"""
+        self.stop_ai()
+        self.vct_solver.stop()
+        for engine in (self.mcts_engine, self.smp_engine):
+            if engine is not None:
+                engine.close()
+        self.mcts_engine = self.smp_engine = None
+    
+    def stop_ai(self):
+        """中止正在进行的AI搜索，之后到达的结果会被丢弃"""
+        self._ai_key = None
+        if self.engine_thread is not None:
+            self.engine_thread.stop()
+            self.engine_thread.wait()
+            self.engine_thread = None
+    
+    def on_ai_move(self, key, result):
+        """AI搜索完成：仍是同一局面且轮到AI时落子"""
+        if key != self._ai_key:
+            return
+        self._ai_key = None
+        if result is None or result.move is None:
+            return
+        if not self.board.game_started or self.board.game_over or self.is_human_turn:
+            return
+        if self.board.play_move(*result.move) in (MOVE_FORBIDDEN, MOVE_INVALID):
+            # 着法被拒绝(不应发生)时改走排序最靠前的合法着法，避免AI停在这一步
+            game = self.board.game
+            position = SearchPosition(game.snapshot(), game.variant, game.renju)
+            moves = position.ordered_moves(game.current_player, 1)
+            if moves:
+                self.board.play_move(*moves[0])
+    
     def onStartGame(self):
         """开始游戏"""
+        self.stop_ai()
         self.board.reset_game(start_immediately=True)
         
         # 无论玩家选择哪一方，游戏总是黑棋先行
@@ -838,11 +1018,13 @@ class BoardWidget(QWidget):
         # 根据玩家选择设置当前是否为人类回合
         self.is_human_turn = (self.player_side == "black")
         
-        # 黑棋回合，检测禁手
-        self.board.update_forbidden_positions()
+        # 黑棋回合，显示禁手
+        self.board.refresh_forbidden_positions()
         
-        # 在游戏开始后禁用执棋方选择
+        # 在游戏开始后禁用执棋方、棋盘尺寸和规则选择
         self.side_combo.setEnabled(False)
+        self.size_combo.setEnabled(False)
+        self.rule_combo.setEnabled(False)
         
         self.update_player_info()
         self.board.update()
@@ -863,7 +1045,16 @@ class BoardWidget(QWidget):
     def onUndoMove(self):
         """悔棋"""
         # 移除游戏结束限制，允许在任何情况下悔棋
-        if self.board.undo_move():
+        self.stop_ai()
+        self._ai_paused = True
+        try:
+            undone = self.board.undo_move()
+            # 撤销的是AI的着法时，连同玩家的上一步一起撤销，回到玩家回合
+            if undone and self.board.current_player != self.human_color():
+                self.board.undo_move()
+        finally:
+            self._ai_paused = False
+        if undone:
             self.update_player_info()
             InfoBar.info(
                 title='悔棋成功',
@@ -885,6 +1076,86 @@ class BoardWidget(QWidget):
                 parent=self
             )
     
+    def onRedoMove(self):
+        """重做"""
+        self.stop_ai()
+        self._ai_paused = True
+        try:
+            redone = self.board.redo_move()
+            # 与悔棋对称：轮到AI且时间线上记录了它的应着时一起重做，不重新搜索
+            if (redone and not self.board.game_over and self.board.current_player != self.human_color()
+                    and self.board.game.can_redo()):
+                self.board.redo_move()
+        finally:
+            self._ai_paused = False
+        if redone:
+            self.update_player_info()
+        else:
+            InfoBar.warning(
+                title='重做失败',
+                content="没有可恢复的步骤",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self
+            )
+    
+    def onAnalyzePosition(self):
+        """分析局面：在后台求解当前玩家能否连续进攻(活三、冲四)取胜"""
+        if not self.board.game_started or self.board.game_over:
+            InfoBar.warning(
+                title='无法分析',
+                content="只能分析进行中的对局",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self
+            )
+            return
+        if self._analysis_key is not None:
+            return
+        
+        self._analysis_key = self.board.forced_win_key()
+        self.analyze_button.setEnabled(False)
+        self.analyze_button.setText("分析中...")
+        self.vct_solver.reset_stop()
+        task = AnalysisTask(self._analysis_key, self.board.game.snapshot(), self.vct_solver,
+                            self.board.game.variant, self.board.game.renju)
+        task.signals.finished.connect(self.on_analysis_ready)
+        QThreadPool.globalInstance().start(task)
+    
+    def on_analysis_ready(self, key, result):
+        """局面分析完成：显示结论，仍是同一局面时在棋盘上标出第一步"""
+        self._analysis_key = None
+        self.analyze_button.setEnabled(True)
+        self.analyze_button.setText("分析局面")
+        if result is None:
+            return
+        
+        side = "黑棋" if key[3] == 1 else "白棋"
+        if result.proven:
+            row, col = result.line[0]
+            content = f"{side}可以连续进攻取胜：先下第{row + 1}行第{col + 1}列(蓝框)，主要变化共{len(result.line)}手"
+            if key == self.board.forced_win_key():
+                self.board.set_analysis(key, result.line)
+        elif result.proven is False:
+            # 只在深度和宽度限制内排除了取胜，不是确定的结论
+            content = (f"在{self.vct_solver.max_depth}步进攻以内没有找到{side}的连续进攻取胜，"
+                       f"超出搜索限制的变化未知")
+        else:
+            content = f"在限定的计算量内没有得出结论(已搜索{result.nodes}个节点)"
+        InfoBar.info(
+            title='局面分析',
+            content=content,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=5000,
+            parent=self
+        )
+    
     def onEndGame(self):
         """结束游戏并准备重新开始"""
         if not self.board.game_started:
@@ -915,6 +1186,7 @@ class BoardWidget(QWidget):
                 self.saveGame()
                 
             # 重置棋盘
+            self.stop_ai()
             self.board.reset_game(start_immediately=False)
             self.update_player_info()
             
@@ -928,12 +1200,14 @@ class BoardWidget(QWidget):
                 parent=self
             )
             
-            # 重置棋盘或结束游戏后，重新启用执棋方选择
+            # 重置棋盘或结束游戏后，重新启用执棋方、棋盘尺寸和规则选择
             self.side_combo.setEnabled(True)
+            self.size_combo.setEnabled(True)
+            self.rule_combo.setEnabled(True)
             return
         
         # 游戏未结束或无胜者的情况
-        if any(any(row) for row in self.board.board_data):
+        if self.board.game.board.has_stones():
             reply = QMessageBox.question(
                 self, '结束游戏',
                 "确定要结束当前游戏吗？",
@@ -957,6 +1231,7 @@ class BoardWidget(QWidget):
         self.board.game_over = True
         self.board.winner = 0
         self.update_player_info()
+        self.stop_ai()
         self.board.reset_game(start_immediately=False)
         self.update_player_info()
         InfoBar.info(
@@ -969,8 +1244,10 @@ class BoardWidget(QWidget):
             parent=self
         )
         
-        # 重置棋盘或结束游戏后，重新启用执棋方选择
+        # 重置棋盘或结束游戏后，重新启用执棋方、棋盘尺寸和规则选择
         self.side_combo.setEnabled(True)
+        self.size_combo.setEnabled(True)
+        self.rule_combo.setEnabled(True)
     
     def saveGame(self):
         """保存游戏到历史记录"""
@@ -998,12 +1275,16 @@ class BoardWidget(QWidget):
     def load_game_data(self, game_data):
         """从历史记录加载游戏数据"""
         try:
-            self.board.board_data = game_data['board_data']
-            self.board.current_player = game_data['current_player']
-            self.board.game_started = game_data['game_started']
-            self.board.game_over = game_data['game_over']
-            self.board.winner = game_data['winner']
-            self.board.move_history = game_data['move_history']
+            self.stop_ai()
+            self.board.load_game(game_data)
+            # 同步棋盘尺寸和规则下拉框(不触发切换)
+            if self.board.board_size in BOARD_SIZES:
+                self.size_combo.blockSignals(True)
+                self.size_combo.setCurrentIndex(BOARD_SIZES.index(self.board.board_size))
+                self.size_combo.blockSignals(False)
+            self.rule_combo.blockSignals(True)
+            self.rule_combo.setCurrentIndex(self.rule_names.index(self.board.game.variant.name))
+            self.rule_combo.blockSignals(False)
             if 'style_index' in game_data:
                 self.style_combo.setCurrentIndex(game_data['style_index'])
                 self.board.set_style(game_data['style_index'])
@@ -1038,6 +1319,7 @@ class BoardWidget(QWidget):
             # 确定当前是否为人类玩家回合
             is_human_turn = (current_side == self.player_side)
             self.is_human_turn = is_human_turn
+            self.board.input_enabled = is_human_turn
             
             # 构建显示文本
             if self.board.current_player == 1:  # 黑棋回合
@@ -1052,6 +1334,9 @@ class BoardWidget(QWidget):
         
         # 强制立即重绘标签
         self.player_info.repaint()
+        
+        # 轮到AI时开始思考
+        self.request_ai_move()
     
     # 添加新的槽函数处理玩家变更信号
     def on_player_changed(self, player_id):
@@ -1063,6 +1348,16 @@ class BoardWidget(QWidget):
         """处理游戏状态变更信号"""
         print(f"收到游戏状态变更信号：游戏结束={is_game_over}, 胜者={winner_id}")
         self.update_player_info()  # 更新玩家信息标签
+        if is_game_over:
+            self.forced_win_label.setText("")
+    
+    def on_forced_win_changed(self, color, line):
+        """处理必胜提示变更信号"""
+        if color:
+            side = "黑棋" if color == 1 else "白棋"
+            self.forced_win_label.setText(f"{side}可连续冲四取胜(绿框处先手，共{(len(line) + 1) // 2}步)")
+        else:
+            self.forced_win_label.setText("")
 
 
 class BoardWindow(FramelessWindow):
@@ -1098,6 +1393,7 @@ class BoardWindow(FramelessWindow):
     def closeEvent(self, event):
         """窗口关闭时的清理工作"""
         print("游戏窗口正在关闭，清理资源...")
+        self.board_widget.close_engines()
         super().closeEvent(event)
 
 
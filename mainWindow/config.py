@@ -1,4 +1,5 @@
 # coding:utf-8
+import os
 from enum import Enum
 
 from PyQt5.QtCore import Qt, QLocale
@@ -76,6 +77,19 @@ class Config(QConfig):
     historyDir = ConfigItem(
         "Game", "HistoryDirectory", "game_history", FolderValidator())
     
+    # AI设置 - 每步思考时间(秒)
+    aiThinkTime = RangeConfigItem(
+        "AI", "ThinkTime", 2, RangeValidator(1, 30))
+    # AI设置 - 置换表内存上限(MB)
+    aiHashSize = RangeConfigItem(
+        "AI", "HashSizeMB", 64, RangeValidator(8, 1024))
+    # AI设置 - 搜索引擎(Alpha-Beta、蒙特卡洛树搜索或多进程并行的Alpha-Beta)
+    aiEngine = OptionsConfigItem(
+        "AI", "Engine", "AlphaBeta", OptionsValidator(["AlphaBeta", "MCTS", "LazySMP"]))
+    # AI设置 - 并行搜索的工作进程数
+    aiWorkers = RangeConfigItem(
+        "AI", "Workers", min(os.cpu_count() or 1, 8), RangeValidator(1, 64))
+    
     # 软件更新
     checkUpdateAtStartUp = ConfigItem(
         "Update", "CheckUpdateAtStartUp", True, BoolValidator())
@@ -2,7 +2,7 @@
 import os
 from mainWindow.config import cfg, HELP_URL, FEEDBACK_URL, AUTHOR, VERSION, YEAR
 from qfluentwidgets import (SettingCardGroup, SwitchSettingCard, 
-                            OptionsSettingCard, PushSettingCard,
+                            OptionsSettingCard, PushSettingCard, RangeSettingCard,
                             ScrollArea, ComboBoxSettingCard, ExpandLayout, 
                             Theme, InfoBar, InfoBarPosition, setTheme, isDarkTheme,
                             CustomColorSettingCard, HyperlinkCard, PrimaryPushSettingCard,
@@ -39,6 +39,35 @@ class SettingInterface(ScrollArea):
             self.history_manager.history_dir,
             self.gameSettingsGroup
         )
+        self.aiThinkTimeCard = RangeSettingCard(
+            cfg.aiThinkTime,
+            FIF.STOP_WATCH,
+            "AI思考时间",
+            "AI每步棋的最长思考时间(秒)",
+            self.gameSettingsGroup
+        )
+        self.aiHashSizeCard = RangeSettingCard(
+            cfg.aiHashSize,
+            FIF.SPEED_HIGH,
+            "AI置换表大小",
+            "AI搜索时缓存局面结果使用的内存上限(MB)",
+            self.gameSettingsGroup
+        )
+        self.aiEngineCard = ComboBoxSettingCard(
+            cfg.aiEngine,
+            FIF.ROBOT,
+            "AI搜索引擎",
+            "Alpha-Beta搜索、蒙特卡洛树搜索或多进程并行的Alpha-Beta搜索",
+            texts=["Alpha-Beta", "蒙特卡洛树搜索", "并行Alpha-Beta"],
+            parent=self.gameSettingsGroup
+        )
+        self.aiWorkersCard = RangeSettingCard(
+            cfg.aiWorkers,
+            FIF.DEVELOPER_TOOLS,
+            "AI并行进程数",
+            "蒙特卡洛树搜索和并行Alpha-Beta搜索同时使用的工作进程数",
+            self.gameSettingsGroup
+        )
 
         # 个性化组
         self.personalGroup = SettingCardGroup("个性化", self.scrollWidget)
@@ -135,6 +164,10 @@ class SettingInterface(ScrollArea):
     def __initLayout(self):
         # 添加卡片到组
         self.gameSettingsGroup.addSettingCard(self.historyDirCard)
+        self.gameSettingsGroup.addSettingCard(self.aiThinkTimeCard)
+        self.gameSettingsGroup.addSettingCard(self.aiHashSizeCard)
+        self.gameSettingsGroup.addSettingCard(self.aiEngineCard)
+        self.gameSettingsGroup.addSettingCard(self.aiWorkersCard)
 
         self.personalGroup.addSettingCard(self.themeCard)
         self.personalGroup.addSettingCard(self.themeColorCard)  # 添加主题颜色卡片
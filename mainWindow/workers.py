@@ -0,0 +1,106 @@
+# coding:utf-8
+"""后台计算任务 - 在QThreadPool或QThread中运行，结果通过信号发回界面线程"""
+from PyQt5.QtCore import QObject, QRunnable, QThread, pyqtSignal
+
+from gomoku.core import rules
+
+
+class ForbiddenSignals(QObject):
+    """禁手计算任务的信号"""
+    finished = pyqtSignal(object, object)  # 局面哈希，禁手点列表(计算失败时为None)
+
+
+class ForbiddenTask(QRunnable):
+    """在局面快照上计算所有黑棋禁手点，不访问界面线程正在使用的棋盘"""
+
+    def __init__(self, key, state, checker=None, variant=None):
+        super().__init__()
+        self.key = key
+        self.state = state
+        self.checker = checker
+        self.variant = variant
+        self.signals = ForbiddenSignals()
+
+    def run(self):
+        try:
+            positions = rules.find_forbidden_in_state(self.state, self.checker, self.variant)
+        except Exception as e:
+            print(f"计算禁手失败: {str(e)}")
+            positions = None
+        self.signals.finished.emit(self.key, positions)
+
+
+class VCFSignals(QObject):
+    """连续冲四求解任务的信号"""
+    finished = pyqtSignal(object, object)  # 请求标识，取胜序列(没有或求解失败时为None)
+
+
+class VCFTask(QRunnable):
+    """在局面快照上求解当前玩家的连续冲四取胜"""
+
+    def __init__(self, key, state, solver, variant=None, renju=None):
+        super().__init__()
+        self.key = key
+        self.state = state
+        self.solver = solver
+        self.variant = variant
+        self.renju = renju
+        self.signals = VCFSignals()
+
+    def run(self):
+        try:
+            line = self.solver.solve_state(self.state, self.variant, self.renju)
+        except Exception as e:
+            print(f"求解连续冲四失败: {str(e)}")
+            line = None
+        self.signals.finished.emit(self.key, line)
+
+
+class AnalysisSignals(QObject):
+    """局面分析任务的信号"""
+    finished = pyqtSignal(object, object)  # 请求标识，VCTResult(分析失败时为None)
+
+
+class AnalysisTask(QRunnable):
+    """在局面快照上求解当前玩家的连续进攻取胜(VCT)"""
+
+    def __init__(self, key, state, solver, variant=None, renju=None):
+        super().__init__()
+        self.key = key
+        self.state = state
+        self.solver = solver
+        self.variant = variant
+        self.renju = renju
+        self.signals = AnalysisSignals()
+
+    def run(self):
+        try:
+            result = self.solver.solve_state(self.state, self.variant, self.renju)
+        except Exception as e:
+            print(f"分析局面失败: {str(e)}")
+            result = None
+        self.signals.finished.emit(self.key, result)
+
+
+class EngineThread(QThread):
+    """在局面快照上运行搜索引擎，搜索结束后通过moveReady发回着法"""
+    moveReady = pyqtSignal(object, object)  # 请求标识，SearchResult(搜索失败时为None)
+
+    def __init__(self, key, engine, state, variant=None, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.engine = engine
+        self.state = state
+        self.variant = variant
+
+    def run(self):
+        try:
+            result = self.engine.search(self.state, self.variant)
+        except Exception as e:
+            print(f"AI搜索失败: {str(e)}")
+            result = None
+        self.moveReady.emit(self.key, result)
+
+    def stop(self):
+        """请求中止搜索，引擎会尽快返回已完成的结果"""
+        self.engine.stop()
@@ -0,0 +1,22 @@
+# coding:utf-8
+"""测试公共设置：让测试可以直接导入仓库根目录下的gomoku包，并提供几个共用的局面"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def double_four_state():
+    """黑棋走：(7,7)同时成两个冲四，自由规则下是取胜点，连珠规则下是四四禁手"""
+    from gomoku.core.state import GameState
+    state = GameState(15)
+    state.reset(start_immediately=True)
+    for row, col in [(7, 4), (7, 5), (7, 6), (4, 7), (5, 7), (6, 7)]:
+        state.place(row, col, 1)
+    for row, col in [(7, 3), (3, 7), (0, 0), (0, 14), (14, 0), (14, 14)]:
+        state.place(row, col, 2)
+    state.current_player = 1
+    return state
@@ -0,0 +1,26 @@
+# coding:utf-8
+"""Alpha-Beta搜索：根节点着法顺序不影响完成一层搜索后的评分"""
+from gomoku.core.state import GameState
+from gomoku.engine import AlphaBetaEngine
+
+
+def opening_state():
+    state = GameState(15)
+    state.reset(start_immediately=True)
+    for row, col in [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (8, 6)]:
+        state.place(row, col, state.current_player)
+        state.current_player = 3 - state.current_player
+    return state
+
+
+def test_root_rotation_keeps_score():
+    state = opening_state()
+    scores = set()
+    for rotation in range(4):
+        engine = AlphaBetaEngine(time_limit=30, max_depth=3)
+        engine.vcf.max_depth = 0
+        result = engine.search(state, "renju", root_rotation=rotation)
+        assert result.depth == 3
+        assert state.get(*result.move) == 0
+        scores.add(result.score)
+    assert len(scores) == 1
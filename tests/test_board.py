@@ -0,0 +1,56 @@
+# coding:utf-8
+"""棋盘增量结构与整盘重算的对比：随机落子和提子之后逐项比较"""
+import random
+
+from gomoku.core.board import Board, BOARD_SIZES, get_square_neighbors
+from gomoku.core.zobrist import compute_hash
+
+
+def random_walk(size, steps, seed):
+    """在棋盘上随机落子和提子，每一步之后产出棋盘和当前棋子列表"""
+    rng = random.Random(seed)
+    board = Board(size)
+    stones = []
+    for _ in range(steps):
+        if stones and rng.random() < 0.4:
+            row, col = stones.pop(rng.randrange(len(stones)))
+            board.remove(row, col)
+        else:
+            row, col = rng.randrange(size), rng.randrange(size)
+            if board.grid[row][col]:
+                continue
+            board.place(row, col, rng.choice((1, 2)))
+            stones.append((row, col))
+        yield board, stones
+
+
+def test_hash_matches_full_recompute():
+    for size in BOARD_SIZES:
+        for board, _ in random_walk(size, 1500, seed=size):
+            assert board.hash == compute_hash(board.grid)
+
+
+def test_zone_matches_full_recompute():
+    for size in BOARD_SIZES:
+        for step, (board, stones) in enumerate(random_walk(size, 1500, seed=size + 1)):
+            if step % 25:
+                continue
+            expected = {
+                (x, y) for row, col in stones for x, y in board.neighbors[row * size + col]
+                if not board.grid[x][y]
+            }
+            assert board.zone == expected
+            assert board.occupied == set(stones)
+
+
+def test_candidates_match_full_recompute():
+    for size in BOARD_SIZES:
+        square = get_square_neighbors(size)
+        for step, (board, stones) in enumerate(random_walk(size, 1500, seed=size + 2)):
+            if step % 25:
+                continue
+            expected = {
+                (x, y) for row, col in stones for x, y in square[row * size + col]
+                if not board.grid[x][y]
+            }
+            assert board.candidates == expected
@@ -0,0 +1,50 @@
+# coding:utf-8
+"""线上棋型分：增量维护的总分与整盘重算的对比，以及几个棋型识别的例子"""
+import random
+
+from gomoku.core.state import GameState
+from gomoku.engine import SearchPosition
+from gomoku.engine.evaluation import (LineEvaluator, line_shapes, LINE_FIVE, LINE_OPEN_FOUR, LINE_FOUR,
+                                      LINE_OPEN_THREE, LINE_THREE, LINE_OPEN_TWO)
+
+
+def shapes(text):
+    """按字符串给出一条线(x己方，o对方，_空位)，返回各棋型数量"""
+    own = sum(1 << i for i, char in enumerate(text) if char == "x")
+    other = sum(1 << i for i, char in enumerate(text) if char == "o")
+    return line_shapes(own, other, len(text))
+
+
+def test_line_shapes():
+    assert shapes("___xxx___")[LINE_OPEN_THREE] == 1
+    assert shapes("oxxx_____")[LINE_OPEN_THREE] == 0
+    assert shapes("oxxx_____")[LINE_THREE] == 1
+    assert shapes("oxxxx____")[LINE_FOUR] == 1
+    assert shapes("___xxxx__")[LINE_OPEN_FOUR] == 1
+    assert shapes("__xxxxx__")[LINE_FIVE] == 1
+    assert shapes("__xxxxx__")[LINE_FOUR] == 0
+    assert shapes("___x_x___")[LINE_OPEN_TWO] == 1
+    assert sum(shapes("_________")) == 0
+
+
+def test_totals_match_full_recompute():
+    rng = random.Random(11)
+    for size in (15, 19):
+        state = GameState(size)
+        state.reset(start_immediately=True)
+        position = SearchPosition(state, "freestyle")
+        made = []
+        for step in range(400):
+            if made and rng.random() < 0.4:
+                position.unmake(*made.pop())
+            else:
+                row, col = rng.randrange(size), rng.randrange(size)
+                if position.board.grid[row][col]:
+                    continue
+                position.make(row, col, rng.choice((1, 2)))
+                made.append((row, col))
+            if step % 10 == 0:
+                assert position.evaluator.totals == LineEvaluator(position.board).totals
+        while made:
+            position.unmake(*made.pop())
+        assert position.evaluator.totals == [0, 0, 0]
@@ -0,0 +1,116 @@
+# coding:utf-8
+"""对局时间线(悔棋、重做、变化分支)与增量禁手表的测试"""
+import random
+
+from gomoku.core import Game, rules
+
+
+def full_forbidden(game):
+    """整盘重算的禁手点"""
+    return frozenset(rules.find_forbidden_positions(game.board, game.renju))
+
+
+def random_game(rng, moves=30, variant=None):
+    """在中央区域随机落子，直到下满moves步或分出胜负"""
+    game = Game(15, variant=variant)
+    game.reset()
+    for _ in range(moves):
+        row, col = rng.randrange(3, 12), rng.randrange(3, 12)
+        if game.play(row, col) == 'win':
+            break
+    return game
+
+
+def game_state(game):
+    return game.board.hash, game.forbidden.positions, game.current_player, game.game_over, game.winner
+
+
+def test_undo_redo_matches_full_recompute():
+    rng = random.Random(3)
+    for _ in range(15):
+        game = random_game(rng)
+        path = game.timeline.path()
+
+        # 悔棋到开局，每一步的禁手表都与整盘重算一致
+        states = []
+        while True:
+            assert game.forbidden.positions == full_forbidden(game)
+            states.append(game_state(game))
+            if not game.undo():
+                break
+        states.reverse()
+        assert game.board.hash == 0
+
+        # 重做回到终局，每一步都恢复到悔棋前的状态
+        count = 0
+        while game.redo():
+            count += 1
+            assert game_state(game) == states[count]
+        assert count == len(path)
+
+
+def test_variation_branches():
+    rng = random.Random(5)
+    for _ in range(15):
+        game = random_game(rng)
+        path = game.timeline.path()
+        branch = len(path) // 2
+        for _ in range(len(path) - branch):
+            game.undo()
+
+        # 走一步不同的棋形成新分支，原来的着法仍可作为变化重做
+        while True:
+            row, col = rng.randrange(15), rng.randrange(15)
+            if (row, col) != path[branch] and game.play(row, col) in ('ok', 'win'):
+                break
+        assert not game.variations()
+        game.undo()
+        assert len(game.variations()) == 2
+        assert game.redo(path[branch])
+        assert game.timeline.path() == path[:branch + 1]
+        assert game.forbidden.positions == full_forbidden(game)
+
+
+def test_variant_switch_invalidates_deltas():
+    game = Game(15, variant='freestyle')
+    game.reset()
+    for move in [(7, 7), (0, 0), (7, 8), (0, 1), (8, 7)]:
+        game.play(*move)
+    game.undo()
+    game.undo()
+    game.set_variant('renju')
+    while game.redo():
+        pass
+    assert game.forbidden.positions == full_forbidden(game)
+    assert not game.game_over and game.winner == 0
+
+
+def test_variant_switch_rechecks_redone_win():
+    # 黑棋长连：自由规则下获胜，连珠规则下是禁手，标准规则下不算胜也不禁
+    moves = [(7, 3), (0, 0), (7, 4), (0, 2), (7, 5), (0, 4), (7, 7), (0, 6), (7, 8), (0, 8), (7, 6)]
+    game = Game(15, variant='freestyle')
+    game.reset()
+    for move in moves:
+        result = game.play(*move)
+    assert result == 'win' and game.winner == 1
+
+    game.undo()
+    game.set_variant('renju')
+    assert not game.redo()
+    assert not game.game_over and game.winner == 0
+    assert game.timeline.path() == moves[:-1]
+    assert game.forbidden.positions == full_forbidden(game)
+
+    game.set_variant('standard')
+    assert game.redo()
+    assert not game.game_over and game.winner == 0
+    assert game.current_player == 2
+
+    # 沿用已有变化的节点时，节点上的胜负按这次的结果重写
+    game.undo()
+    game.set_variant('freestyle')
+    assert game.play(7, 6) == 'win'
+    game.undo()
+    game.set_variant('standard')
+    assert game.play(7, 6) == 'ok'
+    assert not game.timeline.current.game_over and game.timeline.current.winner == 0
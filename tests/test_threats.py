@@ -0,0 +1,41 @@
+# coding:utf-8
+"""增量威胁表与整盘重建、rules.find_threats的对比"""
+import random
+
+from gomoku.core import Game, VARIANTS, rules
+from gomoku.core.threats import ThreatTracker
+
+
+def check_tracker(game):
+    fresh = ThreatTracker(game.board, game.variant)
+    tracker = game.threats
+    for color in (1, 2):
+        for shape, points in fresh._points[color].items():
+            assert tracker._points[color][shape] == points
+        assert tracker._shapes[color] == fresh._shapes[color]
+        assert game.find_threats(color) == rules.find_threats(game.board, color, game.renju, game.variant)
+    assert tracker.forbidden_candidates == fresh.forbidden_candidates
+
+
+def test_tracker_matches_rebuild_over_play_undo_redo():
+    rng = random.Random(5)
+    for name in VARIANTS:
+        for _ in range(4):
+            game = Game(15, variant=name)
+            game.reset()
+            for step in range(60):
+                row, col = rng.randrange(2, 13), rng.randrange(2, 13)
+                result = game.play(row, col)
+                if step % 7 == 0:
+                    check_tracker(game)
+                if result == 'win' or rng.random() < 0.15:
+                    game.undo()
+                    check_tracker(game)
+                    if result == 'win':
+                        break
+            while game.undo():
+                pass
+            check_tracker(game)
+            while game.redo():
+                pass
+            check_tracker(game)
@@ -0,0 +1,36 @@
+# coding:utf-8
+"""置换表的读写校验与换规则后的搜索"""
+from gomoku.engine import AlphaBetaEngine, SearchPosition
+from gomoku.engine.ttable import TranspositionTable, DEPTH_SHIFT, EXACT, LOWER
+
+
+def test_store_probe_round_trip():
+    tt = TranspositionTable(1)
+    key = 0x123456789ABCDEF0
+    tt.store(key, 5, EXACT, -4321, 113)
+    assert tt.probe(key) == (5, EXACT, -4321, 113)
+    # 同一个桶里的其他局面不会被误用
+    assert tt.probe(key ^ (1 << 40)) is None
+    tt.store(key, 7, LOWER, 99, 1)
+    assert tt.probe(key) == (7, LOWER, 99, 1)
+
+
+def test_torn_entry_rejected():
+    tt = TranspositionTable(1)
+    key = 0x0FEDCBA987654321
+    tt.store(key, 3, EXACT, 10, 5)
+    slot = (key & tt.mask) * 4
+    # 模拟并发写入只写了数据的一半：校验不一致，条目被忽略
+    tt.table[slot + 1] ^= 1 << DEPTH_SHIFT
+    assert tt.probe(key) is None
+
+
+def test_engine_does_not_reuse_entries_across_variants(double_four_state):
+    state = double_four_state
+    engine = AlphaBetaEngine(time_limit=0.5, max_depth=4)
+    engine.vcf.max_depth = 0  # 跳过VCF预检，走置换表的路径
+    free = engine.search(state, "freestyle")
+    assert free.move == (7, 7)
+    renju = engine.search(state, "renju")
+    assert renju.move is not None
+    assert SearchPosition(state, "renju").is_legal(renju.move[0], renju.move[1], 1)
@@ -0,0 +1,19 @@
+# coding:utf-8
+"""VCF求解器的缓存不能跨规则使用"""
+from gomoku.engine import SearchPosition
+from gomoku.engine.vcf import VCFSolver
+
+FREESTYLE_LINE = [(7, 7), (7, 8), (8, 7)]
+
+
+def test_freestyle_then_renju(double_four_state):
+    solver = VCFSolver()
+    assert solver.solve(SearchPosition(double_four_state, "freestyle"), 1) == FREESTYLE_LINE
+    assert solver.solve(SearchPosition(double_four_state, "renju"), 1) is None
+
+
+def test_renju_then_freestyle(double_four_state):
+    solver = VCFSolver()
+    assert solver.solve(SearchPosition(double_four_state, "renju"), 1) is None
+    assert solver.solve(SearchPosition(double_four_state, "freestyle"), 1) == FREESTYLE_LINE
+
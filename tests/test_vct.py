@@ -0,0 +1,67 @@
+# coding:utf-8
+"""VCT求解器：主要变化可以逐步落子直到成五，深度受限的否定结论不能用于更深的求解，也不能跨规则使用"""
+import pytest
+
+from gomoku.core import Game
+from gomoku.engine.vct import VCTSolver
+
+# (规则, 开局着法)：轮到的一方有VCT，但两步进攻以内证明不了
+POSITIONS = [
+    ("renju", [(4, 5), (10, 6), (5, 9), (5, 7), (7, 10), (7, 4), (7, 8), (6, 5), (10, 7), (10, 8), (6, 9),
+               (7, 6), (9, 7), (5, 5), (9, 5), (4, 7), (5, 6), (6, 4), (8, 6), (8, 8), (9, 10)]),
+    ("freestyle", [(5, 4), (8, 4), (5, 9), (8, 6), (6, 5), (8, 10), (9, 8), (6, 4), (9, 6), (5, 7), (7, 7),
+                   (4, 5)]),
+]
+
+
+# 白棋进攻，黑棋唯一的堵点是禁手
+FORBIDDEN_DEFENCE = ("renju", [(10, 4), (4, 5), (5, 5), (4, 9), (7, 7), (5, 8), (5, 10), (4, 8), (6, 10),
+                               (7, 4), (6, 8), (9, 8), (10, 6)])
+
+
+def make_game(variant, moves):
+    game = Game(15, variant=variant)
+    game.reset()
+    for row, col in moves:
+        game.play(row, col)
+    return game
+
+
+def assert_line_plays_out(game, line):
+    """在对局上逐步落下主要变化：每一步都合法，最后一步成五"""
+    replay = make_game(game.variant.name, game.timeline.path())
+    results = [replay.play(row, col) for row, col in line]
+    assert results[-1] == "win"
+    assert all(result == "ok" for result in results[:-1])
+
+
+@pytest.mark.parametrize("variant,moves", POSITIONS + [FORBIDDEN_DEFENCE])
+def test_principal_line_plays_out(variant, moves):
+    game = make_game(variant, moves)
+    result = VCTSolver(max_nodes=20000).solve_state(game.snapshot(), game.variant)
+    assert result.proven is True
+    assert_line_plays_out(game, result.line)
+
+
+def test_stop_before_solve_is_kept():
+    game = make_game(*POSITIONS[0])
+    solver = VCTSolver(max_nodes=20000)
+    solver.stop()
+    assert solver.solve_state(game.snapshot(), game.variant).proven is None
+    solver.reset_stop()
+    assert solver.solve_state(game.snapshot(), game.variant).proven is True
+
+
+@pytest.mark.parametrize("variant,moves", POSITIONS)
+def test_shallow_disproof_not_reused(variant, moves):
+    game = make_game(variant, moves)
+    assert VCTSolver(max_nodes=20000).solve_state(game.snapshot(), game.variant).proven is True
+
+    solver = VCTSolver(max_depth=2, max_nodes=20000)
+    assert solver.solve_state(game.snapshot(), game.variant).proven is False
+    other = "freestyle" if variant == "renju" else "renju"
+    solver.solve_state(game.snapshot(), other)
+    solver.max_depth = 10
+    result = solver.solve_state(game.snapshot(), game.variant)
+    assert result.proven is True
+    assert_line_plays_out(game, result.line)